@@ -0,0 +1,4 @@
+"""Benchmarks for performance critical parts of the backend.
+
+Run from the `backend` folder, e.g.: `python -m benchmarks.frame_buffer_benchmark`.
+"""
@@ -0,0 +1,125 @@
+"""Benchmark bytes copied per frame by the TrackHandler frame pipeline.
+
+Compares the previous pipeline, which converted every frame to a numpy.ndarray once
+for the group filters and once more for the filters, with the shared
+hub.frame_buffer.FrameBuffer.  The `negotiated` rows use the formats selected for a
+group filter accepting `gray` and a filter accepting `yuv420p` (see
+hub.frame_formats), instead of `bgr24`.  The `analysis-only` rows use a filter that
+does not modify the frame, which is forwarded without creating a new frame.
+
+Usage (from the `backend` folder): `python -m benchmarks.frame_buffer_benchmark`
+"""
+
+import time
+import numpy
+from fractions import Fraction
+from argparse import ArgumentParser
+from av import VideoFrame, AudioFrame
+
+from hub.frame_buffer import FrameBuffer
+from hub.frame_formats import wrap
+
+
+def create_video_frame(width: int, height: int) -> VideoFrame:
+    """Create a yuv420p frame, matching the format produced by the video decoders."""
+    ndarray = numpy.random.randint(0, 255, (height, width, 3), dtype=numpy.uint8)
+    frame = VideoFrame.from_ndarray(ndarray, format="bgr24").reformat(format="yuv420p")
+    frame.pts = 0
+    frame.time_base = Fraction(1, 90000)
+    return frame
+
+
+def create_audio_frame(samples: int) -> AudioFrame:
+    """Create a s16 stereo frame, matching the format produced by the opus decoder."""
+    ndarray = numpy.zeros((1, samples * 2), dtype=numpy.int16)
+    frame = AudioFrame.from_ndarray(ndarray, format="s16", layout="stereo")
+    frame.sample_rate = 48000
+    frame.pts = 0
+    frame.time_base = Fraction(1, 48000)
+    return frame
+
+
+def legacy_pipeline(frame: VideoFrame | AudioFrame, kind: str) -> int:
+    """Bytes copied by the pipeline before FrameBuffer was introduced."""
+    copied = 0
+    for _ in range(2):  # Group filter stage and filter stage
+        if kind == "video":
+            ndarray = frame.to_ndarray(format="bgr24")
+        else:
+            ndarray = frame.to_ndarray()
+        copied += ndarray.nbytes
+    wrap(ndarray, "bgr24" if kind == "video" else "s16", frame)
+    return copied
+
+
+def frame_buffer_pipeline(
+    frame: VideoFrame | AudioFrame,
+    group_filter_format: str,
+    filter_format: str,
+    analysis_only: bool = False,
+) -> int:
+    """Bytes copied by the pipeline using a shared FrameBuffer.
+
+    Stages with an empty format are skipped.
+    """
+    buffer = FrameBuffer(frame)
+    if group_filter_format:
+        buffer.readonly(group_filter_format)
+    if filter_format and analysis_only:
+        buffer.readonly(filter_format)
+    elif filter_format:
+        buffer.writable(filter_format)
+    buffer.to_frame()
+    return buffer.bytes_copied
+
+
+def measure(func, *args, repetitions: int) -> tuple[int, float]:
+    """Run `func` `repetitions` times.  Returns bytes copied and ms per frame."""
+    start = time.perf_counter()
+    copied = 0
+    for _ in range(repetitions):
+        copied = func(*args)
+    elapsed = (time.perf_counter() - start) * 1000 / repetitions
+    return copied, elapsed
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--repetitions", type=int, default=200)
+    args = parser.parse_args()
+
+    frames = {
+        "video": create_video_frame(args.width, args.height),
+        "audio": create_audio_frame(960),
+    }
+    print(f"{'kind':<6} {'pipeline':<44} {'bytes/frame':>12} {'ms/frame':>9}")
+    for kind, frame in frames.items():
+        copied, ms = measure(legacy_pipeline, frame, kind, repetitions=args.repetitions)
+        print(
+            f"{kind:<6} {'before: group filters + filters':<44} {copied:>12} {ms:>9.3f}"
+        )
+        default = "bgr24" if kind == "video" else "s16"
+        negotiated = ("gray", "yuv420p") if kind == "video" else ("s16", "s16")
+        analysis = ("gray", "gray") if kind == "video" else ("s16", "s16")
+        for label, group_filter_format, filter_format, analysis_only in [
+            ("after: group filters + filters", default, default, False),
+            ("after: group filters only", default, "", False),
+            ("after: filters only", "", default, False),
+            ("after: negotiated, group filters + filters", *negotiated, False),
+            ("after: analysis-only group filters + filters", *analysis, True),
+        ]:
+            copied, ms = measure(
+                frame_buffer_pipeline,
+                frame,
+                group_filter_format,
+                filter_format,
+                analysis_only,
+                repetitions=args.repetitions,
+            )
+            print(f"{kind:<6} {label:<44} {copied:>12} {ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
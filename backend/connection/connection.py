@@ -71,6 +71,7 @@ class Connection(ConnectionInterface):
     _audio_record_handler: RecordHandler
     _video_record_handler: RecordHandler
     _raw_video_record_handler: RecordHandler
+    _recording_path: str
 
     def __init__(
         self,
@@ -112,6 +113,7 @@ class Connection(ConnectionInterface):
         self._state = ConnectionState.NEW
         self._main_pc = pc
         self._message_handler = message_handler
+        self._recording_path = record_data[1]
         self._incoming_audio = TrackHandler("audio", self, filter_api)
         self._incoming_video = TrackHandler("video", self, filter_api)
 
@@ -169,6 +171,14 @@ class Connection(ConnectionInterface):
         """Get hub.track_handler.TrackHandler for incoming video track."""
         return self._incoming_video
 
+    @property
+    def recording_path(self) -> str:
+        """Get the recording path of the participant, empty for experimenters.
+
+        See users.participant.Participant.get_recording_path.
+        """
+        return self._recording_path
+
     def __str__(self) -> str:
         """Get string representation of this Connection."""
         return f"state={self._state}"
@@ -291,6 +301,19 @@ class Connection(ConnectionInterface):
             self._video_record_handler.stop(), self._raw_video_record_handler.stop(), self._audio_record_handler.stop()
         )
 
+    async def get_traces(self) -> dict[str, dict]:
+        # For docstring see ConnectionInterface or hover over function declaration
+        return {
+            kind: {
+                "traces": track_handler.tracer.dump(),
+                "filters": track_handler.scheduler.stats(),
+            }
+            for kind, track_handler in (
+                ("audio", self._incoming_audio),
+                ("video", self._incoming_video),
+            )
+        }
+
     async def set_video_filters(self, filters: list[FilterDict]) -> None:
         # For docstring see ConnectionInterface or hover over function declaration
         await self._incoming_video.set_filters(filters)
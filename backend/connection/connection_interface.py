@@ -216,3 +216,17 @@ class ConnectionInterface(AsyncIOEventEmitter, metaclass=ABCMeta):
         Both audio and video recorder will stop.
         """
         pass
+
+    @abstractmethod
+    async def get_traces(self) -> dict[str, dict]:
+        """Get the pipeline traces and filter schedules of the incoming audio and
+        video tracks.
+
+        Returns
+        -------
+        dict
+            By track kind, "audio" and "video": `traces` of the sampled frames, see
+            hub.frame_tracer.FrameTracer.dump, and `filters`, the run and skip counts
+            of the filters, see hub.frame_scheduler.FrameScheduler.stats.
+        """
+        pass
@@ -179,6 +179,9 @@ class ConnectionRunner:
                 await self._connection.start_recording()
             case "STOP_RECORDING":
                 await self._connection.stop_recording()
+            case "GET_TRACES":
+                traces = await self._connection.get_traces()
+                self._send_command("TRACES", traces, command_nr)
             case _:
                 self._logger.error(f"Unrecognized command from main process: {command}")
 
@@ -216,6 +216,10 @@ class ConnectionSubprocess(ConnectionInterface):
         # For docstring see ConnectionInterface or hover over function declaration
         await self._send_command("STOP_RECORDING", None)
 
+    async def get_traces(self) -> dict[str, dict]:
+        # For docstring see ConnectionInterface or hover over function declaration
+        return await self._send_command_wait_for_response("GET_TRACES", None)
+
     def _set_state(self, state: ConnectionState) -> None:
         """Set connection state and emit `state_change` event."""
         if self._state == state:
@@ -375,7 +379,7 @@ class ConnectionSubprocess(ConnectionInterface):
                 self._set_state(ConnectionState(data))
             case "API":
                 await self._message_handler(data)
-            case "CONNECTION_PROPOSAL" | "CONNECTION_ANSWER":
+            case "CONNECTION_PROPOSAL" | "CONNECTION_ANSWER" | "TRACES":
                 await self._set_answer(command_nr, data)
             case "LOG":
                 handle_log_from_subprocess(data, self._logger)
@@ -73,6 +73,8 @@ MESSAGE_TYPES = Literal[
     "SET_GROUP_FILTERS",
     "PING",
     "PONG",
+    "GET_TRACES",
+    "TRACES",
 ]
 """Possible message types for custom_types.message.MessageDict.
 
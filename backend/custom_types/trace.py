@@ -0,0 +1,41 @@
+"""Provide the `TraceRequestDict` TypedDict and is_valid_trace_request function.
+
+Use for type hints and static type checking without any overhead during runtime.
+"""
+
+from typing import TypeGuard, TypedDict
+
+import custom_types.util as util
+
+
+class TraceRequestDict(TypedDict):
+    """TypedDict for the GET_TRACES request.
+
+    Attributes
+    ----------
+    participant_id : str
+        Participant ID for the requested endpoint, or "all" for all participants.
+    """
+
+    participant_id: str
+
+
+def is_valid_trace_request(data) -> TypeGuard[TraceRequestDict]:
+    """Check if `data` is a valid custom_types.trace.TraceRequestDict.
+
+    Checks if all required and no unknown keys exist in data as well as the data types
+    of the values.
+
+    Parameters
+    ----------
+    data : any
+        Data to perform check on.
+
+    Returns
+    -------
+    bool
+        True if `data` is a valid TraceRequestDict.
+    """
+    return util.check_valid_typeddict_keys(data, TraceRequestDict) and isinstance(
+        data["participant_id"], str
+    )
@@ -14,6 +14,10 @@ from hub.exceptions import ErrorDictException
 from session.data.session import SessionData
 
 from group_filters.group_filter_aggregator import GroupFilterAggregator
+from group_filters.group_filter_aggregator_pool import (
+    GroupFilterAggregatorPool,
+    RemoteGroupFilterAggregator,
+)
 from filters.filter_dict import FilterDict
 from group_filters import group_filter_aggregator_factory
 import asyncio
@@ -35,10 +39,19 @@ class Experiment(AsyncIOEventEmitter):
     session: SessionData
     _experimenters: list[Experimenter]
     _participants: dict[str, Participant]
-    _audio_group_filter_aggregators: dict[str, GroupFilterAggregator]
-    _video_group_filter_aggregators: dict[str, GroupFilterAggregator]
-
-    def __init__(self, session: SessionData):
+    _audio_group_filter_aggregators: dict[
+        str, GroupFilterAggregator | RemoteGroupFilterAggregator
+    ]
+    _video_group_filter_aggregators: dict[
+        str, GroupFilterAggregator | RemoteGroupFilterAggregator
+    ]
+    _aggregator_pool: GroupFilterAggregatorPool | None
+
+    def __init__(
+        self,
+        session: SessionData,
+        aggregator_pool: GroupFilterAggregatorPool | None = None,
+    ):
         """Start a new Experiment.
 
         Parameters
@@ -46,6 +59,10 @@ class Experiment(AsyncIOEventEmitter):
         session : session.data.session.SessionData
             SessionData this experiment is based on. Will modify the session during
             execution.
+        aggregator_pool : GroupFilterAggregatorPool, optional
+            Pool hosting the group filter aggregators, see
+            group_filters.group_filter_aggregator_pool.  If None, aggregators run on
+            the event loop of the experiment.
         """
         super().__init__()
         self._logger = logging.getLogger(f"Experiment-{session.id}")
@@ -57,6 +74,7 @@ class Experiment(AsyncIOEventEmitter):
         self.session.creation_time = timestamp()
         self._audio_group_filter_aggregators = {}
         self._video_group_filter_aggregators = {}
+        self._aggregator_pool = aggregator_pool
 
     def __str__(self) -> str:
         """Get string representation of this Experiment."""
@@ -431,36 +449,44 @@ class Experiment(AsyncIOEventEmitter):
         self._state = state
         self.emit("state", self._state)
 
+    def _create_group_filter_aggregator(
+        self, kind: str, config: FilterDict, port: int
+    ) -> GroupFilterAggregator | RemoteGroupFilterAggregator:
+        """Create an aggregator in the aggregator pool, or in this process if there is
+        no pool."""
+        if self._aggregator_pool is not None:
+            return self._aggregator_pool.create_aggregator(kind, config, port)
+        return group_filter_aggregator_factory.create_group_filter_aggregator(
+            kind, config, port
+        )
+
     async def set_video_group_filter_aggregators(
         self, group_filter_configs: list[FilterDict], ports: list[int]
     ) -> None:
         old_group_filter_aggregators = self._video_group_filter_aggregators
 
         self._video_group_filter_aggregators = {}
+        new_group_filter_aggregators = []
         coroutines = []
         for config, port in zip(group_filter_configs, ports):
             filter_id = config["id"]
             # Reuse existing filter for matching id and name.
             if (
                 filter_id in old_group_filter_aggregators
-                and old_group_filter_aggregators[filter_id]._group_filter.config["name"]
+                and old_group_filter_aggregators[filter_id].config["name"]
                 == config["name"]
             ):
                 self._video_group_filter_aggregators[
                     filter_id
                 ] = old_group_filter_aggregators[filter_id]
 
-                self._video_group_filter_aggregators[
-                    filter_id
-                ]._group_filter.set_config(config)
+                self._video_group_filter_aggregators[filter_id].set_config(config)
                 self._video_group_filter_aggregators[filter_id].delete_data()
             else:
                 # Create a new filter for configs with empty id.
-                self._video_group_filter_aggregators[
-                    filter_id
-                ] = group_filter_aggregator_factory.create_group_filter_aggregator(
-                    "video", config, port
-                )
+                aggregator = self._create_group_filter_aggregator("video", config, port)
+                self._video_group_filter_aggregators[filter_id] = aggregator
+                new_group_filter_aggregators.append(aggregator)
 
         # Cleanup old group filter aggregators
         for (
@@ -470,13 +496,10 @@ class Experiment(AsyncIOEventEmitter):
             if filter_id not in self._video_group_filter_aggregators:
                 coroutines.append(old_group_filter_aggregator.cleanup())
 
-        # Run new group filter aggregators
-        for (
-            new_group_filter_aggregator
-        ) in self._video_group_filter_aggregators.values():
+        # Run new group filter aggregators, until they are cleaned up
+        for new_group_filter_aggregator in new_group_filter_aggregators:
             task = asyncio.create_task(new_group_filter_aggregator.run())
             new_group_filter_aggregator.set_task(task)
-            coroutines.append(task)
 
         await asyncio.gather(*coroutines)
 
@@ -486,30 +509,27 @@ class Experiment(AsyncIOEventEmitter):
         old_group_filter_aggregators = self._audio_group_filter_aggregators
 
         self._audio_group_filter_aggregators = {}
+        new_group_filter_aggregators = []
         coroutines = []
         for config, port in zip(group_filter_configs, ports):
             filter_id = config["id"]
             # Reuse existing filter for matching id and name.
             if (
                 filter_id in old_group_filter_aggregators
-                and old_group_filter_aggregators[filter_id]._group_filter.config["name"]
+                and old_group_filter_aggregators[filter_id].config["name"]
                 == config["name"]
             ):
                 self._audio_group_filter_aggregators[
                     filter_id
                 ] = old_group_filter_aggregators[filter_id]
 
-                self._audio_group_filter_aggregators[
-                    filter_id
-                ]._group_filter.set_config(config)
+                self._audio_group_filter_aggregators[filter_id].set_config(config)
                 self._audio_group_filter_aggregators[filter_id].delete_data()
             else:
                 # Create a new filter for configs with empty id.
-                self._audio_group_filter_aggregators[
-                    filter_id
-                ] = group_filter_aggregator_factory.create_group_filter_aggregator(
-                    "audio", config, port
-                )
+                aggregator = self._create_group_filter_aggregator("audio", config, port)
+                self._audio_group_filter_aggregators[filter_id] = aggregator
+                new_group_filter_aggregators.append(aggregator)
 
         # Cleanup old group filter aggregators
         for (
@@ -519,12 +539,9 @@ class Experiment(AsyncIOEventEmitter):
             if filter_id not in self._audio_group_filter_aggregators:
                 coroutines.append(old_group_filter_aggregator.cleanup())
 
-        # Run new group filter aggregators
-        for (
-            new_group_filter_aggregator
-        ) in self._audio_group_filter_aggregators.values():
+        # Run new group filter aggregators, until they are cleaned up
+        for new_group_filter_aggregator in new_group_filter_aggregators:
             task = asyncio.create_task(new_group_filter_aggregator.run())
             new_group_filter_aggregator.set_task(task)
-            coroutines.append(task)
 
         await asyncio.gather(*coroutines)
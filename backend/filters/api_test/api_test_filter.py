@@ -11,6 +11,10 @@ from filters.filter import Filter
 class FilterAPITestFilter(Filter):
     """Filter testing filter API."""
 
+    # Frame contents are not used, accept formats that are cheap to decode.
+    analysis_only = True
+    accepted_formats = ("gray", "yuv420p", "s16", "fltp", "bgr24")
+
     @staticmethod
     def name(self) -> str:
         return "FILTER_API_TEST"
@@ -0,0 +1,195 @@
+"""Provide `DelayBuffer` and `MemoryBudget` used by the `DelayFilter`."""
+
+from __future__ import annotations
+
+import math
+import numpy
+
+_TOLERANCE = 1e-4
+
+
+class MemoryBudget:
+    """Memory available for the delay buffers of a participant.
+
+    Attributes
+    ----------
+    cap : int
+        Maximum number of bytes.
+    used : int
+        Number of bytes reserved by delay buffers.
+    """
+
+    cap: int
+    used: int
+
+    def __init__(self, cap: int) -> None:
+        """Initialize new MemoryBudget with `cap` bytes."""
+        self.cap = cap
+        self.used = 0
+
+    @property
+    def available(self) -> int:
+        """Number of bytes that can still be reserved."""
+        return max(self.cap - self.used, 0)
+
+    def reserve(self, nbytes: int) -> None:
+        """Reserve `nbytes`.  Check `available` first."""
+        self.used += nbytes
+
+    def release(self, nbytes: int) -> None:
+        """Release `nbytes` reserved before."""
+        self.used -= nbytes
+
+
+class DelayBuffer:
+    """Ring buffer delaying frames by a fixed time, based on the frame timestamps.
+
+    All frames are stored in a single preallocated numpy.ndarray with shape (slots,
+    *frame shape).  For each frame, the newest stored frame that is at least `delay`
+    seconds older is returned.  While the buffer is filling, the oldest frame is
+    returned.
+
+    The initial number of slots is based on the expected frame interval.  If the frame
+    rate is higher, the ring grows, as long as the MemoryBudget allows it.  Otherwise
+    the oldest frames are overwritten and the delay is shortened.
+
+    Attributes
+    ----------
+    delay : float
+        Delay in seconds.
+    shortened : bool
+        Whether frames were overwritten, because the memory budget was exceeded.
+    """
+
+    delay: float
+    shortened: bool
+    _budget: MemoryBudget
+    _ring: numpy.ndarray | None
+    _times: numpy.ndarray
+    _start: int
+    _count: int
+
+    def __init__(self, delay: float, budget: MemoryBudget) -> None:
+        """Initialize new DelayBuffer.
+
+        Parameters
+        ----------
+        delay : float
+            Delay in seconds.
+        budget : MemoryBudget
+            Budget the memory of the ring is reserved from.
+        """
+        self.delay = delay
+        self.shortened = False
+        self._budget = budget
+        self._ring = None
+        self._times = numpy.empty(0)
+        self._start = 0
+        self._count = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes allocated for the ring."""
+        return 0 if self._ring is None else self._ring.nbytes
+
+    def push(
+        self, ndarray: numpy.ndarray, time: float, interval: float
+    ) -> numpy.ndarray:
+        """Add a frame and get the delayed frame.
+
+        Parameters
+        ----------
+        ndarray : numpy.ndarray
+            New frame.  Copied into the ring.
+        time : float
+            Timestamp of the frame in seconds.
+        interval : float
+            Expected time between frames in seconds.  Used to size the ring.
+
+        Returns
+        -------
+        numpy.ndarray
+            Read-only view of the delayed frame.  Valid until the next call to `push`.
+        """
+        if self.delay <= 0:
+            return ndarray
+
+        if (
+            self._ring is None
+            or self._ring.shape[1:] != ndarray.shape
+            or self._ring.dtype != ndarray.dtype
+        ):
+            self._allocate(ndarray, math.ceil(self.delay / interval) + 2)
+        elif self._count > 0 and time < self._times[self._index(self._count - 1)]:
+            # Timestamps jumped back, e.g. because the source track was replaced.
+            self._start = self._count = 0
+
+        if self._ring is None:
+            return ndarray
+
+        # Drop frames that are older than the frame returned for `time`.  Allow for
+        # rounding errors of the timestamps.
+        target = time - self.delay + _TOLERANCE
+        while self._count >= 2 and self._times[self._index(1)] <= target:
+            self._drop()
+
+        if self._count == len(self._ring) and not self._grow():
+            self._drop()
+            self.shortened = True
+
+        index = self._index(self._count)
+        self._ring[index] = ndarray
+        self._times[index] = time
+        self._count += 1
+
+        delayed = self._ring[self._start].view()
+        delayed.flags.writeable = False
+        return delayed
+
+    def release(self) -> None:
+        """Free the ring and release its memory from the budget."""
+        self._budget.release(self.nbytes)
+        self._ring = None
+        self._start = self._count = 0
+
+    def _index(self, offset: int) -> int:
+        """Get the slot of the frame `offset` frames after the oldest frame."""
+        return (self._start + offset) % len(self._times)
+
+    def _drop(self) -> None:
+        """Drop the oldest frame."""
+        self._start = self._index(1)
+        self._count -= 1
+
+    def _allocate(self, ndarray: numpy.ndarray, slots: int) -> None:
+        """Allocate a new, empty ring for frames like `ndarray`."""
+        self.release()
+        slots = min(slots, self._budget.available // max(ndarray.nbytes, 1))
+        if slots < 1:
+            self.shortened = True
+            return
+        self._ring = numpy.empty((slots, *ndarray.shape), ndarray.dtype)
+        self._times = numpy.empty(slots)
+        self._budget.reserve(self._ring.nbytes)
+
+    def _grow(self) -> bool:
+        """Double the number of slots, if the budget allows it."""
+        assert self._ring is not None
+        slots = len(self._ring)
+        frame_nbytes = self._ring.nbytes // slots
+        added = min(slots, self._budget.available // frame_nbytes)
+        if added < 1:
+            return False
+
+        # Copy the frames in order, starting with the oldest frame.
+        ring = numpy.empty((slots + added, *self._ring.shape[1:]), self._ring.dtype)
+        times = numpy.empty(slots + added)
+        first = min(self._count, slots - self._start)
+        ring[:first] = self._ring[self._start : self._start + first]
+        ring[first : self._count] = self._ring[: self._count - first]
+        times[:first] = self._times[self._start : self._start + first]
+        times[first : self._count] = self._times[: self._count - first]
+
+        self._budget.reserve(ring.nbytes - self._ring.nbytes)
+        self._ring, self._times, self._start = ring, times, 0
+        return True
@@ -1,34 +1,84 @@
 """Provide `DelayFilter` filter."""
+
+from __future__ import annotations
+
+import logging
 import numpy
-from queue import Queue
+from time import monotonic
+from typing import TYPE_CHECKING
+from weakref import WeakKeyDictionary
 from av import VideoFrame, AudioFrame
 
 from filters.filter import Filter
 from filters.filter import FilterDict
+from hub import frame_formats
+from .delay_buffer import DelayBuffer, MemoryBudget
+
+if TYPE_CHECKING:
+    from hub.track_handler import TrackHandler
+
+_RESOLUTIONS = {"full": 1, "half": 0.5, "quarter": 0.25}
+_DEFAULT_VIDEO_INTERVAL = 1 / 30
+
+_budgets: WeakKeyDictionary[TrackHandler, MemoryBudget] = WeakKeyDictionary()
+"""Memory budget for the delay buffers of each participant, by video TrackHandler."""
 
 
 class DelayFilter(Filter):
-    """Filter delaying the input by a set amount of frames.
+    """Filter delaying the input by a set amount of time.
 
-    Works for audio or video input.
+    Works for audio or video input.  The delay is based on the timestamps of the
+    frames, so audio and video filters with the same delay stay in sync, independent
+    of the frame rate.  Frames are stored in a preallocated ring, see
+    filters.delay.delay_buffer.DelayBuffer, in their native format.  Video frames can
+    be stored in a lower resolution to reduce the memory usage.
+
+    The memory of all delay buffers of a participant is limited by
+    `delay_memory_cap_mb` in the config, see server.config.Config.  If the limit is
+    reached, the delay is shortened.
     """
 
-    buffer: Queue[numpy.ndarray]
+    accepted_formats = ("yuv420p", "s16")
+
+    _budget: MemoryBudget
+    _buffer: DelayBuffer
+    _scale: float
+    _warned: bool
+    _logger: logging.Logger
 
     def __init__(
-        self, config: FilterDict, audio_track_handler, video_track_handler
+        self,
+        config: FilterDict,
+        audio_track_handler: TrackHandler,
+        video_track_handler: TrackHandler,
     ) -> None:
-        """Initialize new MuteVideoFilter.
-
-        Load the muted frame image `/images/muted.png` and store it as av.VideoFrame as
-        well as numpy.ndarray for quick access in `process`.
+        """Initialize new DelayFilter.
 
         Parameters
         ----------
         See base class: filters.filter.Filter.
         """
         super().__init__(config, audio_track_handler, video_track_handler)
-        self.buffer = Queue(config["config"]["size"]["value"])
+        self._logger = logging.getLogger(f"DelayFilter-{config['id']}")
+        if video_track_handler not in _budgets:
+            # Imported here, server imports the filters through the session.
+            from server import Config
+
+            cap = Config().delay_memory_cap_mb * 1024 * 1024
+            _budgets[video_track_handler] = MemoryBudget(cap)
+        self._budget = _budgets[video_track_handler]
+        self._buffer = DelayBuffer(self._delay, self._budget)
+        self._warned = False
+        self._scale = _RESOLUTIONS.get(self._config_value("resolution", "full"), 1)
+
+    @property
+    def _delay(self) -> float:
+        """Get the configured delay in seconds."""
+        delay_ms = self._config_value("delay_ms", None)
+        if delay_ms is None:
+            # Previous versions configured the delay in frames.
+            return self._config_value("size", 0) * _DEFAULT_VIDEO_INTERVAL
+        return delay_ms / 1000
 
     @staticmethod
     def name(self) -> str:
@@ -50,20 +100,54 @@ class DelayFilter(Filter):
             "channel": "both",
             "groupFilter": False,
             "config": {
-                "size": {
+                "delay_ms": {
                     "min": 0,
-                    "max": 120,
-                    "step": 1,
-                    "value": 60,
-                    "defaultValue": 60,
+                    "max": 10000,
+                    "step": 10,
+                    "value": 2000,
+                    "defaultValue": 2000,
+                },
+                "resolution": {
+                    "defaultValue": list(_RESOLUTIONS),
+                    "value": "full",
+                    "requiresOtherFilter": False,
                 },
             },
         }
 
+    def set_config(self, config: FilterDict) -> None:
+        # For docstring see filters.filter.Filter or hover over function declaration
+        super().set_config(config)
+        scale = _RESOLUTIONS.get(self._config_value("resolution", "full"), 1)
+        if self._delay != self._buffer.delay or scale != self._scale:
+            self._buffer.release()
+            self._buffer = DelayBuffer(self._delay, self._budget)
+            self._scale = scale
+
+    async def cleanup(self) -> None:
+        # For docstring see filters.filter.Filter or hover over function declaration
+        self._buffer.release()
+
     async def process(
-        self, _: VideoFrame | AudioFrame, ndarray: numpy.ndarray
+        self, original: VideoFrame | AudioFrame, ndarray: numpy.ndarray
     ) -> numpy.ndarray:
-        self.buffer.put(ndarray)
-        if self.buffer.full():
-            return self.buffer.get()
-        return self.buffer.queue[0]
+        # For docstring see filters.filter.Filter or hover over function declaration
+        time = original.time if original.time is not None else monotonic()
+        if isinstance(original, AudioFrame):
+            interval = original.samples / original.sample_rate
+            delayed = self._buffer.push(ndarray, time, interval)
+        elif self._scale == 1:
+            delayed = self._buffer.push(ndarray, time, _DEFAULT_VIDEO_INTERVAL)
+        else:
+            width, height = frame_formats.frame_size(ndarray, self.frame_format)
+            stored = frame_formats.resize(ndarray, self.frame_format, self._scale)
+            delayed = self._buffer.push(stored, time, _DEFAULT_VIDEO_INTERVAL)
+            delayed = frame_formats.resize_to(delayed, self.frame_format, width, height)
+
+        if self._buffer.shortened and not self._warned:
+            self._warned = True
+            self._logger.warning(
+                "Delay shortened, the memory cap of the participant is reached. "
+                "Reduce the delay or resolution or increase delay_memory_cap_mb."
+            )
+        return delayed
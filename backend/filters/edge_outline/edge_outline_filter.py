@@ -16,6 +16,9 @@ class EdgeOutlineFilter(Filter):
     https://en.wikipedia.org/wiki/Canny_edge_detector : Canny edge detector.
     """
 
+    # Edges are detected on the luma, the result is a grayscale frame.
+    accepted_formats = ("gray",)
+
     @staticmethod
     def name(self) -> str:
         return "EDGE_OUTLINE"
@@ -35,11 +38,21 @@ class EdgeOutlineFilter(Filter):
             "id": id,
             "channel": "video",
             "groupFilter": False,
-            "config": {},
+            "config": {
+                "execution": {
+                    "defaultValue": ["inline", "thread", "process"],
+                    "value": "inline",
+                    "requiresOtherFilter": False,
+                },
+            },
         }
 
-    async def process(self, _: VideoFrame, ndarray: numpy.ndarray) -> numpy.ndarray:
+    @staticmethod
+    def kernel(ndarray: numpy.ndarray, _: dict) -> numpy.ndarray:
         # For docstring see filters.filter.Filter or hover over function declaration
         # Example based on https://github.com/aiortc/aiortc/tree/main/examples/server
-        ndarray = cv2.cvtColor(cv2.Canny(ndarray, 100, 200), cv2.COLOR_GRAY2BGR)
-        return ndarray
+        return cv2.Canny(ndarray, 100, 200)
+
+    async def process(self, _: VideoFrame, ndarray: numpy.ndarray) -> numpy.ndarray:
+        # For docstring see filters.filter.Filter or hover over function declaration
+        return self.kernel(ndarray, self.config["config"])
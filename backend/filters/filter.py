@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import numpy
-from typing import TYPE_CHECKING, TypeGuard
+from typing import TYPE_CHECKING, Callable, Literal, TypeGuard
 from abc import ABC, abstractmethod
 from av import VideoFrame, AudioFrame
 
@@ -13,6 +13,7 @@ from .filter_dict import FilterDict
 if TYPE_CHECKING:
     # Import TrackHandler only for type checking to avoid circular import error
     from hub.track_handler import TrackHandler
+    from hub.frame_transform import FrameTransform
 
 
 class Filter(ABC):
@@ -23,6 +24,19 @@ class Filter(ABC):
     audio_track_handler
     video_track_handler
     run_if_muted
+    analysis_only
+    accepted_formats
+    pyramid_level
+    frame_format
+    kernel
+    skippable
+    face_analysis
+    execution
+    run_every
+    rate
+    branch
+    after
+    scale
     config
     """
 
@@ -49,6 +63,59 @@ class Filter(ABC):
     after initialization.
     """
 
+    analysis_only: bool = False
+    """Whether this filter only analyses frames without modifying them.
+
+    Analysis-only filters receive a read-only `ndarray` in `process` and the returned
+    value is ignored.  If only analysis-only filters are executed, the incoming frame is
+    forwarded without creating a new frame.  Analysis-only filters may accept `gray`
+    without turning the frame grayscale.
+    """
+
+    accepted_formats: tuple[str, ...] = ("bgr24", "s16")
+    """Formats of `ndarray` this filter accepts in `process`, in order of preference.
+
+    See hub.frame_formats for the available formats.  The TrackHandler selects the
+    cheapest accepted format for the active pipeline, see `frame_format`.
+    Formats that do not match the kind of the track are ignored.
+
+    A modifying filter receiving `gray` returns a grayscale frame, i.e. all filters
+    executed after it will only receive the luma of the original frame.
+    """
+
+    pyramid_level: int = 0
+    """Resolution of `ndarray` analysis-only filters receive, as pyramid level.
+
+    0 for the full resolution, 1 for half and 2 for a quarter of the width and height.
+    Levels are computed once per frame for all stages, see
+    hub.frame_buffer.FrameBuffer.pyramid.  Scale coordinates found on `ndarray` by
+    `original.width / ndarray.shape[1]` for the full frame, e.g. for overlays.
+    Ignored for filters modifying the frame.
+    """
+
+    kernel: Callable[[numpy.ndarray, dict], numpy.ndarray] | None = None
+    """Optional picklable function computing the result of `process` without state.
+
+    Called with `ndarray` and `config["config"]` in a worker process instead of
+    `process`, if the `process` execution is selected.  See hub.filter_executor.
+    """
+
+    skippable: bool = False
+    """Whether the filter may be skipped if the frame budget is exceeded.
+
+    Set for expensive filters, where outdated results are acceptable under load.  See
+    hub.frame_scheduler.FrameScheduler and `skip`.
+    """
+
+    face_analysis: Literal["", "box", "landmarks"] = ""
+    """Face data this filter reads from `video_track_handler.faces`.
+
+    `box` for the face boxes, `landmarks` for boxes and 68 face landmarks.  The video
+    TrackHandler only analyses faces on frames a filter requesting them is executed
+    on, once per frame for all filters.  Filters can set it to "" at runtime once they
+    no longer read faces.  See hub.face_analysis.FaceAnalyzer.
+    """
+
     _config: FilterDict
 
     def __init__(
@@ -86,6 +153,69 @@ class Filter(ABC):
         """Get Filter config."""
         return self._config
 
+    @property
+    def frame_format(self) -> str:
+        """Get the format of `ndarray` passed to `process` on the current frame.
+
+        Selected by the TrackHandler executing this filter and read from its pipeline,
+        see hub.track_handler.TrackHandler.frame_format.  The first accepted format if
+        this filter is not part of a pipeline.
+        """
+        for track_handler in (self.video_track_handler, self.audio_track_handler):
+            if track_handler is None:
+                continue
+            frame_format = track_handler.frame_format(self)
+            if frame_format is not None:
+                return frame_format
+        return self.accepted_formats[0]
+
+    @property
+    def execution(self) -> str:
+        """Get the execution policy selected in the `execution` config of the filter.
+
+        `inline` if the filter has no `execution` config.  See
+        hub.filter_executor.FilterExecutor for the available policies.
+        """
+        return self._config_value("execution", "inline")
+
+    @property
+    def run_every(self) -> int:
+        """Get the `run_every` config: execute the filter on every n-th frame.
+
+        1 (every frame) if the filter has no `run_every` config.
+        """
+        return max(int(self._config_value("run_every", 1)), 1)
+
+    @property
+    def rate(self) -> float:
+        """Get the `rate` config: maximum executions per second.
+
+        0 (no limit) if the filter has no `rate` config.
+        """
+        return float(self._config_value("rate", 0))
+
+    @property
+    def branch(self) -> str:
+        """Get the branch of the filter graph this filter is part of.
+
+        "" for the output branch.  See filters.filter_dict.FilterDict.
+        """
+        return self._config.get("branch", "")
+
+    @property
+    def after(self) -> tuple[str, ...]:
+        """Get the branches that must be completed before this filter is executed."""
+        return tuple(self._config.get("after", []))
+
+    @property
+    def scale(self) -> float:
+        """Get the scale of the frames of the branch, if this filter starts a branch."""
+        return float(self._config.get("scale", 1))
+
+    def _config_value(self, key: str, default):
+        """Get the value of the `key` config of the filter, or `default` if missing."""
+        return self._config.get("config", {}).get(key, {}).get("value", default)
+
     def set_config(self, config: FilterDict) -> None:
         """Update filter config.
 
@@ -156,13 +286,15 @@ class Filter(ABC):
             Original frame with metadata that can be useful to the filter.  Can be
             ignored if metadata is not of interest.
         ndarray : numpy.ndarray
-            Frame as numpy.ndarray.  If the filter modifies the frame, it should modify
-            and return `ndarray`.
+            Frame as numpy.ndarray, in the format given by `frame_format`.  If the
+            filter modifies the frame, it should modify and return `ndarray`.
+            Read-only if `analysis_only` is True.
 
         Returns
         -------
         numpy.ndarray
-            Original or modified `ndarray`, based on input parameter.
+            Original or modified `ndarray`, based on input parameter.  Must have the
+            same format as `ndarray`.
 
         Notes
         -----
@@ -173,6 +305,46 @@ class Filter(ABC):
         """
         pass
 
+    async def skip(
+        self, original: VideoFrame | AudioFrame, ndarray: numpy.ndarray
+    ) -> numpy.ndarray:
+        """Called instead of `process` for frames this filter is not executed on.
+
+        Filters are not executed on frames according to their `run_every` and `rate`
+        config, or if `skippable` and the frame budget is exceeded.  See
+        hub.frame_scheduler.FrameScheduler.  Override to reuse previous results, e.g.
+        draw the last analysis result onto the frame.  Always executed inline.
+
+        Parameters and return value are the same as for `process`.  If not overridden,
+        the frame is passed on unchanged.
+        """
+        return ndarray
+
+    def transform(
+        self, original: VideoFrame, shape: tuple[int, ...]
+    ) -> FrameTransform | None:
+        """Describe the effect of `process` as geometric or colour transform.
+
+        Optional.  Override for filters that only move pixels or map colour values,
+        e.g. rotation.  The TrackHandler composes the transforms of consecutive filters
+        and applies them in a single pass, instead of calling `process` for each
+        filter.  See hub.frame_transform.FrameTransform.  Only used for `gray` and
+        `bgr24` frames, `process` must produce the same result.
+
+        Parameters
+        ----------
+        original : av.VideoFrame
+            Original frame with metadata, e.g. the timestamp.
+        shape : tuple of int
+            Shape of the frame the transform is applied to, in `frame_format`.
+
+        Returns
+        -------
+        hub.frame_transform.FrameTransform or None
+            Transform for this frame.  None if the filter is not a transform (default).
+        """
+        return None
+
     @staticmethod
     def validate_dict(data) -> TypeGuard[FilterDict]:
         return util.check_valid_typeddict_keys(data, FilterDict)
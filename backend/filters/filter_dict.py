@@ -1,7 +1,15 @@
 from typing import TypedDict
 
 
-class FilterDict(TypedDict):
+class _FilterGraphDict(TypedDict, total=False):
+    """Optional filter graph attributes of FilterDict, see FilterDict."""
+
+    branch: str
+    after: list[str]
+    scale: float
+
+
+class FilterDict(_FilterGraphDict):
     """TypedDict for basic filters with only basic attributes.
 
     Attributes
@@ -16,6 +24,17 @@ class FilterDict(TypedDict):
         If true, the filter is a groupFilter
     config: dict
         Filter configuration. Contains all variables for the filter
+    branch: str, optional
+        Branch of the filter graph the filter is part of.  Filters of the same branch
+        are executed in order, branches are executed concurrently.  Default: "", the
+        output branch, which modifies the outgoing frame.  Other branches analyse the
+        incoming frame, their results are not sent.
+    after: list of str, optional
+        Branches that must be completed before the filter is executed.
+    scale: float, optional
+        Resolution of the frames of the branch relative to the incoming frame, between
+        0 and 1.  Only read from the first filter of a branch other than the output
+        branch.  Default: 1.
 
 
     See Also
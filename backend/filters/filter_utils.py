@@ -45,6 +45,70 @@ def is_valid_filter_dict(data) -> TypeGuard[FilterDict]:
     return isinstance(data["id"], str) and filters[filter_name].validate_dict(data)
 
 
+def is_valid_filter_graph(filters: list[FilterDict]) -> bool:
+    """Check if the branches of `filters` form a valid filter graph.
+
+    Checks the data types of the optional `branch`, `after` and `scale` keys, that
+    all branches in `after` exist and that branches do not depend on themselves or the
+    output branch, directly or indirectly.  See filters.filter_dict.FilterDict.
+
+    Parameters
+    ----------
+    filters : list of filters.FilterDict
+        Filters to perform check on.  Must be valid FilterDicts.
+
+    Returns
+    -------
+    bool
+        True if `filters` form a valid filter graph.
+    """
+    dependencies: dict[str, set[str]] = {}
+    for filter in filters:
+        branch = filter.get("branch", "")
+        after = filter.get("after", [])
+        scale = filter.get("scale", 1)
+        if (
+            not isinstance(branch, str)
+            or not isinstance(after, list)
+            or not all(isinstance(name, str) for name in after)
+            or not isinstance(scale, (float, int))
+            or not 0 < scale <= 1
+        ):
+            logger.debug(f'Invalid branch, after or scale in filter "{filter["id"]}"')
+            return False
+        if branch == "" and scale != 1:
+            logger.debug("The output branch can not be scaled.")
+            return False
+        dependencies.setdefault(branch, set()).update(after)
+
+    for branch, after in dependencies.items():
+        for name in after:
+            if name == "" or name not in dependencies:
+                logger.debug(f'Branch "{branch}" depends on invalid branch: "{name}"')
+                return False
+
+    # Depth-first search for cycles.
+    completed: set[str] = set()
+
+    def has_cycle(branch: str, path: set[str]) -> bool:
+        if branch in path:
+            return True
+        if branch in completed:
+            return False
+        path.add(branch)
+        if any(has_cycle(name, path) for name in dependencies[branch]):
+            return True
+        path.remove(branch)
+        completed.add(branch)
+        return False
+
+    if any(has_cycle(branch, set()) for branch in dependencies):
+        logger.debug("Filter graph contains a cycle.")
+        return False
+
+    return True
+
+
 def is_valid_set_filters_request(
     data, recursive: bool = True
 ) -> TypeGuard[SetFiltersRequestDict]:
@@ -82,6 +146,8 @@ def is_valid_set_filters_request(
             ids.append(filter["id"])
             if not is_valid_filter_dict(filter):
                 return False
+        if not is_valid_filter_graph(data["audio_filters"]):
+            return False
 
         ids = []
         for filter in data["video_filters"]:
@@ -91,6 +157,8 @@ def is_valid_set_filters_request(
             ids.append(filter["id"])
             if not is_valid_filter_dict(filter):
                 return False
+        if not is_valid_filter_graph(data["video_filters"]):
+            return False
 
     return True
 
@@ -0,0 +1 @@
+from .frame_tap_filter import FrameTapFilter
@@ -0,0 +1,168 @@
+"""Provide `FrameTapFilter` filter."""
+
+from __future__ import annotations
+
+import cv2
+import numpy
+import logging
+from typing import TYPE_CHECKING, TypeGuard
+from av import VideoFrame
+
+from filters.filter import Filter
+from filters.filter_dict import FilterDict
+from hub.frame_tap import TAP_FORMATS, FrameTap, tap_name
+
+if TYPE_CHECKING:
+    from hub.track_handler import TrackHandler
+
+
+class FrameTapFilter(Filter):
+    """Filter publishing the decoded frames into a shared memory ring buffer.
+
+    Local processes can attach to the ring buffer with hub.frame_tap.FrameTapReader.
+    The name of the ring buffer is given by hub.frame_tap.tap_name for the participant
+    and the configured resolution and format.  A resolution of 0 x 0 publishes the
+    frames in their native resolution.
+
+    The frame is not modified.  Add the filter multiple times to publish several
+    resolutions or formats.
+    """
+
+    analysis_only = True
+
+    _tap: FrameTap | None
+
+    def __init__(
+        self,
+        config: FilterDict,
+        audio_track_handler: TrackHandler,
+        video_track_handler: TrackHandler,
+    ) -> None:
+        """Initialize new FrameTapFilter.
+
+        Parameters
+        ----------
+        See base class: filters.filter.Filter.
+        """
+        super().__init__(config, audio_track_handler, video_track_handler)
+        self._tap = None
+        self.set_config(config)
+
+    @staticmethod
+    def name(self) -> str:
+        return "FRAME_TAP"
+
+    @staticmethod
+    def filter_type(self) -> str:
+        return "SESSION"
+
+    @staticmethod
+    def get_filter_json(self) -> object:
+        # For docstring see filters.filter.Filter or hover over function declaration
+        name = self.name(self)
+        id = name.lower()
+        id = id.replace("_", "-")
+        return {
+            "name": name,
+            "id": id,
+            "channel": "video",
+            "groupFilter": False,
+            "config": {
+                "format": {
+                    "defaultValue": ["bgr24", "gray"],
+                    "value": "bgr24",
+                    "requiresOtherFilter": False,
+                },
+                "width": {
+                    "min": 0,
+                    "max": 1920,
+                    "step": 1,
+                    "value": 0,
+                    "defaultValue": 0,
+                },
+                "height": {
+                    "min": 0,
+                    "max": 1080,
+                    "step": 1,
+                    "value": 0,
+                    "defaultValue": 0,
+                },
+                "slots": {
+                    "min": 1,
+                    "max": 32,
+                    "step": 1,
+                    "value": 4,
+                    "defaultValue": 4,
+                },
+            },
+        }
+
+    @staticmethod
+    def validate_dict(data) -> TypeGuard[FilterDict]:
+        # For docstring see filters.filter.Filter or hover over function declaration
+        if not Filter.validate_dict(data):
+            return False
+        frame_format = _format_of(data)
+        if frame_format not in TAP_FORMATS:
+            logging.getLogger("Filters").debug(
+                f'Invalid FRAME_TAP format: "{frame_format}", expected one of '
+                f"{TAP_FORMATS}."
+            )
+            return False
+        return True
+
+    def set_config(self, config: FilterDict) -> None:
+        # For docstring see filters.filter.Filter or hover over function declaration
+        frame_format = _format_of(config)
+        if frame_format not in TAP_FORMATS:
+            raise ValueError(
+                f'Invalid FRAME_TAP format: "{frame_format}", expected one of '
+                f"{TAP_FORMATS}."
+            )
+        super().set_config(config)
+        self.accepted_formats = (frame_format,)
+        participant_id = self.video_track_handler.connection._log_name_suffix[2:]
+        name = tap_name(
+            participant_id, self._width, self._height, self.accepted_formats[0]
+        )
+        slots = int(self._config_value("slots", 4))
+        if self._tap is None or self._tap.name != name or self._tap.slots != slots:
+            if self._tap is not None:
+                self._tap.close()
+            self._tap = FrameTap(name, slots)
+
+    @property
+    def _width(self) -> int:
+        return int(self._config_value("width", 0))
+
+    @property
+    def _height(self) -> int:
+        return int(self._config_value("height", 0))
+
+    async def cleanup(self) -> None:
+        # For docstring see filters.filter.Filter or hover over function declaration
+        if self._tap is not None:
+            self._tap.close()
+            self._tap = None
+
+    async def process(
+        self, original: VideoFrame, ndarray: numpy.ndarray
+    ) -> numpy.ndarray:
+        # For docstring see filters.filter.Filter or hover over function declaration
+        if self._tap is None:
+            return ndarray
+
+        width, height = self._width, self._height
+        frame = ndarray
+        if width > 0 and height > 0 and ndarray.shape[:2] != (height, width):
+            frame = cv2.resize(ndarray, (width, height), interpolation=cv2.INTER_AREA)
+        self._tap.publish(frame, self.frame_format, original.pts)
+        return ndarray
+
+
+def _format_of(config: FilterDict) -> str:
+    """Get the value of the `format` config in `config`, `bgr24` if missing."""
+    frame_format = config["config"].get("format", {})
+    if isinstance(frame_format, dict):
+        return frame_format.get("value", "bgr24")
+    return frame_format
@@ -1,25 +1,36 @@
-from typing import Any
 import cv2
 import numpy
-import dlib
 from PIL import Image
-from os.path import join
-from hub import BACKEND_DIR
-
+from av import VideoFrame
 
 from filters import FilterDict
 
 from filters.filter import Filter
+from hub.face_analysis import Face
+from hub.overlay import TextStyle, text_sprite
+
+_TEXT_STYLE = TextStyle(font_size=0.7, outline_color=None, line_type=cv2.LINE_AA)
 
 
 class SimpleGlassesDetection(Filter):
-    """Filter saving the last 60 frames in `frame_buffer`."""
+    """Filter detecting glasses with the face landmarks of the TrackHandler.
+
+    Every `run_every` frames, the nose bridge between the landmarks of the face is
+    searched for the edge of a glasses frame.  The last result is drawn as text on the
+    overlay of the track, see hub.overlay.  Detection stops after 31 executions, then
+    `face_analysis` is set to "" so the TrackHandler stops analysing faces for this
+    filter, see filters.filter.Filter.face_analysis.  The text stays on the overlay.
+    """
+
+    # The result is drawn on the overlay of the track, see hub.overlay.
+    analysis_only = True
+    skippable = True
+    face_analysis = "landmarks"
+    # Edges of the nose bridge are still visible at half the resolution.
+    pyramid_level = 1
 
     counter: int
     text: str
-    predictor_path: str
-    detector: Any
-    predictor: Any
 
     def __init__(
         self, config: FilterDict, audio_track_handler, video_track_handler
@@ -33,13 +44,6 @@ class SimpleGlassesDetection(Filter):
         self.counter = 0
         self.text = "Processing ..."
 
-        self.predictor_path = join(
-            BACKEND_DIR,
-            "filters/glasses_detection/shape_predictor_68_face_landmarks.dat",
-        )
-        self.detector = dlib.get_frontal_face_detector()
-        self.predictor = dlib.shape_predictor(self.predictor_path)
-
     @staticmethod
     def name(self) -> str:
         return "SIMPLE_GLASSES_DETECTION"
@@ -59,37 +63,54 @@ class SimpleGlassesDetection(Filter):
             "id": id,
             "channel": "video",
             "groupFilter": False,
-            "config": {},
+            "config": {
+                "execution": {
+                    "defaultValue": ["thread", "inline"],
+                    "value": "thread",
+                    "requiresOtherFilter": False,
+                },
+                "run_every": {
+                    "min": 1,
+                    "max": 300,
+                    "step": 1,
+                    "value": 30,
+                    "defaultValue": 30,
+                },
+            },
         }
 
-    async def process(self, _, ndarray: numpy.ndarray) -> numpy.ndarray:
-        height, _, _ = ndarray.shape
-        origin = (10, height - 10)
-
-        # Process every 30th frame (~1 sec) and only first 30 seconds:
-        if not self.counter % 30 and self.counter <= 900:
-            self.text = self.simple_glasses_detection(ndarray)
-
-        cv2.putText(
-            ndarray,
-            self.text,
-            origin,
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.7,
-            (0, 255, 0),
-            2,
-            cv2.LINE_AA,
-        )
+    async def process(
+        self, original: VideoFrame, ndarray: numpy.ndarray
+    ) -> numpy.ndarray:
+        # Executed every 30th frame (~1 sec, see `run_every` config).  Only detect
+        # during the first 30 executions (~30 seconds).  Faces are detected by the
+        # TrackHandler, see hub.face_analysis.
+        faces = self.video_track_handler.faces
+        if self.counter <= 30 and len(faces) > 0:
+            face = faces[0].scaled(ndarray.shape[1] / original.width)
+            self.text = self.simple_glasses_detection(ndarray, face)
         self.counter += 1
+        if self.counter > 30:
+            # Stop the face analysis of the TrackHandler for this filter.  Read on
+            # every frame, see hub.track_handler.TrackHandler._analyse_faces.
+            self.face_analysis = ""
 
-        return ndarray
+        return self.draw_text(original, ndarray)
 
-    def simple_glasses_detection(self, img):
-        if len(self.detector(img)) > 0:
-            rect = self.detector(img)[0]
-            sp = self.predictor(img, rect)
-            landmarks = numpy.array([[p.x, p.y] for p in sp.parts()])
+    async def skip(self, original: VideoFrame, ndarray: numpy.ndarray) -> numpy.ndarray:
+        return self.draw_text(original, ndarray)
 
+    def draw_text(self, original: VideoFrame, ndarray: numpy.ndarray) -> numpy.ndarray:
+        """Draw the last detection result on the overlay."""
+        # The overlay uses coordinates of the full frame, not of `ndarray`.
+        self.video_track_handler.overlay.draw(
+            text_sprite(self.text, _TEXT_STYLE), (10, original.height - 10)
+        )
+        return ndarray
+
+    def simple_glasses_detection(self, img, face: Face):
+        landmarks = face.landmarks
+        if landmarks is not None:
             nose_bridge_x = []
             nose_bridge_y = []
 
@@ -111,8 +132,6 @@ class SimpleGlassesDetection(Filter):
             edges = cv2.Canny(image=img_blur, threshold1=100, threshold2=200)
             edges_center = edges.T[(int(len(edges.T) / 2))]
 
-            self.counter += 1
-
             if 255 in edges_center:
                 return "Glasses detected"
             else:
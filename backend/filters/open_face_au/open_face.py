@@ -1,6 +1,19 @@
 import subprocess
 import os
 
+AU_EXTRACTOR_PATH = os.path.join(
+    os.path.dirname(
+        os.path.dirname(
+            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        )
+    ),
+    "experimental-hub-openface",
+    "build",
+    "bin",
+    "AUExtractor",
+)
+"""Path of the OpenFace AUExtractor binary."""
+
 
 class OpenFace:
     def __init__(self, port: int):
@@ -11,24 +24,7 @@ class OpenFace:
             env["VECLIB_MAXIMUM_THREADS"] = "1"
 
             self._openface_process = subprocess.Popen(
-                [
-                    os.path.join(
-                        os.path.dirname(
-                            os.path.dirname(
-                                os.path.dirname(
-                                    os.path.dirname(
-                                        os.path.dirname(os.path.abspath(__file__))
-                                    )
-                                )
-                            )
-                        ),
-                        "experimental-hub-openface",
-                        "build",
-                        "bin",
-                        "AUExtractor",
-                    ),
-                    f"{port}",
-                ],
+                [AU_EXTRACTOR_PATH, f"{port}"],
                 stdin=subprocess.PIPE,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
@@ -41,3 +37,9 @@ class OpenFace:
             self._openface_process.terminate()
         except Exception:
             self._openface_process.kill()
+
+    @property
+    def running(self) -> bool:
+        """Whether the AUExtractor process is running."""
+        process = getattr(self, "_openface_process", None)
+        return process is not None and process.poll() is None
@@ -1,72 +1,217 @@
+"""Provide `OpenFaceAUExtractor`, the client for the OpenFace AUExtractor binary.
+
+The extractor either starts its own AUExtractor binary or uses a worker of the
+OpenFace pool of the hub, see filters.open_face_au.open_face_pool.  `close` releases
+the worker of the pool.
+
+Frames are sent over a zmq DEALER socket to the REP socket of the AUExtractor, each
+request is answered with the JSON result of the extraction.  Multiple frames can be
+in flight.  Each request starts with the frame id and an empty delimiter frame, which
+REP sockets return unchanged with the reply, so results are matched to their frame.
+
+Two frame encodings are supported:
+- `raw` : multipart message `b"RAW"`, JSON header with `shape` and `dtype` of the
+  frame, frame data in bgr24 without padding.  The data is sent without copying.
+- `png` : single message with the base64 encoded PNG of the frame.  Used for
+  AUExtractor binaries not supporting `raw`.
+
+The encoding is negotiated with the first request `b"PROTOCOLS"`.  Binaries
+supporting `raw` reply with `{"protocols": ["raw", "png"]}`, binaries not supporting
+the negotiation reply with an extraction result, which selects `png`.  Error replies,
+e.g. of the OpenFace pool while the worker is starting, and missing replies are not
+an answer of the AUExtractor.  The negotiation is repeated after
+`NEGOTIATION_RETRY_INTERVAL` or `NEGOTIATION_TIMEOUT` seconds.
+"""
+
+from __future__ import annotations
+
 import base64
 import json
+from time import monotonic
+from typing import Literal
 
 import cv2
 import numpy
 import zmq
 
 from filters.open_face_au.open_face import OpenFace
+from filters.open_face_au.open_face_pool import RELEASE_ID
 from filters.open_face_au.port_manager import PortManager
 
+NEGOTIATION_TIMEOUT = 10.0
+"""Time in seconds to wait for the reply to the protocol negotiation before it is
+repeated."""
 
-class OpenFaceAUExtractor:
-    port_manager: PortManager
-    open_face: OpenFace
-    socket: zmq.Socket
-    is_extracting: bool
-    is_connected: bool
+NEGOTIATION_RETRY_INTERVAL = 1.0
+"""Time in seconds to wait before repeating the protocol negotiation after an error
+reply."""
+
+RESULT_TIMEOUT = 5.0
+"""Time in seconds after which a frame in flight is considered lost."""
 
-    def __init__(self):
-        self.port_manager = PortManager()
+_NEGOTIATION_ID = b"protocols"
+_CLOSE_LINGER_MS = 100
 
-        self.open_face = OpenFace(self.port_manager.port)
 
+class OpenFaceAUExtractor:
+    port: int
+    port_manager: PortManager | None
+    open_face: OpenFace | None
+    socket: zmq.Socket
+    is_connected: bool
+    protocol: Literal["raw", "png"] | None
+    max_in_flight: int
+    _in_flight: dict[bytes, float]
+    _received: list[tuple[int, object]]
+    _negotiation_start: float | None
+    _negotiation_retry: float
+
+    def __init__(self, max_in_flight: int = 2, pool_port: int | None = None):
         context = zmq.Context()
-        self.socket = context.socket(zmq.REQ)
-        try:
-            self.socket.bind(f"tcp://127.0.0.1:{self.port_manager.port}")
+        self.socket = context.socket(zmq.DEALER)
+
+        if pool_port is not None:
+            # Use the OpenFace pool of the hub instead of starting a binary.
+            self.port = pool_port
+            self.port_manager = None
+            self.open_face = None
+            self.socket.connect(f"tcp://127.0.0.1:{self.port}")
             self.is_connected = True
-        except zmq.ZMQError as e:
-            self.is_connected = False
-            print(f"ZMQError: {e}")
-
-        self.is_extracting = False
+        else:
+            self.port_manager = PortManager()
+            self.port = self.port_manager.port
+            self.open_face = OpenFace(self.port)
+            try:
+                self.socket.bind(f"tcp://127.0.0.1:{self.port}")
+                self.is_connected = True
+            except zmq.ZMQError as e:
+                self.is_connected = False
+                print(f"ZMQError: {e}")
+
+        self.protocol = None
+        self.max_in_flight = max(max_in_flight, 1)
+        self._in_flight = {}
+        self._received = []
+        self._negotiation_start = None
+        self._negotiation_retry = 0
 
     def __del__(self):
-        self.socket.close()
+        self.close()
         del self.port_manager, self.open_face
 
-    def extract(self, ndarray: numpy.ndarray) -> tuple[int, str, object]:
-        port_msg = f"Port: {self.port_manager.port}"
+    def close(self) -> None:
+        """Close the connection.  Releases the worker if the OpenFace pool is used."""
+        if self.socket.closed:
+            return
+        if self.open_face is None and self.is_connected:
+            try:
+                self.socket.send_multipart(
+                    [RELEASE_ID, b"", b"RELEASE"], flags=zmq.NOBLOCK
+                )
+            except zmq.ZMQError:
+                pass
+        # Wait briefly for the release to be sent, the context is not terminated.
+        self.socket.close(linger=_CLOSE_LINGER_MS)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of frames sent to the AUExtractor without result yet."""
+        return len(self._in_flight)
+
+    def submit(self, frame: int, ndarray: numpy.ndarray) -> tuple[int, str]:
+        """Send `ndarray` to the AUExtractor, tagged with `frame`.  Non-blocking.
+
+        Returns
+        -------
+        tuple of int and str
+            Exit code and message.  Exit code 0 if the frame was sent, 1 if
+            `max_in_flight` frames are in flight or the encoding is not negotiated
+            yet, -1 if the port is taken and -2 if sending failed.
+        """
+        port_msg = f"Port: {self.port}"
 
         if not self.is_connected:
-            return -1, f"Port {self.port_manager.port} is already taken!", None
+            return -1, f"Port {self.port} is already taken!"
 
-        result = None
-        received = False
-        try:
-            result = self._get_result()
-            received = True
-        except zmq.ZMQError:
-            if self.is_extracting:
-                return 1, port_msg, None
+        self._receive()
+        if self.protocol is None:
+            self._negotiate()
+            return 1, port_msg
+
+        if len(self._in_flight) >= self.max_in_flight:
+            return 1, port_msg
+
+        if not self._start_extraction(str(frame).encode(), ndarray):
+            return -2, f"No connection established on {self.port}"
+        return 0, port_msg
 
-        success = self._start_extraction(ndarray)
-        if success:
+    def results(self) -> list[tuple[int, object]]:
+        """Get the results received since the last call, with their frame ids."""
+        self._receive()
+        received, self._received = self._received, []
+        return received
+
+    def _receive(self) -> None:
+        """Receive all available replies.  Non-blocking."""
+        while True:
+            try:
+                frame_id, _, message = self.socket.recv_multipart(flags=zmq.NOBLOCK)
+            except zmq.ZMQError:
+                break
+            except ValueError:
+                # Malformed reply.
+                continue
+
+            if frame_id == _NEGOTIATION_ID:
+                self._select_protocol(message)
+            elif self._in_flight.pop(frame_id, None) is not None:
+                self._received.append((int(frame_id), json.loads(message)))
+
+        # Stop waiting for frames the AUExtractor dropped.
+        now = monotonic()
+        for frame_id, sent in list(self._in_flight.items()):
+            if now - sent > RESULT_TIMEOUT:
+                del self._in_flight[frame_id]
+
+    def _negotiate(self) -> None:
+        """Select the frame encoding supported by the AUExtractor.  Non-blocking."""
+        now = monotonic()
+        if (
+            self._negotiation_start is not None
+            and now - self._negotiation_start > NEGOTIATION_TIMEOUT
+        ):
+            # No reply, e.g. the AUExtractor was restarted.
+            self._negotiation_start = None
+        if self._negotiation_start is None and now >= self._negotiation_retry:
             try:
-                result = self._get_result()
-                received = True
+                self.socket.send_multipart(
+                    [_NEGOTIATION_ID, b"", b"PROTOCOLS"], flags=zmq.NOBLOCK
+                )
+                self._negotiation_start = now
             except zmq.ZMQError:
+                # AUExtractor is not connected yet.
                 pass
 
-            if received:
-                return 0, port_msg, result
-            else:
-                return 1, port_msg, result
-        else:
-            return -2, f"No connection established on {self.port_manager.port}", result
+    def _select_protocol(self, message: bytes) -> None:
+        """Select the frame encoding from the reply to the negotiation."""
+        if self.protocol is not None:
+            # Reply to a repeated negotiation.
+            return
+        try:
+            reply = json.loads(message)
+        except ValueError:
+            reply = None
+        if isinstance(reply, dict) and "error" in reply and "protocols" not in reply:
+            self._negotiation_start = None
+            self._negotiation_retry = monotonic() + NEGOTIATION_RETRY_INTERVAL
+            return
+        supported = reply.get("protocols", []) if isinstance(reply, dict) else []
+        self.protocol = "raw" if "raw" in supported else "png"
+
+    def _start_extraction(self, frame_id: bytes, ndarray: numpy.ndarray) -> bool:
+        if self.protocol == "raw":
+            return self._start_raw_extraction(frame_id, ndarray)
 
-    def _start_extraction(self, ndarray: numpy.ndarray) -> bool:
         is_success, image_enc = cv2.imencode(".png", ndarray)
 
         if not is_success:
@@ -76,14 +221,25 @@ class OpenFaceAUExtractor:
         im_64 = base64.b64encode(im_bytes)
 
         try:
-            self.socket.send(im_64, flags=zmq.NOBLOCK)
-            self.is_extracting = True
+            self.socket.send_multipart([frame_id, b"", im_64], flags=zmq.NOBLOCK)
+            self._in_flight[frame_id] = monotonic()
             return True
         except zmq.ZMQError:
             return False
 
-    def _get_result(self) -> object:
-        message = self.socket.recv(flags=zmq.NOBLOCK)
-        data = json.loads(message)
-        self.is_extracting = False
-        return data
+    def _start_raw_extraction(self, frame_id: bytes, ndarray: numpy.ndarray) -> bool:
+        # Crops of the frame are not contiguous and have to be copied once.  Frames are
+        # read-only views, zmq keeps a reference until they are sent and later stages
+        # modify a copy, see hub.frame_buffer.FrameBuffer.readonly.
+        data = numpy.ascontiguousarray(ndarray)
+        header = json.dumps({"shape": data.shape, "dtype": str(data.dtype)})
+        try:
+            self.socket.send_multipart(
+                [frame_id, b"", b"RAW", header.encode(), data],
+                flags=zmq.NOBLOCK,
+                copy=False,
+            )
+            self._in_flight[frame_id] = monotonic()
+        except zmq.ZMQError:
+            return False
+        return True
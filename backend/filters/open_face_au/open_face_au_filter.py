@@ -1,29 +1,58 @@
+import asyncio
+import time
 import numpy
 from av import VideoFrame
 
 from filters.filter import Filter
 from filters.simple_line_writer import SimpleLineWriter
 from filters.open_face_au.open_face_au_extractor import OpenFaceAUExtractor
+from hub.feature_log import feature_log_path
 from .open_face_data_parser import OpenFaceDataParser
 
+_ROI_MARGIN = 0.2
+
 
 class OpenFaceAUFilter(Filter):
     """OpenFace AU Extraction filter."""
 
+    # AUs are drawn on the overlay of the track, see hub.overlay.
+    analysis_only = True
+    skippable = True
+    face_analysis = "box"
+    # Faces are cropped from frames with half the resolution, OpenFace aligns them to
+    # 112x112 pixels before estimating AUs.
+    pyramid_level = 1
+
     frame: int
+    submitted: dict[int, tuple[int | None, float]]
     data: dict
+    message: str
     file_writer: OpenFaceDataParser
     line_writer: SimpleLineWriter
     au_extractor: OpenFaceAUExtractor
 
     def __init__(self, config, audio_track_handler, video_track_handler):
+        # Imported here, server imports the filters through the session.
+        from server import Config
+
         super().__init__(config, audio_track_handler, video_track_handler)
-        self.au_extractor = OpenFaceAUExtractor()
-        self.line_writer = SimpleLineWriter()
-        self.file_writer = OpenFaceDataParser()
+        config = Config()
+        self.au_extractor = OpenFaceAUExtractor(
+            self._config_value("in_flight", 2),
+            config.openface_port if config.openface_port > 0 else None,
+        )
+        self.line_writer = SimpleLineWriter(compositor=video_track_handler.overlay)
+        connection = self.video_track_handler.connection
+        self.file_writer = OpenFaceDataParser(
+            feature_log_path(
+                connection.recording_path, connection._log_name_suffix[2:], "openface"
+            )
+        )
 
         self.data = {"intensity": {"AU06": "-", "AU12": "-"}}
+        self.message = ""
         self.frame = 0
+        self.submitted = {}
 
     def __del__(self):
         del self.file_writer, self.line_writer, self.au_extractor
@@ -47,41 +76,93 @@ class OpenFaceAUFilter(Filter):
             "id": id,
             "channel": "video",
             "groupFilter": False,
-            "config": {},
+            "config": {
+                "execution": {
+                    "defaultValue": ["thread", "inline"],
+                    "value": "thread",
+                    "requiresOtherFilter": False,
+                },
+                "in_flight": {
+                    "min": 1,
+                    "max": 8,
+                    "step": 1,
+                    "value": 2,
+                    "defaultValue": 2,
+                },
+            },
         }
 
+    def set_config(self, config) -> None:
+        # For docstring see filters.filter.Filter or hover over function declaration
+        super().set_config(config)
+        self.au_extractor.max_in_flight = max(self._config_value("in_flight", 2), 1)
+
     async def process(
         self, original: VideoFrame, ndarray: numpy.ndarray
     ) -> numpy.ndarray:
         self.frame = self.frame + 1
+        timestamp = time.time()
+
+        # Results arrive with the frame they were extracted from, in order.
+        for frame, result in self.au_extractor.results():
+            if "intensity" in result:
+                self.data = result
+            pts, submit_time = self.submitted.pop(frame, (None, timestamp))
+            self.file_writer.write(frame, pts, submit_time, result)
+            # Frames submitted before were dropped by the AUExtractor.
+            for dropped in [f for f in self.submitted if f < frame]:
+                del self.submitted[dropped]
 
-        # If ROI is sent from the OpenFace, only send that region
-        if "roi" in self.data.keys() and self.data["roi"]["width"] != 0:
+        # Only send the region of the face found by the TrackHandler, or the ROI sent
+        # from OpenFace.
+        faces = self.video_track_handler.faces
+        if len(faces) > 0:
+            face = faces[0].scaled(ndarray.shape[1] / original.width)
+            margin_x = round(face.width * _ROI_MARGIN)
+            margin_y = round(face.height * _ROI_MARGIN)
+            exit_code, msg = self.au_extractor.submit(
+                self.frame,
+                ndarray[
+                    max(face.y - margin_y, 0) : face.y + face.height + margin_y,
+                    max(face.x - margin_x, 0) : face.x + face.width + margin_x,
+                ],
+            )
+        elif "roi" in self.data.keys() and self.data["roi"]["width"] != 0:
             roi = self.data["roi"]
-            exit_code, msg, result = self.au_extractor.extract(
+            exit_code, msg = self.au_extractor.submit(
+                self.frame,
                 ndarray[
                     roi["y"] : (roi["y"] + roi["height"]),
                     roi["x"] : (roi["x"] + roi["width"]),
-                ]
+                ],
             )
         else:
-            exit_code, msg, result = self.au_extractor.extract(ndarray)
+            exit_code, msg = self.au_extractor.submit(self.frame, ndarray)
 
         if exit_code == 0:
-            self.data = result
-            # TODO: use correct frame
-            # if a frame is skipped, data corresponds to a frame before current frame, but self.frame does not
-            self.file_writer.write(self.frame, self.data)
+            self.submitted[self.frame] = (original.pts, timestamp)
         else:
-            self.file_writer.write(self.frame, {"intensity": "-1"})
+            self.file_writer.write(self.frame, original.pts, timestamp, {})
+
+        self.message = msg
+        return self.write_lines(ndarray)
+
+    async def skip(self, original: VideoFrame, ndarray: numpy.ndarray) -> numpy.ndarray:
+        # Count skipped frames, so frame ids match the frames of the track.
+        self.frame = self.frame + 1
+        return self.write_lines(ndarray)
 
-        # Put text on image
+    def write_lines(self, ndarray: numpy.ndarray) -> numpy.ndarray:
+        """Draw the last extracted AUs and message on the overlay."""
         au06 = self.data["intensity"]["AU06"]
         au12 = self.data["intensity"]["AU12"]
-        ndarray = self.line_writer.write_lines(
-            ndarray, [f"AU06: {au06}", f"AU12: {au12}", msg]
+        return self.line_writer.write_lines(
+            ndarray, [f"AU06: {au06}", f"AU12: {au12}", self.message]
         )
-        return ndarray
 
     async def cleanup(self) -> None:
+        # Release the worker of the OpenFace pool for the next filter.
+        self.au_extractor.close()
+        # Writing the buffered rows blocks.
+        await asyncio.get_running_loop().run_in_executor(None, self.file_writer.close)
         del self
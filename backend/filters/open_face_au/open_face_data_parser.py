@@ -1,35 +1,101 @@
-import csv
-import os
+"""Provide `OpenFaceDataParser`, writing OpenFace results to a feature log.
+
+See hub.feature_log for the file format.  Each row holds the frame id, pts and wall
+clock time the frame was submitted at, whether the extraction succeeded, and the
+intensity (`AUxx_r`) and presence (`AUxx_c`) of the AUs detected by OpenFace.  Missing
+intensities are NaN, missing presences -1.
+"""
+
+import math
+import numpy
+
+from hub.feature_log import FeatureLog
+
+INTENSITY_AUS = (
+    "AU01",
+    "AU02",
+    "AU04",
+    "AU05",
+    "AU06",
+    "AU07",
+    "AU09",
+    "AU10",
+    "AU12",
+    "AU14",
+    "AU15",
+    "AU17",
+    "AU20",
+    "AU23",
+    "AU25",
+    "AU26",
+    "AU45",
+)
+"""AUs OpenFace estimates the intensity of."""
+
+PRESENCE_AUS = INTENSITY_AUS[:-1] + ("AU28", "AU45")
+"""AUs OpenFace detects the presence of."""
+
+OPENFACE_DTYPE = numpy.dtype(
+    [
+        ("frame", numpy.int64),
+        ("pts", numpy.int64),
+        ("timestamp", numpy.float64),
+        ("success", numpy.bool_),
+    ]
+    + [(f"{au}_r", numpy.float32) for au in INTENSITY_AUS]
+    + [(f"{au}_c", numpy.int8) for au in PRESENCE_AUS]
+)
+"""Row of an OpenFace feature log."""
 
 
 class OpenFaceDataParser:
-    def __init__(self):
-        # TODO: get session and participant id
-        path = os.path.join(
-            os.path.dirname(
-                os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            ),
-            "sessions",
-            "ae839e5e6f",
-            "OpenFace",
+    log: FeatureLog
+
+    def __init__(self, path: str):
+        self.log = FeatureLog(path, OPENFACE_DTYPE)
+
+    def __del__(self):
+        self.close()
+
+    def write(self, frame: int, pts: int | None, timestamp: float, openface_data):
+        """Add the OpenFace result of `frame`.  Non-blocking.
+
+        `openface_data` without `intensity` dict, e.g. errors, are logged as failed.
+        """
+        intensity = openface_data.get("intensity")
+        presence = openface_data.get("presence")
+        success = isinstance(intensity, dict)
+        if not success:
+            intensity = {}
+        if not isinstance(presence, dict):
+            presence = {}
+
+        self.log.append(
+            (
+                frame,
+                -1 if pts is None else pts,
+                timestamp,
+                success,
+                *(_to_float(intensity.get(au)) for au in INTENSITY_AUS),
+                *(_to_presence(presence.get(au)) for au in PRESENCE_AUS),
+            )
         )
-        filename = "9ba5fdccde"
-        appendix = ".csv"
 
-        if not os.path.exists(path):
-            os.makedirs(path)
+    def close(self):
+        """Write all rows and close the log."""
+        if hasattr(self, "log"):
+            self.log.close()
 
-        filepath = os.path.join(path, filename + appendix)
-        i = 1
-        while os.path.exists(filepath):
-            filepath = os.path.join(path, filename + f"_{i}" + appendix)
-            i = i + 1
 
-        self.save_file = open(filepath, "w")
-        self.writer = csv.writer(self.save_file, delimiter=",")
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
 
-    def __del__(self):
-        self.save_file.close()
 
-    def write(self, frame: int, openface_data):
-        self.writer.writerow((f"frame {frame}", openface_data))
+def _to_presence(value) -> int:
+    try:
+        return 1 if float(value) > 0 else 0
+    except (TypeError, ValueError):
+        return -1
@@ -0,0 +1,327 @@
+"""Provide `OpenFacePool`, a pool of OpenFace AUExtractor workers shared by the hub.
+
+The pool is a process started by the Hub.  It starts `workers` AUExtractor binaries
+ahead of time and dispatches the requests of all `OpenFaceAUExtractor` clients, see
+filters.open_face_au.open_face_au_extractor, to them.  Clients connect a DEALER socket
+to the ROUTER socket of the pool on `port`, so filters neither allocate ports nor
+spawn binaries.
+
+The AUExtractor tracks the face between frames, so a worker serves one client at a
+time.  A new client is assigned the idle worker with the fewest pending requests.  If
+no worker is idle, a worker is started for the client; requests sent while the binary
+is starting are answered with an error.  Clients release their worker with a
+`RELEASE_ID` request when they are cleaned up, e.g. when filters are reconfigured, or
+after `CLIENT_TIMEOUT` seconds without request.  Released workers are reset with a
+`RESET` request and handed to the next client.  Idle workers exceeding `workers` are
+stopped after `CLIENT_TIMEOUT` seconds.
+
+Workers are checked every `HEALTH_CHECK_INTERVAL` seconds.  Workers that exited or
+did not reply for `STALL_TIMEOUT` seconds while requests were pending are restarted
+for the same client, pending requests are lost.
+"""
+
+from __future__ import annotations
+
+import sys
+import json
+import signal
+import logging
+import multiprocessing
+import zmq
+from os.path import exists
+from time import monotonic
+
+from filters.open_face_au.open_face import OpenFace, AU_EXTRACTOR_PATH
+
+HEALTH_CHECK_INTERVAL = 1.0
+"""Time in seconds between two health checks of the workers."""
+
+STALL_TIMEOUT = 30.0
+"""Time in seconds without reply after which a worker with pending requests is
+restarted."""
+
+CLIENT_TIMEOUT = 60.0
+"""Time in seconds without request after which the worker of a client is released,
+and time after which idle workers exceeding `workers` are stopped."""
+
+RELEASE_ID = b"release"
+"""Frame id of the request releasing the worker of a client.  Not answered."""
+
+_RESET_CLIENT = b"pool"
+
+
+class _Worker:
+    """AUExtractor binary connected to a DEALER socket of the pool."""
+
+    socket: zmq.Socket
+    open_face: OpenFace
+    pending: dict[tuple[bytes, bytes], float]
+    client: bytes | None
+    last_reply: float
+    idle_since: float
+
+    def __init__(self, context: zmq.Context) -> None:
+        self.socket = context.socket(zmq.DEALER)
+        port = self.socket.bind_to_random_port("tcp://127.0.0.1")
+        self.open_face = OpenFace(port)
+        self.pending = {}
+        self.client = None
+        self.last_reply = monotonic()
+        self.idle_since = monotonic()
+
+    @property
+    def healthy(self) -> bool:
+        """Whether the worker is running and replies to pending requests."""
+        stalled = (
+            len(self.pending) > 0 and monotonic() - self.last_reply > STALL_TIMEOUT
+        )
+        return self.open_face.running and not stalled
+
+    def reset(self) -> None:
+        """Reset the face tracking of the binary for the next client.
+
+        The reply is dropped by the ROUTER socket of the pool, `_RESET_CLIENT` is not a
+        client identity.
+        """
+        try:
+            self.socket.send_multipart(
+                [_RESET_CLIENT, b"reset", b"", b"RESET"], flags=zmq.NOBLOCK
+            )
+            self.pending[(_RESET_CLIENT, b"reset")] = monotonic()
+        except zmq.Again:
+            # Not started yet, nothing to reset.
+            pass
+
+    def close(self) -> None:
+        """Stop the binary and close the socket."""
+        self.socket.close(linger=0)
+        del self.open_face
+
+
+def serve(
+    port: int, workers: int, log_level: str = "INFO", log_file: str | None = None
+) -> None:
+    """Run the OpenFace pool on `port` until the process is terminated.
+
+    Parameters
+    ----------
+    port : int
+        Local port the ROUTER socket for clients is bound to.
+    workers : int
+        Number of AUExtractor workers started ahead of time and kept while idle.
+        Further workers are started if all workers have a client.
+    log_level : str, default "INFO"
+        Logging level of the pool, see server.config.Config.log.
+    log_file : str, optional
+        File the pool logs to.  Logs to the console if None.
+    """
+    logging.basicConfig(
+        level=logging.getLevelName(log_level),
+        format="%(asctime)s:%(levelname)s:%(name)s: %(message)s",
+        filename=log_file,
+    )
+    logger = logging.getLogger("OpenFacePool")
+
+    context = zmq.Context()
+    frontend = context.socket(zmq.ROUTER)
+    try:
+        frontend.bind(f"tcp://127.0.0.1:{port}")
+    except zmq.ZMQError as e:
+        logger.error(f"Failed to bind to port {port}: {e}")
+        return
+
+    pool: list[_Worker] = []
+    poller = zmq.Poller()
+    poller.register(frontend, zmq.POLLIN)
+    available = exists(AU_EXTRACTOR_PATH)
+    if available:
+        _start_idle_workers(pool, workers, context, poller)
+        logger.info(f"Listening on port {port}, started {workers} workers")
+    else:
+        logger.warning(f"AUExtractor not found at {AU_EXTRACTOR_PATH}")
+
+    # Stop the workers when the pool is terminated, see `OpenFacePool.stop`.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        _dispatch(frontend, pool, workers, available, context, poller, logger)
+    finally:
+        for worker in pool:
+            worker.close()
+
+
+def _dispatch(
+    frontend: zmq.Socket,
+    pool: list[_Worker],
+    idle_workers: int,
+    available: bool,
+    context: zmq.Context,
+    poller: zmq.Poller,
+    logger: logging.Logger,
+) -> None:
+    """Dispatch requests to the workers and check their health.  Runs forever.
+
+    Workers are only started if the AUExtractor is `available`.
+    """
+    assignments: dict[bytes, _Worker] = {}
+    last_request: dict[bytes, float] = {}
+    last_check = monotonic()
+    while True:
+        events = dict(poller.poll(HEALTH_CHECK_INTERVAL * 1000))
+
+        # Requests: client, frame id, empty delimiter, payload.
+        while frontend in events:
+            try:
+                message = frontend.recv_multipart(flags=zmq.NOBLOCK, copy=False)
+            except zmq.ZMQError:
+                break
+            client, frame_id = message[0].bytes, message[1].bytes
+            if frame_id == RELEASE_ID:
+                last_request.pop(client, None)
+                if client in assignments:
+                    _release(assignments.pop(client))
+                continue
+
+            last_request[client] = monotonic()
+            worker = assignments.get(client)
+            if worker is None and available:
+                idle = [w for w in pool if w.client is None]
+                if len(idle) > 0:
+                    worker = min(idle, key=lambda w: len(w.pending))
+                else:
+                    worker = _start_worker(pool, context, poller)
+                worker.client = client
+                assignments[client] = worker
+                logger.info(
+                    f"Assigned OpenFace worker, {len(assignments)} of {len(pool)} "
+                    "workers in use"
+                )
+            try:
+                if worker is None:
+                    raise zmq.Again()
+                # Do not block if the binary is not started or restarted yet.
+                worker.socket.send_multipart(message, flags=zmq.NOBLOCK, copy=False)
+                worker.pending[(client, frame_id)] = monotonic()
+            except zmq.Again:
+                error = json.dumps({"error": "No OpenFace worker available."})
+                frontend.send_multipart([client, frame_id, b"", error.encode()])
+
+        # Replies: the REP socket of the worker returns client and frame id.
+        for worker in pool:
+            while worker.socket in events:
+                try:
+                    reply = worker.socket.recv_multipart(flags=zmq.NOBLOCK)
+                except zmq.ZMQError:
+                    break
+                worker.pending.pop((reply[0], reply[1]), None)
+                worker.last_reply = monotonic()
+                frontend.send_multipart(reply)
+
+        now = monotonic()
+        if now - last_check < HEALTH_CHECK_INTERVAL:
+            continue
+        last_check = now
+
+        for client, time in list(last_request.items()):
+            if now - time > CLIENT_TIMEOUT:
+                del last_request[client]
+                if client in assignments:
+                    _release(assignments.pop(client))
+
+        idle = [w for w in pool if w.client is None]
+        for worker in idle[idle_workers:]:
+            if now - worker.idle_since > CLIENT_TIMEOUT:
+                _stop_worker(pool, worker, poller)
+
+        for i, worker in enumerate(pool):
+            if worker.healthy:
+                continue
+            logger.warning(
+                f"Restarting OpenFace worker {i}, {len(worker.pending)} requests lost"
+            )
+            poller.unregister(worker.socket)
+            worker.close()
+            pool[i] = _Worker(context)
+            poller.register(pool[i].socket, zmq.POLLIN)
+            pool[i].client = worker.client
+            if worker.client is not None:
+                assignments[worker.client] = pool[i]
+
+        if available:
+            _start_idle_workers(pool, idle_workers, context, poller)
+
+
+def _start_worker(
+    pool: list[_Worker], context: zmq.Context, poller: zmq.Poller
+) -> _Worker:
+    """Start a new worker and add it to `pool`."""
+    worker = _Worker(context)
+    pool.append(worker)
+    poller.register(worker.socket, zmq.POLLIN)
+    return worker
+
+
+def _release(worker: _Worker) -> None:
+    """Reset `worker` and make it available for the next client."""
+    worker.client = None
+    worker.idle_since = monotonic()
+    worker.reset()
+
+
+def _stop_worker(pool: list[_Worker], worker: _Worker, poller: zmq.Poller) -> None:
+    """Stop `worker` and remove it from `pool`."""
+    poller.unregister(worker.socket)
+    worker.close()
+    pool.remove(worker)
+
+
+def _start_idle_workers(
+    pool: list[_Worker], count: int, context: zmq.Context, poller: zmq.Poller
+) -> None:
+    """Start workers until at least `count` workers without client are running."""
+    idle = sum(1 for w in pool if w.client is None)
+    for _ in range(count - idle):
+        _start_worker(pool, context, poller)
+
+
+class OpenFacePool:
+    """Process running the OpenFace pool, see `serve`."""
+
+    port: int
+    workers: int
+    _log_level: str
+    _log_file: str | None
+    _process: multiprocessing.process.BaseProcess | None
+
+    def __init__(
+        self,
+        port: int,
+        workers: int,
+        log_level: str = "INFO",
+        log_file: str | None = None,
+    ) -> None:
+        """Initialize new OpenFacePool.  See `serve` for parameters."""
+        self.port = port
+        self.workers = workers
+        self._log_level = log_level
+        self._log_file = log_file
+        self._process = None
+
+    def start(self) -> None:
+        """Start the pool process, which starts the idle workers."""
+        # Spawn, the pool must not inherit the event loop and sockets of the Hub.
+        context = multiprocessing.get_context("spawn")
+        self._process = context.Process(
+            target=serve,
+            args=(self.port, self.workers, self._log_level, self._log_file),
+            name="OpenFacePool",
+            daemon=True,
+        )
+        self._process.start()
+
+    def stop(self) -> None:
+        """Stop the pool process and its workers."""
+        if self._process is None:
+            return
+        self._process.terminate()
+        self._process.join()
+        self._process = None
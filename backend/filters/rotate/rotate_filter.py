@@ -6,6 +6,7 @@ from av import VideoFrame
 from filters.filter_dict import FilterDict
 
 from filters.filter import Filter
+from hub.frame_transform import FrameTransform
 
 
 class RotationFilter(Filter):
@@ -58,16 +59,19 @@ class RotationFilter(Filter):
             },
         }
 
-    async def process(
-        self, original: VideoFrame, ndarray: numpy.ndarray
-    ) -> numpy.ndarray:
+    def transform(self, original: VideoFrame, shape: tuple[int, ...]) -> FrameTransform:
         # For docstring see filters.filter.Filter or hover over function declaration
         # Example based on https://github.com/aiortc/aiortc/tree/main/examples/server
-        rows, cols, _ = ndarray.shape
+        rows, cols = shape[:2]
 
         M = cv2.getRotationMatrix2D(
             (cols / 2, rows / 2), original.time * self.rotation, 1
         )
-        ndarray = cv2.warpAffine(ndarray, M, (cols, rows))
+        return FrameTransform.affine(M)
 
-        return ndarray
+    async def process(
+        self, original: VideoFrame, ndarray: numpy.ndarray
+    ) -> numpy.ndarray:
+        # For docstring see filters.filter.Filter or hover over function declaration
+        # Consecutive transforms are fused by the TrackHandler, see `transform`.
+        return self.transform(original, ndarray.shape).apply(ndarray)
@@ -1,14 +1,24 @@
 import cv2
 import numpy
 
+from hub.overlay import OverlayCompositor, TextStyle, text_sprite, blend
+
 
 class SimpleLineWriter:
+    """Writes lines of text with an outline onto frames.
+
+    Lines are rendered once into cached sprites, see hub.overlay.  If a `compositor`
+    is set, lines are drawn on it and blended after all filters, together with the
+    overlays of other filters.  Otherwise, they are blended into the frame directly.
+    """
+
     origin: tuple
     font: int
     font_size: int
     color: tuple
     thickness: int
     offset: int
+    compositor: OverlayCompositor | None
 
     def __init__(
         self,
@@ -17,6 +27,7 @@ class SimpleLineWriter:
         font_size=1,
         color=(0, 255, 0),
         thickness=2,
+        compositor: OverlayCompositor | None = None,
     ):
         self.origin = origin
         self.font = font
@@ -24,6 +35,12 @@ class SimpleLineWriter:
         self.color = color
         self.thickness = thickness
         self.offset = 50
+        self.compositor = compositor
+
+    @property
+    def style(self) -> TextStyle:
+        """Style of the written lines."""
+        return TextStyle(self.font, self.font_size, self.color, self.thickness)
 
     def write_line(
         self, ndarray: numpy.ndarray, line: str, origin: tuple = None
@@ -31,18 +48,12 @@ class SimpleLineWriter:
         if origin is None:
             origin = self.origin
 
-        ndarray = cv2.putText(
-            ndarray,
-            line,
-            origin,
-            self.font,
-            self.font_size,
-            (0, 0, 0),
-            self.thickness + 6,
-        )
-        return cv2.putText(
-            ndarray, line, origin, self.font, self.font_size, self.color, self.thickness
-        )
+        sprite = text_sprite(line, self.style)
+        if self.compositor is not None:
+            self.compositor.draw(sprite, origin)
+        else:
+            blend(ndarray, sprite, origin)
+        return ndarray
 
     def write_lines(self, ndarray: numpy.ndarray, lines: list[str]) -> numpy.ndarray:
         for i, line in enumerate(lines):
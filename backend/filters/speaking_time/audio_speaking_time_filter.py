@@ -11,6 +11,8 @@ class AudioSpeakingTimeFilter(Filter):
     seconds: float
     _config: FilterDict
 
+    analysis_only = True
+
     def __init__(
         self, config: FilterDict, audio_track_handler, video_track_handler
     ) -> None:
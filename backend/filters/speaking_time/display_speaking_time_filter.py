@@ -1,12 +1,17 @@
-import cv2
 import numpy
 from .audio_speaking_time_filter import AudioSpeakingTimeFilter
 from av import VideoFrame
 
 from filters.filter import Filter
+from hub.overlay import TextStyle, text_sprite
+
+_TEXT_STYLE = TextStyle(thickness=3, outline_color=None)
 
 
 class DisplaySpeakingTimeFilter(Filter):
+    # The speaking time is drawn on the overlay of the track, see hub.overlay.
+    analysis_only = True
+
     _speaking_time_filter: AudioSpeakingTimeFilter
 
     async def complete_setup(self) -> None:
@@ -47,10 +52,6 @@ class DisplaySpeakingTimeFilter(Filter):
     ) -> numpy.ndarray:
         height, _, _ = ndarray.shape
         origin = (10, height - 10)
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        font_size = 1
-        thickness = 3
-        color = (0, 255, 0)
         """
         if self._speaking_time_filter.has_spoken:
             self._speaking_time_filter.speaking_time += self._speaking_time_filter.sample_rate // original.pts
@@ -58,8 +59,7 @@ class DisplaySpeakingTimeFilter(Filter):
         """
         text = str(self._speaking_time_filter.seconds)
 
-        # Put text on image
-        ndarray = cv2.putText(ndarray, text, origin, font, font_size, color, thickness)
+        # Put text on image, the sprite is only rendered if the text changed
+        self.video_track_handler.overlay.draw(text_sprite(text, _TEXT_STYLE), origin)
 
-        # Return modified frame
         return ndarray
@@ -3,24 +3,41 @@
 from __future__ import annotations
 
 import numpy
+import asyncio
 import zmq
 import zmq.asyncio
+from time import monotonic
 from typing import TypeGuard
 from abc import ABC, abstractmethod
 from av import VideoFrame, AudioFrame
 
 from custom_types import util
 from filters.filter_dict import FilterDict
+from group_filters import group_filter_message
+from group_filters.group_filter_message import AggregationResult
 import logging
 from typing import Any
 
+_EMA_WEIGHT = 0.1
+_REPORT_INTERVAL = 10
+
 
 class GroupFilter(ABC):
     """Abstract base class for all group filters.
 
+    Group filters send the data of each frame to their aggregator and receive the
+    results of the aggregations of their participant over the same connection.  The
+    latest results are available without blocking in `latest_result` and `results`,
+    e.g. for filters reacting to the synchrony of a group:
+
+        group_filter = self.video_track_handler.group_filters[group_filter_id]
+        result = group_filter.latest_result
+
     Attributes
     ----------
     config
+    latest_result
+    results
     """
 
     _config: FilterDict
@@ -28,10 +45,33 @@ class GroupFilter(ABC):
     is_socket_connected: bool
     _context: zmq.Context | None
     _socket: zmq.Socket | None
+    _results_task: asyncio.Task | None
+    _results: dict[tuple[str, ...], AggregationResult]
+    _latest_result: AggregationResult | None
+    _result_count: int
+    _latency: float
+    _max_latency: float
+    _reported_results: int
+    _last_report: float
 
     data_len_per_participant: int = 0
     num_participants_in_aggregation: int = 2
 
+    accepted_formats: tuple[str, ...] = ("bgr24", "s16")
+    """Formats of `ndarray` accepted in `process_individual_frame`, in order of
+    preference.
+
+    See hub.frame_formats for the available formats.  The TrackHandler selects the
+    cheapest accepted format, see hub.filter_pipeline.FilterPipeline.
+    """
+
+    pyramid_level: int = 0
+    """Resolution of `ndarray` passed to `process_individual_frame`, as pyramid level.
+
+    0 for the full resolution, 1 for half and 2 for a quarter of the width and height
+    of video frames.  See hub.frame_buffer.FrameBuffer.pyramid.
+    """
+
     def __init__(self, config: FilterDict, participant_id: str) -> None:
         """Initialize new Group Filter.
 
@@ -56,6 +96,14 @@ class GroupFilter(ABC):
         self.is_socket_connected = False
         self._context = None
         self._socket = None
+        self._results_task = None
+        self._results = {}
+        self._latest_result = None
+        self._result_count = 0
+        self._latency = 0
+        self._max_latency = 0
+        self._reported_results = 0
+        self._last_report = monotonic()
 
     @property
     def config(self) -> FilterDict:
@@ -72,12 +120,36 @@ class GroupFilter(ABC):
         """
         self._config = config
 
+    @property
+    def latest_result(self) -> AggregationResult | None:
+        """Get the latest aggregation result received, of any aggregation the
+        participant is part of.  None if no result was received yet."""
+        return self._latest_result
+
+    @property
+    def results(self) -> dict[tuple[str, ...], AggregationResult]:
+        """Get the latest result of each aggregation the participant is part of, by
+        the IDs of the participants in the aggregation."""
+        return self._results
+
+    def stats(self) -> dict[str, float]:
+        """Get statistics of the received aggregation results."""
+        return {
+            "results": self._result_count,
+            "latency_ms": self._latency * 1000,
+        }
+
     def connect_aggregator(self, port: int) -> None:
+        """Connect to the aggregator on `port` and start receiving results.
+
+        Must be called in a running event loop.
+        """
         self._context = zmq.asyncio.Context.instance()
-        self._socket = self._context.socket(zmq.PUSH)
+        self._socket = self._context.socket(zmq.DEALER)
         try:
             self._socket.connect(f"tcp://127.0.0.1:{port}")
             self.is_socket_connected = True
+            self._results_task = asyncio.create_task(self._receive_results())
         except zmq.ZMQError as e:
             self._logger.error(f"ZMQ Error: {e}")
 
@@ -100,7 +172,12 @@ class GroupFilter(ABC):
         overriding this function.
         """
         self.is_socket_connected = False
-        self._context.destroy()
+        if self._results_task is not None:
+            self._results_task.cancel()
+        # The context is shared with all sockets of the process, e.g. the aggregator
+        # pool, see group_filters.group_filter_aggregator_pool.
+        if self._socket is not None:
+            self._socket.close(linger=0)
 
     @staticmethod
     def validate_dict(data) -> TypeGuard[FilterDict]:
@@ -116,22 +193,66 @@ class GroupFilter(ABC):
         if self.is_socket_connected:
             data = await self.process_individual_frame(original, ndarray)
             if data is not None:
-                message = dict()
-                message["participant_id"] = self.participant_id
-                message["time"] = ts
-                message["data"] = data
+                # Arrays are sent without copies, see group_filter_message.
+                message = group_filter_message.encode(self.participant_id, ts, data)
 
                 try:
-                    self._socket.send_json(message, flags=zmq.NOBLOCK)
+                    await self._socket.send_multipart(
+                        message, flags=zmq.NOBLOCK, copy=False
+                    )
 
                     self._logger.debug(
-                        f"Data sent for {self.participant_id}: {message}"
+                        "Data sent for %s at %s: %s", self.participant_id, ts, data
                     )
                 except Exception as e:
                     self._logger.debug(
-                        f"Exception: {e} | Data cannot be sent for {self.participant_id}: {message}"
+                        "Exception: %s | Data cannot be sent for %s: %s",
+                        e,
+                        self.participant_id,
+                        data,
                     )
 
+    async def _receive_results(self) -> None:
+        """Receive aggregation results until the filter is cleaned up."""
+        while self.is_socket_connected:
+            try:
+                frames = await self._socket.recv_multipart(copy=False)
+                result = group_filter_message.decode_result(frames)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._logger.debug(f"Exception: {e} | Result cannot be received.")
+                continue
+
+            self._results[result.participant_ids] = result
+            self._latest_result = result
+
+            latency = result.latency
+            if self._result_count == 0:
+                self._latency = latency
+            else:
+                self._latency += _EMA_WEIGHT * (latency - self._latency)
+            self._max_latency = max(self._max_latency, latency)
+            self._result_count += 1
+            self._report()
+
+    def _report(self) -> None:
+        """Log the rate and latency of the received results every `_REPORT_INTERVAL`
+        seconds."""
+        now = monotonic()
+        elapsed = now - self._last_report
+        if elapsed < _REPORT_INTERVAL:
+            return
+        count = self._result_count - self._reported_results
+        self._logger.info(
+            f"{count / elapsed:.1f} aggregation results/s, latency from frame to result"
+            f" avg. {self._latency * 1000:.1f} ms, max. {self._max_latency * 1000:.1f}"
+            " ms"
+        )
+        self._reported_results = self._result_count
+        self._max_latency = 0
+        self._last_report = now
+
     @staticmethod
     @abstractmethod
     def name() -> str:
@@ -150,6 +271,25 @@ class GroupFilter(ABC):
     async def process_individual_frame(
         self, original: VideoFrame | AudioFrame, ndarray: numpy.ndarray
     ) -> dict:
+        """Process audio/video frame of a single participant.
+
+        Parameters
+        ----------
+        original: av.VideoFrame or av.AudioFrame
+            Original frame with metadata that can be useful to the group filter.
+        ndarray : numpy.ndarray
+            Read-only view of the decoded frame, in one of the `accepted_formats`,
+            see hub.track_handler.TrackHandler.frame_format.  The frame is shared
+            with the filter pipeline, see hub.frame_buffer.FrameBuffer.  Copy it
+            before modifying it.
+
+        Returns
+        -------
+        Data sent to the aggregator, or None if no data should be sent.  NumPy arrays
+        and numbers are sent as raw buffers and received by the aggregator as NumPy
+        arrays and scalars, other data must be JSON serializable.  See
+        group_filters.group_filter_message.
+        """
         raise NotImplementedError(
             f"{self} is missing it's implementation of the abstract"
             " `process_individual_frame` method."
@@ -158,14 +298,82 @@ class GroupFilter(ABC):
     @staticmethod
     @abstractmethod
     def align_data(x: list, y: list, base_timeline: list) -> list:
+        """Align the data `y` of a participant with timestamps `x` to `base_timeline`.
+
+        Called by the default `align_windows` for each participant.
+
+        Parameters
+        ----------
+        x : list
+            Timestamps of the data of the participant, oldest first.
+        y : list
+            Data of the participant, one entry per timestamp.
+        base_timeline : list
+            Timestamps of the first participant of the aggregation.
+
+        Returns
+        -------
+        list
+            Data of the participant, one entry per timestamp in `base_timeline`.
+        """
         raise NotImplementedError(
             f"{__name__} is missing it's implementation of the static"
             " abstract `align_data` method."
         )
 
+    @classmethod
+    def align_windows(
+        cls,
+        timelines: list[numpy.ndarray],
+        windows: list[numpy.ndarray],
+        base_timeline: numpy.ndarray,
+    ) -> list:
+        """Align the data of several participants to `base_timeline`.
+
+        Called by the aggregator with the data of all participants that need to be
+        aligned for an aggregation.  Calls `align_data` for each participant by
+        default, with the timestamps and data converted to lists.  Override it with a vectorized implementation, e.g. using
+        group_filters.group_filter_window.align, to align all participants at once.
+
+        Parameters
+        ----------
+        timelines : list of numpy.ndarray
+            Timestamps of the data of each participant, oldest first.
+        windows : list of numpy.ndarray
+            Data of each participant, one entry per timestamp.  Read-only.
+        base_timeline : numpy.ndarray
+            Timestamps of the first participant of the aggregation.
+
+        Returns
+        -------
+        list
+            Aligned data of each participant.
+        """
+        base = base_timeline.tolist()
+        return [
+            cls.align_data(x.tolist(), y.tolist(), base)
+            for x, y in zip(timelines, windows)
+        ]
+
     @staticmethod
     @abstractmethod
-    def aggregate(data: list[list[Any]]) -> Any:
+    def aggregate(data: list[numpy.ndarray | list]) -> Any:
+        """Aggregate the aligned data of the participants of an aggregation.
+
+        Parameters
+        ----------
+        data : list of numpy.ndarray or list
+            Data of each participant, aligned to the timeline of the first
+            participant.  The data of the first participant is a read-only
+            numpy.ndarray view of its window, see group_filters.group_filter_window.
+            The data of the other participants is returned by `align_windows`, i.e.
+            lists if `align_windows` is not overridden.  Use `numpy.asarray` to
+            handle both, and copy the data before modifying it.
+
+        Returns
+        -------
+        Result sent to all participants of the aggregation.
+        """
         raise NotImplementedError(
             f"{__name__} is missing it's implementation of the static"
             " abstract `aggregate` method."
@@ -3,16 +3,35 @@
 import asyncio
 from typing import Literal
 import logging
-from group_filters import GroupFilter
+from time import monotonic, perf_counter
+from group_filters import GroupFilter, group_filter_message
+from group_filters.group_filter_window import DataWindow
+from filters.filter_dict import FilterDict
 import zmq
 import zmq.asyncio
-from queue import Queue
 from itertools import combinations
 from typing import Any
 
+_REPORT_INTERVAL = 10
+"""Interval in seconds the aggregation rate is logged in."""
+
 
 class GroupFilterAggregator(object):
-    """Handles audio and video group filters aggregation step."""
+    """Handles audio and video group filters aggregation step.
+
+    When data of a participant arrives, only the combinations of participants
+    containing this participant are aligned and aggregated; the results of other
+    combinations did not change.  For aggregations of more than two participants,
+    aligned data is cached per pair of participants until one of them sends new data,
+    see `align_data`.
+
+    The data of each participant is stored in a preallocated ring buffer, see
+    group_filters.group_filter_window.DataWindow.
+
+    Aggregation results are sent back to the group filters of the participants in the
+    aggregation, over the connection they send their data on.  Results are dropped
+    for group filters that do not receive them fast enough.
+    """
 
     _logger: logging.Logger
     _task: asyncio.Task
@@ -20,21 +39,43 @@ class GroupFilterAggregator(object):
     _socket: zmq.Socket
     is_socket_connected: bool
     _kind: Literal["video", "audio"]
-    _group_filter: GroupFilter
-    _data: dict[str, Queue[tuple[float, Any]]]
+    _group_filter: type[GroupFilter]
+    _config: FilterDict
+    _data: dict[str, DataWindow]
+    _peers: dict[str, bytes]
+    _versions: dict[str, int]
+    _aligned: dict[tuple[str, str], tuple[int, int, list]]
+    _messages: int
+    _aggregations: int
+    _aggregation_time: float
+    _last_report: float
+    _reported_aggregations: int
 
     def __init__(
-        self, kind: Literal["video", "audio"], group_filter: GroupFilter, port: int
+        self,
+        kind: Literal["video", "audio"],
+        group_filter: type[GroupFilter],
+        port: int,
+        config: FilterDict,
     ) -> None:
         super().__init__()
         self._logger = logging.getLogger(
             f"{group_filter.name()}-GroupFilterAggregator-Port-{port}"
         )
         self._context = zmq.asyncio.Context.instance()
-        self._socket = self._context.socket(zmq.PULL)
+        self._socket = self._context.socket(zmq.ROUTER)
         self._kind = kind
         self._group_filter = group_filter
+        self._config = config
         self._data = {}
+        self._peers = {}
+        self._versions = {}
+        self._aligned = {}
+        self._messages = 0
+        self._aggregations = 0
+        self._aggregation_time = 0
+        self._last_report = monotonic()
+        self._reported_aggregations = 0
 
         try:
             self._socket.bind(f"tcp://127.0.0.1:{port}")
@@ -46,100 +87,219 @@ class GroupFilterAggregator(object):
     def __repr__(self) -> str:
         return f"Group filter aggregator for {self._group_filter.name()}"
 
+    @property
+    def config(self) -> FilterDict:
+        """Get the config of the group filter."""
+        return self._config
+
+    def set_config(self, config: FilterDict) -> None:
+        self._config = config
+
     def set_task(self, task: asyncio.Task) -> None:
         self._task = task
 
     async def cleanup(self) -> None:
         self.is_socket_connected = False
         self.delete_data()
-        self._context.destroy()
+        # The context is shared with other aggregators, e.g. in a worker process.
+        self._socket.close(linger=0)
         self._task.cancel()
 
     def delete_data(self) -> None:
         self._data = {}
+        self._peers = {}
+        self._versions = {}
+        self._aligned = {}
 
     def add_data(self, participant_id: str, time: float, data: Any) -> None:
-        q = self._data.get(
-            participant_id, Queue(maxsize=self._group_filter.data_len_per_participant)
-        )
+        window = self._data.get(participant_id)
+        if window is None:
+            window = DataWindow(self._group_filter.data_len_per_participant)
+            self._data[participant_id] = window
 
-        if q.full():
-            q.get()
-        q.put((time, data))
+        window.append(time, data)
+        self._versions[participant_id] = self._versions.get(participant_id, 0) + 1
 
-        self._data[participant_id] = q
+    def stats(self) -> dict[str, float]:
+        """Get statistics of the messages received and aggregations performed."""
+        return {
+            "participants": len(self._data),
+            "messages": self._messages,
+            "aggregations": self._aggregations,
+            "aggregation_ms": (
+                self._aggregation_time / self._aggregations * 1000
+                if self._aggregations > 0
+                else 0
+            ),
+        }
 
     async def run(self) -> None:
         while True:
             if self.is_socket_connected:
                 try:
-                    message = await self._socket.recv_json()
+                    peer, *frames = await self._socket.recv_multipart(copy=False)
+                    participant_id, time, data = group_filter_message.decode(frames)
+                    self._peers[participant_id] = peer.bytes
+                    message = {
+                        "participant_id": participant_id,
+                        "time": time,
+                        "data": data,
+                    }
 
-                    self.add_data(
-                        message["participant_id"], message["time"], message["data"]
-                    )
-                    self._logger.debug(
-                        f"Data added for {message['participant_id']}: {message},"
-                        + f" # of data: {[(k, v.qsize()) for k, v in self._data.items()]}"
-                    )
-
-                    num_participants_in_aggregation = None
-                    if self._group_filter.num_participants_in_aggregation == "all":
-                        num_participants_in_aggregation = len(self._data)
-                    else:
-                        num_participants_in_aggregation = (
-                            self._group_filter.num_participants_in_aggregation
+                    self.add_data(participant_id, time, data)
+                    self._messages += 1
+                    if self._logger.isEnabledFor(logging.DEBUG):
+                        self._logger.debug(
+                            f"Data added for {participant_id}: {message}, # of data:"
+                            + f" {[(k, len(v)) for k, v in self._data.items()]}"
                         )
 
-                    if len(self._data) >= num_participants_in_aggregation:
-                        for c in combinations(
-                            self._data.keys(), num_participants_in_aggregation
-                        ):
-                            # Check if all participants have enough data to align
-                            participants_have_enough_data = True
-                            if self._group_filter.data_len_per_participant != 0:
-                                for pid in c:
-                                    if (
-                                        self._data[pid].qsize()
-                                        != self._group_filter.data_len_per_participant
-                                    ):
-                                        participants_have_enough_data = False
-                                        break
-
-                            if participants_have_enough_data:
-                                # Align data
-                                data = self.align_data(c)
-
-                                # Aggregate data
-                                aggregated_data = self._group_filter.aggregate(data)
-                                self._logger.debug(
-                                    "Data aggregation is triggered by participant"
-                                    + f" {message['participant_id']}: {message}"
-                                    + f" with data: {data},"
-                                    + f" aggregation result: {aggregated_data}"
-                                )
+                    for c in self._combinations(participant_id):
+                        # Check if all participants have enough data to align
+                        if not self._has_enough_data(c):
+                            continue
+
+                        start = perf_counter()
+                        # Align data
+                        data = self.align_data(c)
+
+                        # Aggregate data
+                        aggregated_data = self._group_filter.aggregate(data)
+                        self._aggregation_time += perf_counter() - start
+                        self._aggregations += 1
+
+                        # Send result to the participants
+                        await self._send_result(c, time, aggregated_data)
+                        if self._logger.isEnabledFor(logging.DEBUG):
+                            self._logger.debug(
+                                "Data aggregation is triggered by participant"
+                                + f" {message['participant_id']}: {message}"
+                                + f" with data: {data},"
+                                + f" aggregation result: {aggregated_data}"
+                            )
+
+                    self._report()
                 except Exception as e:
                     self._logger.debug(
                         f"Exception: {e} | Data aggregation cannot be performed."
                     )
 
-    def align_data(self, participant_ids: tuple) -> list[list[Any]]:
-        data = {}
+                # Receiving queued messages does not yield to the event loop.  Let
+                # other aggregators and commands run between messages.
+                await asyncio.sleep(0)
+
+    async def _send_result(
+        self, participant_ids: tuple[str, ...], time: int, aggregated_data: Any
+    ) -> None:
+        """Send the result of the aggregation of `participant_ids` to their group
+        filters.  `time` is the timestamp of the newest data in the aggregation."""
+        try:
+            message = group_filter_message.encode_result(
+                participant_ids, time, aggregated_data
+            )
+        except (TypeError, ValueError) as e:
+            self._logger.debug(f"Exception: {e} | Result cannot be encoded.")
+            return
+
         for pid in participant_ids:
-            data[pid] = list(self._data[pid].queue)
+            try:
+                await self._socket.send_multipart(
+                    [self._peers[pid], *message], flags=zmq.NOBLOCK, copy=False
+                )
+            except (KeyError, zmq.ZMQError) as e:
+                self._logger.debug(f"Exception: {e} | Result cannot be sent to {pid}.")
 
-        # Use the first participant's time horizon as the basis for alignment
-        p0_x, p0_y = zip(*data[participant_ids[0]])
-        aligned_data = [list(p0_y)]
+    def _combinations(self, participant_id: str) -> list[tuple[str, ...]]:
+        """Get the combinations of participants aggregated together that contain
+        `participant_id`.
 
-        # Align the data for each participant
-        for pid in participant_ids[1:]:
-            x, y = zip(*data[pid])
+        Participants in a combination are ordered by the time they sent their first
+        data.  The first participant provides the timeline for the alignment.
+        """
+        num_participants_in_aggregation = None
+        if self._group_filter.num_participants_in_aggregation == "all":
+            num_participants_in_aggregation = len(self._data)
+        else:
+            num_participants_in_aggregation = (
+                self._group_filter.num_participants_in_aggregation
+            )
+
+        if len(self._data) < num_participants_in_aggregation:
+            return []
+
+        others = [pid for pid in self._data if pid != participant_id]
+        result = []
+        for c in combinations(others, num_participants_in_aggregation - 1):
+            c = set(c)
+            c.add(participant_id)
+            result.append(tuple(pid for pid in self._data if pid in c))
+        return result
 
-            # Align the data
-            y_aligned = self._group_filter.align_data(x, y, p0_x)
+    def _has_enough_data(self, participant_ids: tuple) -> bool:
+        """Check if all participants have enough data to align."""
+        if self._group_filter.data_len_per_participant == 0:
+            return True
+        return all(self._data[pid].full for pid in participant_ids)
 
+    def align_data(self, participant_ids: tuple) -> list[Any]:
+        """Align the data of `participant_ids` to the timeline of the first
+        participant.
+
+        Participants are aligned with a single call of `align_windows` of the group
+        filter.  For more than two participants, the data of a participant aligned to
+        the first participant is cached until one of them sends new data, so pairs
+        without the participant that sent new data are not aligned again.  Pairs of
+        two participants always contain the sender and are not cached.
+        """
+        # Use the first participant's time horizon as the basis for alignment
+        p0 = participant_ids[0]
+        p0_x = self._data[p0].times()
+        aligned_data = [self._data[p0].values()]
+
+        if len(participant_ids) == 2:
+            pid = participant_ids[1]
+            aligned_data.extend(
+                self._group_filter.align_windows(
+                    [self._data[pid].times()], [self._data[pid].values()], p0_x
+                )
+            )
+            return aligned_data
+
+        # Align the data of participants without cached alignment at once
+        outdated = []
+        for pid in participant_ids[1:]:
+            cached = self._aligned.get((p0, pid))
+            if cached is None or cached[:2] != (
+                self._versions[p0],
+                self._versions[pid],
+            ):
+                outdated.append(pid)
+        if len(outdated) > 0:
+            y_aligned = self._group_filter.align_windows(
+                [self._data[pid].times() for pid in outdated],
+                [self._data[pid].values() for pid in outdated],
+                p0_x,
+            )
             # Store the aligned data
-            aligned_data.append(y_aligned)
+            for pid, y in zip(outdated, y_aligned):
+                self._aligned[(p0, pid)] = (self._versions[p0], self._versions[pid], y)
 
+        for pid in participant_ids[1:]:
+            aligned_data.append(self._aligned[(p0, pid)][2])
         return aligned_data
+
+    def _report(self) -> None:
+        """Log the aggregation rate every `_REPORT_INTERVAL` seconds."""
+        now = monotonic()
+        elapsed = now - self._last_report
+        if elapsed < _REPORT_INTERVAL:
+            return
+        count = self._aggregations - self._reported_aggregations
+        if count > 0:
+            stats = self.stats()
+            self._logger.info(
+                f"{count / elapsed:.1f} aggregations/s for {stats['participants']}"
+                f" participants (avg. {stats['aggregation_ms']:.2f} ms)"
+            )
+        self._reported_aggregations = self._aggregations
+        self._last_report = now
@@ -21,4 +21,6 @@ def create_group_filter_aggregator(
             description=f"Unknown group filter type {group_filter_name}.",
         )
 
-    return GroupFilterAggregator(channel, group_filters[group_filter_name], port)
+    return GroupFilterAggregator(
+        channel, group_filters[group_filter_name], port, group_filter_config
+    )
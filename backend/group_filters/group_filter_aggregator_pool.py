@@ -0,0 +1,374 @@
+"""Provide `GroupFilterAggregatorPool`, worker processes hosting aggregators.
+
+Aggregating the data of a group, e.g. cross-correlations over long windows, can take
+longer than a frame.  Running the aggregators on the event loop of the Hub would delay
+all signaling and experimenter requests.  The pool is started by the Hub with
+`workers` worker processes, each running the aggregators assigned to it on its own
+event loop.  Each aggregator is assigned to the worker with the fewest aggregators.
+Workers not replying are restarted and create their aggregators again.
+
+Experiments use `RemoteGroupFilterAggregator` proxies with the interface and
+lifecycle of group_filters.group_filter_aggregator.GroupFilterAggregator.  Aggregators
+bind their sockets in the worker, so group filters connect to the same port as before.
+
+Commands are sent to a worker over a zmq PAIR socket as JSON
+`{"command": str, "id": str, ...}`, replies are `{"result": ...}` or
+`{"error": str}`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import zmq
+import zmq.asyncio
+from typing import Any, Literal
+
+from filters.filter_dict import FilterDict
+from group_filters import group_filter_aggregator_factory
+from group_filters.group_filter_aggregator import GroupFilterAggregator
+
+REQUEST_TIMEOUT = 5.0
+"""Time in seconds to wait for the reply of a worker."""
+
+_TERMINATE_TIMEOUT = 1.0
+
+
+def serve(
+    control_port: int, log_level: str = "INFO", log_file: str | None = None
+) -> None:
+    """Run a worker hosting aggregators until the process is terminated.
+
+    Parameters
+    ----------
+    control_port : int
+        Local port of the PAIR socket of the pool the worker receives commands from.
+    log_level : str, default "INFO"
+        Logging level of the worker, see server.config.Config.log.
+    log_file : str, optional
+        File the worker logs to.  Logs to the console if None.
+    """
+    logging.basicConfig(
+        level=logging.getLevelName(log_level),
+        format="%(asctime)s:%(levelname)s:%(name)s: %(message)s",
+        filename=log_file,
+    )
+    asyncio.run(_serve(control_port))
+
+
+async def _serve(control_port: int) -> None:
+    """Handle the commands of the pool.  See `serve`."""
+    logger = logging.getLogger(f"GroupFilterAggregatorWorker-{control_port}")
+    socket = zmq.asyncio.Context.instance().socket(zmq.PAIR)
+    socket.connect(f"tcp://127.0.0.1:{control_port}")
+    aggregators: dict[str, GroupFilterAggregator] = {}
+
+    while True:
+        message = await socket.recv_json()
+        try:
+            command = message["command"]
+            aggregator_id = message["id"]
+            result = None
+            if command == "create":
+                aggregator = (
+                    group_filter_aggregator_factory.create_group_filter_aggregator(
+                        message["kind"], message["config"], message["port"]
+                    )
+                )
+                aggregator.set_task(asyncio.create_task(aggregator.run()))
+                aggregators[aggregator_id] = aggregator
+            elif command == "set_config":
+                aggregators[aggregator_id].set_config(message["config"])
+            elif command == "delete_data":
+                aggregators[aggregator_id].delete_data()
+            elif command == "stats":
+                result = aggregators[aggregator_id].stats()
+            elif command == "cleanup":
+                aggregator = aggregators.pop(aggregator_id)
+                await aggregator.cleanup()
+            else:
+                raise ValueError(f"Unknown command: {command}")
+            reply = {"result": result}
+        except Exception as e:
+            logger.error(f"Command {message} failed: {e}")
+            reply = {"error": str(e)}
+        await socket.send_json(reply)
+
+
+class _Worker:
+    """Worker process and the queue of commands sent to it.
+
+    Workers not replying within `REQUEST_TIMEOUT` are restarted, their aggregators
+    are created again with their current config.  Their data is lost.
+    """
+
+    name: str
+    process: multiprocessing.process.BaseProcess
+    socket: zmq.asyncio.Socket
+    aggregators: int
+    _log_level: str
+    _log_file: str | None
+    _created: dict[str, dict]
+    _requests: asyncio.Queue[tuple[dict, asyncio.Future]]
+    _task: asyncio.Task
+    _logger: logging.Logger
+
+    def __init__(self, index: int, log_level: str, log_file: str | None) -> None:
+        self.name = f"GroupFilterAggregatorWorker-{index}"
+        self.aggregators = 0
+        self._log_level = log_level
+        self._log_file = log_file
+        self._created = {}
+        self._requests = asyncio.Queue()
+        self._logger = logging.getLogger(self.name)
+        self._start()
+        self._task = asyncio.create_task(self._send_requests())
+
+    def request(self, message: dict) -> asyncio.Future:
+        """Send `message` after all previous messages.  Returns the reply future."""
+        # Keep the create commands of all aggregators, see `_restart`.
+        aggregator_id = message["id"]
+        if message["command"] == "create":
+            self._created[aggregator_id] = message
+        elif message["command"] == "set_config" and aggregator_id in self._created:
+            self._created[aggregator_id] = {
+                **self._created[aggregator_id],
+                "config": message["config"],
+            }
+        elif message["command"] == "cleanup":
+            self._created.pop(aggregator_id, None)
+
+        future = asyncio.get_running_loop().create_future()
+        self._requests.put_nowait((message, future))
+        return future
+
+    def stop(self) -> None:
+        self._task.cancel()
+        self._stop()
+
+    def _start(self) -> None:
+        """Start the worker process."""
+        self.socket = zmq.asyncio.Context.instance().socket(zmq.PAIR)
+        control_port = self.socket.bind_to_random_port("tcp://127.0.0.1")
+
+        # Spawn, the worker must not inherit the event loop and sockets of the Hub.
+        context = multiprocessing.get_context("spawn")
+        self.process = context.Process(
+            target=serve,
+            args=(control_port, self._log_level, self._log_file),
+            name=self.name,
+            daemon=True,
+        )
+        self.process.start()
+
+    def _stop(self) -> None:
+        """Stop the worker process, which releases the ports of its aggregators."""
+        self.socket.close(linger=0)
+        self.process.terminate()
+        self.process.join(_TERMINATE_TIMEOUT)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+    async def _restart(self) -> None:
+        """Restart the worker process and create its aggregators again."""
+        while True:
+            self._stop()
+            try:
+                self._start()
+                for message in list(self._created.values()):
+                    reply = await asyncio.wait_for(
+                        self._request(message), REQUEST_TIMEOUT
+                    )
+                    if "error" in reply:
+                        self._logger.error(
+                            f"Failed to create aggregator again: {reply['error']}"
+                        )
+                return
+            except asyncio.TimeoutError:
+                self._logger.warning("Restarted worker did not reply, restarting")
+            except (zmq.ZMQError, ValueError) as e:
+                self._logger.error(f"Failed to restart worker, retrying: {e}")
+                await asyncio.sleep(REQUEST_TIMEOUT)
+
+    async def _send_requests(self) -> None:
+        """Send the queued messages one at a time, in order."""
+        while True:
+            message, future = await self._requests.get()
+            try:
+                reply = await asyncio.wait_for(self._request(message), REQUEST_TIMEOUT)
+            except (asyncio.TimeoutError, zmq.ZMQError, ValueError) as e:
+                # The reply may still arrive and must not be mixed up with the replies
+                # to later messages, restart the worker.
+                self._logger.warning(
+                    f"Request {message['command']} failed, restarting worker: " f"{e!r}"
+                )
+                await self._restart()
+                if message["command"] == "stats":
+                    future.set_exception(
+                        RuntimeError(f"{self.name} failed to reply to {message}")
+                    )
+                else:
+                    # Applied by creating the aggregators again.
+                    future.set_result(None)
+                continue
+            if "error" in reply:
+                future.set_exception(RuntimeError(reply["error"]))
+            else:
+                future.set_result(reply["result"])
+
+    async def _request(self, message: dict) -> dict:
+        await self.socket.send_json(message)
+        return await self.socket.recv_json()
+
+
+class GroupFilterAggregatorPool:
+    """Pool of worker processes hosting the aggregators of all experiments."""
+
+    workers: int
+    _log_level: str
+    _log_file: str | None
+    _workers: list[_Worker]
+    _next_id: int
+
+    def __init__(
+        self, workers: int, log_level: str = "INFO", log_file: str | None = None
+    ) -> None:
+        """Initialize new GroupFilterAggregatorPool.
+
+        Parameters
+        ----------
+        workers : int
+            Number of worker processes.
+        log_level : str, default "INFO"
+            Logging level of the workers, see server.config.Config.log.
+        log_file : str, optional
+            File the workers log to.  Logs to the console if None.
+        """
+        self.workers = workers
+        self._log_level = log_level
+        self._log_file = log_file
+        self._workers = []
+        self._next_id = 0
+
+    def start(self) -> None:
+        """Start the worker processes.  Must be called in a running event loop."""
+        self._workers = [
+            _Worker(i, self._log_level, self._log_file) for i in range(self.workers)
+        ]
+
+    def stop(self) -> None:
+        """Stop the worker processes and all aggregators."""
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+
+    def create_aggregator(
+        self, kind: Literal["video", "audio"], config: FilterDict, port: int
+    ) -> RemoteGroupFilterAggregator:
+        """Create an aggregator for the group filter `config` on the worker with the
+        fewest aggregators.
+
+        See group_filters.group_filter_aggregator.GroupFilterAggregator for
+        parameters.  The aggregator is created when `run` is called.
+        """
+        worker = min(self._workers, key=lambda w: w.aggregators)
+        self._next_id += 1
+        return RemoteGroupFilterAggregator(
+            worker, str(self._next_id), kind, config, port
+        )
+
+
+class RemoteGroupFilterAggregator:
+    """Proxy for a GroupFilterAggregator hosted by a GroupFilterAggregatorPool.
+
+    Commands are sent to the worker in order.  `set_config` and `delete_data` do not
+    wait for the worker.
+    """
+
+    _logger: logging.Logger
+    _worker: _Worker
+    _id: str
+    _kind: Literal["video", "audio"]
+    _config: FilterDict
+    _port: int
+    _task: asyncio.Task | None
+    _stopped: asyncio.Event
+
+    def __init__(
+        self,
+        worker: _Worker,
+        aggregator_id: str,
+        kind: Literal["video", "audio"],
+        config: FilterDict,
+        port: int,
+    ) -> None:
+        self._logger = logging.getLogger(
+            f"{config['name']}-RemoteGroupFilterAggregator-Port-{port}"
+        )
+        self._worker = worker
+        self._id = aggregator_id
+        self._kind = kind
+        self._config = config
+        self._port = port
+        self._task = None
+        self._stopped = asyncio.Event()
+
+    def __repr__(self) -> str:
+        return f"Group filter aggregator for {self._config['name']} (remote)"
+
+    @property
+    def config(self) -> FilterDict:
+        """Get the config of the group filter."""
+        return self._config
+
+    def set_config(self, config: FilterDict) -> None:
+        self._config = config
+        self._send({"command": "set_config", "config": config})
+
+    def set_task(self, task: asyncio.Task) -> None:
+        self._task = task
+
+    def delete_data(self) -> None:
+        self._send({"command": "delete_data"})
+
+    async def stats(self) -> dict[str, float]:
+        """Get statistics of the aggregator, see GroupFilterAggregator.stats."""
+        return await self._worker.request({"command": "stats", "id": self._id})
+
+    async def run(self) -> None:
+        """Create the aggregator in the worker and wait until it is cleaned up."""
+        self._worker.aggregators += 1
+        try:
+            await self._worker.request(
+                {
+                    "command": "create",
+                    "id": self._id,
+                    "kind": self._kind,
+                    "config": self._config,
+                    "port": self._port,
+                }
+            )
+            await self._stopped.wait()
+        except Exception as e:
+            self._logger.error(f"Failed to run aggregator: {e}")
+        finally:
+            self._worker.aggregators -= 1
+
+    async def cleanup(self) -> None:
+        try:
+            await self._worker.request({"command": "cleanup", "id": self._id})
+        except Exception as e:
+            self._logger.error(f"Failed to clean up aggregator: {e}")
+        self._stopped.set()
+
+    def _send(self, message: dict[str, Any]) -> None:
+        """Send `message` to the aggregator without waiting for the reply."""
+        message["id"] = self._id
+        future = self._worker.request(message)
+        future.add_done_callback(self._log_error)
+
+    def _log_error(self, future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            self._logger.error(f"Aggregator command failed: {future.exception()}")
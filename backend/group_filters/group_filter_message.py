@@ -0,0 +1,194 @@
+"""Provide the binary wire format between group filters and aggregators.
+
+Group filters send the result of `process_individual_frame` for every frame to their
+aggregator, which sends the aggregation results back to the group filters of the
+participants in the aggregation, see group_filters.group_filter.GroupFilter.  NumPy
+arrays and scalars are sent as raw buffers without serialization or copies, and are
+received as NumPy arrays.  Other data is sent as JSON.
+
+Wire format (zmq multipart messages):
+- Data (`encode`): participant id, UTF-8.  Result (`encode_result`): JSON list of the
+  IDs of the participants in the aggregation.
+- Header: timestamp (int64, ns), kind (uint8), for arrays and scalars followed by the
+  number of dimensions (uint8), the shape (int64 each) and the dtype string, e.g.
+  `<f8`.  Little-endian.
+- Data: raw buffer of the C-contiguous array, or JSON.
+"""
+
+from __future__ import annotations
+
+import json
+import numbers
+import struct
+import numpy
+from dataclasses import dataclass
+from time import time_ns
+from typing import Any
+
+_HEADER = struct.Struct("<qBB")
+_SHAPE = struct.Struct("<q")
+
+_ARRAY = 0
+_SCALAR = 1
+_JSON = 2
+
+
+@dataclass(frozen=True, slots=True)
+class AggregationResult:
+    """Result of an aggregation, received by the group filters of the participants.
+
+    Attributes
+    ----------
+    participant_ids : tuple of str
+        IDs of the participants in the aggregation.
+    time : int
+        Timestamp of the newest data in the aggregation, in ns.  See
+        hub.track_handler.TrackHandler for the time group filters receive frames.
+    data : Any
+        Result of `aggregate` of the group filter.
+    received : int
+        Timestamp the result was received at, in ns.
+    """
+
+    participant_ids: tuple[str, ...]
+    time: int
+    data: Any
+    received: int
+
+    @property
+    def latency(self) -> float:
+        """Time in seconds between the newest frame in the aggregation and receiving
+        the result."""
+        return (self.received - self.time) / 1e9
+
+
+def encode(participant_id: str, time: int, data: Any) -> list:
+    """Encode group filter data into the frames of a multipart message.
+
+    Parameters
+    ----------
+    participant_id : str
+        ID of the participant the data was computed for.
+    time : int
+        Timestamp of the frame the data was computed for, in ns.
+    data : Any
+        numpy.ndarray, number or JSON serializable data.
+
+    Returns
+    -------
+    list
+        Frames of the message.  Arrays are not copied, send them with `copy=False`.
+    """
+    return [participant_id.encode(), *_encode_data(time, data)]
+
+
+def decode(frames: list) -> tuple[str, int, Any]:
+    """Decode the frames of a multipart message created by `encode`.
+
+    Parameters
+    ----------
+    frames : list of bytes or zmq.Frame
+        Frames of the message.  Received `zmq.Frame` (`copy=False`) are not copied.
+
+    Returns
+    -------
+    tuple of str, int and Any
+        Participant ID, timestamp and data.  Arrays are read-only and share the memory
+        of the received frame, scalars are NumPy scalars.
+
+    Raises
+    ------
+    ValueError
+        If the message is invalid.
+    """
+    if len(frames) != 3:
+        raise ValueError(f"Invalid group filter message with {len(frames)} frames.")
+    participant_id, header, payload = (_buffer(frame) for frame in frames)
+    time, data = _decode_data(header, payload)
+    return bytes(participant_id).decode(), time, data
+
+
+def encode_result(participant_ids: tuple[str, ...], time: int, data: Any) -> list:
+    """Encode an aggregation result into the frames of a multipart message.
+
+    See `encode` for the supported `data`.
+    """
+    return [json.dumps(participant_ids).encode(), *_encode_data(time, data)]
+
+
+def decode_result(frames: list) -> AggregationResult:
+    """Decode the frames of a multipart message created by `encode_result`.
+
+    See `decode` for the decoded data.
+
+    Raises
+    ------
+    ValueError
+        If the message is invalid.
+    """
+    received = time_ns()
+    if len(frames) != 3:
+        raise ValueError(f"Invalid aggregation result with {len(frames)} frames.")
+    participant_ids, header, payload = (_buffer(frame) for frame in frames)
+    time, data = _decode_data(header, payload)
+    return AggregationResult(
+        tuple(json.loads(bytes(participant_ids))), time, data, received
+    )
+
+
+def _encode_data(time: int, data: Any) -> list:
+    """Encode the header and data frames of a message."""
+    if isinstance(data, (numbers.Number, numpy.generic)):
+        kind = _SCALAR
+        data = numpy.asarray(data)
+    elif isinstance(data, numpy.ndarray):
+        kind = _ARRAY
+    else:
+        kind = _JSON
+
+    if kind != _JSON and data.dtype.hasobject:
+        kind = _JSON
+        data = data.tolist()
+
+    if kind == _JSON:
+        header = _HEADER.pack(time, kind, 0)
+        payload = json.dumps(data).encode()
+    else:
+        if not data.flags.c_contiguous:
+            data = data.copy()
+        header = b"".join(
+            (
+                _HEADER.pack(time, kind, data.ndim),
+                *(_SHAPE.pack(size) for size in data.shape),
+                data.dtype.str.encode(),
+            )
+        )
+        payload = data.data if data.ndim > 0 else data.tobytes()
+
+    return [header, payload]
+
+
+def _decode_data(header: memoryview, payload: memoryview) -> tuple[int, Any]:
+    """Decode the header and data frames of a message."""
+    time, kind, ndim = _HEADER.unpack_from(header)
+    if kind == _JSON:
+        data = json.loads(bytes(payload))
+    elif kind in (_ARRAY, _SCALAR):
+        offset = _HEADER.size + ndim * _SHAPE.size
+        shape = tuple(
+            _SHAPE.unpack_from(header, _HEADER.size + i * _SHAPE.size)[0]
+            for i in range(ndim)
+        )
+        dtype = numpy.dtype(bytes(header[offset:]).decode())
+        data = numpy.frombuffer(payload, dtype).reshape(shape)
+        data.flags.writeable = False
+        if kind == _SCALAR:
+            data = data[()]
+    else:
+        raise ValueError(f"Invalid group filter message kind: {kind}.")
+    return time, data
+
+
+def _buffer(frame) -> memoryview:
+    """Get the buffer of a received frame without copying."""
+    return memoryview(getattr(frame, "buffer", frame))
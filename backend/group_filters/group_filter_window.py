@@ -0,0 +1,222 @@
+"""Provide `DataWindow` and vectorized alignment helpers for group filter data.
+
+The GroupFilterAggregator stores the latest data of each participant in a
+`DataWindow`, a preallocated ring buffer of timestamps and values.  Windows are read
+as NumPy arrays without copying the stored data.
+
+`align` aligns the windows of any number of participants to a common timeline in one
+vectorized pass.  Group filters can use it in their `align_data` and `align_windows`
+implementations, see group_filters.group_filter.GroupFilter.
+"""
+
+from __future__ import annotations
+
+import numpy
+from typing import Any, Literal, Sequence
+
+_INITIAL_CAPACITY = 64
+
+
+class DataWindow:
+    """Ring buffer of the latest timestamps and values sent by a participant.
+
+    Values of the same shape and numeric dtype are stored in a preallocated array
+    with shape (capacity, *value shape), other values in an object array.  Each entry
+    is stored twice, so the window is always available as contiguous view.
+    """
+
+    capacity: int
+    _times: numpy.ndarray
+    _values: numpy.ndarray | None
+    _start: int
+    _length: int
+    _bounded: bool
+
+    def __init__(self, capacity: int = 0) -> None:
+        """Initialize new DataWindow.
+
+        Parameters
+        ----------
+        capacity : int, default 0
+            Maximum number of entries.  The oldest entry is dropped when a new entry
+            is added to a full window.  0 for no limit.
+        """
+        self._bounded = capacity > 0
+        self.capacity = capacity if self._bounded else _INITIAL_CAPACITY
+        self._times = numpy.empty(2 * self.capacity, numpy.float64)
+        self._values = None
+        self._start = 0
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def full(self) -> bool:
+        """Whether the window holds `capacity` entries and has a limited capacity."""
+        return self._bounded and self._length == self.capacity
+
+    def append(self, time: float, value: Any) -> None:
+        """Add `value` with `time`, dropping the oldest entry if the window is full."""
+        value = self._convert(value)
+        if self._length == self.capacity:
+            if self._bounded:
+                self._start = (self._start + 1) % self.capacity
+                self._length -= 1
+            else:
+                self._grow()
+
+        index = (self._start + self._length) % self.capacity
+        for i in (index, index + self.capacity):
+            self._times[i] = time
+            self._values[i] = value
+        self._length += 1
+
+    def times(self) -> numpy.ndarray:
+        """Get the timestamps of the window, oldest first.  Read-only view."""
+        return self._view(self._times)
+
+    def values(self) -> numpy.ndarray:
+        """Get the values of the window, oldest first.  Read-only view.
+
+        Shape (len(window), *value shape).
+        """
+        if self._values is None:
+            return numpy.empty(0)
+        return self._view(self._values)
+
+    def clear(self) -> None:
+        """Remove all entries, keeping the allocated memory."""
+        self._start = 0
+        self._length = 0
+
+    def _view(self, array: numpy.ndarray) -> numpy.ndarray:
+        view = array[self._start : self._start + self._length]
+        view.flags.writeable = False
+        return view
+
+    def _convert(self, value: Any) -> Any:
+        """Allocate the value storage for the first value, or fall back to objects if
+        `value` does not fit into it."""
+        array = numpy.asarray(value)
+        if self._values is None:
+            if array.dtype.hasobject or array.dtype.kind in "US":
+                self._values = numpy.empty(2 * self.capacity, object)
+            else:
+                self._values = numpy.empty(
+                    (2 * self.capacity, *array.shape), array.dtype
+                )
+        if self._values.dtype == object:
+            return value
+        if array.shape != self._values.shape[1:] or not numpy.can_cast(
+            array.dtype, self._values.dtype, "same_kind"
+        ):
+            # E.g. a filter sending lists of varying length.
+            values = numpy.empty(2 * self.capacity, object)
+            for i in range(2 * self.capacity):
+                values[i] = self._values[i]
+            self._values = values
+            return value
+        return array
+
+    def _grow(self) -> None:
+        """Double the capacity of an unlimited window."""
+        times = self.times()
+        values = self.values()
+        self.capacity *= 2
+        self._times = numpy.empty(2 * self.capacity, numpy.float64)
+        self._times[: self._length] = times
+        self._values = numpy.empty(
+            (2 * self.capacity, *self._values.shape[1:]), self._values.dtype
+        )
+        self._values[: self._length] = values
+        self._start = 0
+
+
+def align(
+    base_timeline: Sequence[float],
+    timelines: Sequence[Sequence[float]],
+    values: Sequence[Any],
+    kind: Literal["nearest", "linear"] = "nearest",
+) -> list[numpy.ndarray]:
+    """Align the values of several participants to `base_timeline`.
+
+    Outside of its timeline, the first or last value of a participant is used.  All
+    participants are aligned in one vectorized pass, their timelines may have
+    different lengths.
+
+    Parameters
+    ----------
+    base_timeline : sequence of float
+        Timestamps to align to, ascending.
+    timelines : sequence of sequences of float
+        Timestamps of each participant, ascending and not empty.
+    values : sequence
+        Values of each participant, one per timestamp, e.g. `DataWindow.values`.
+    kind : "nearest" or "linear", default "nearest"
+        Use the value with the nearest timestamp, or interpolate linearly between the
+        values of the neighbouring timestamps.  "linear" requires numeric values.
+
+    Returns
+    -------
+    list of numpy.ndarray
+        Values of each participant at `base_timeline`, shape
+        (len(base_timeline), *value shape).
+    """
+    base = numpy.asarray(base_timeline, numpy.float64)
+    timelines = [numpy.asarray(t, numpy.float64) for t in timelines]
+    if len(timelines) == 0:
+        return []
+    lengths = numpy.array([len(t) for t in timelines])
+    if numpy.any(lengths == 0):
+        raise ValueError("Cannot align participants without data.")
+
+    # Concatenate the timelines with an offset per participant larger than the range
+    # of all timestamps, so one sorted search finds the neighbours of all participants.
+    origin = min(base.min(initial=numpy.inf), *(t[0] for t in timelines))
+    end = max(base.max(initial=-numpy.inf), *(t[-1] for t in timelines))
+    stride = end - origin + 1
+    offsets = numpy.arange(len(timelines)) * stride
+    flat_times = numpy.concatenate(
+        [t - origin + offset for t, offset in zip(timelines, offsets)]
+    )
+    starts = numpy.concatenate(([0], numpy.cumsum(lengths)[:-1]))[:, None]
+    ends = starts + lengths[:, None] - 1
+
+    queries = (base - origin)[None, :] + offsets[:, None]
+    index = numpy.searchsorted(flat_times, queries)
+    lower = numpy.clip(index - 1, starts, ends)
+    upper = numpy.clip(index, starts, ends)
+    below = queries - flat_times[lower]
+    above = flat_times[upper] - queries
+
+    flat_values = _concatenate_values(values)
+    if kind == "nearest":
+        nearest = numpy.where(above < below, upper, lower)
+        aligned = flat_values[nearest]
+    elif kind == "linear":
+        span = flat_times[upper] - flat_times[lower]
+        weight = numpy.divide(below, span, out=numpy.zeros_like(below), where=span > 0)
+        weight = numpy.clip(weight, 0, 1)
+        weight = weight.reshape(weight.shape + (1,) * (flat_values.ndim - 1))
+        aligned = flat_values[lower] * (1 - weight) + flat_values[upper] * weight
+    else:
+        raise ValueError(f"Invalid alignment kind: {kind}.")
+
+    return list(aligned)
+
+
+def _concatenate_values(values: Sequence[Any]) -> numpy.ndarray:
+    """Concatenate the values of all participants along the first axis."""
+    arrays = [numpy.asarray(v) for v in values]
+    try:
+        return numpy.concatenate(arrays)
+    except ValueError:
+        # Values of different shapes, e.g. lists of varying length.
+        flat = numpy.empty(sum(len(a) for a in arrays), object)
+        i = 0
+        for array in arrays:
+            for value in array:
+                flat[i] = value
+                i += 1
+        return flat
@@ -3,7 +3,7 @@ from av import VideoFrame, AudioFrame
 from filters.filter_dict import FilterDict
 from group_filters import GroupFilter
 from typing import Any
-from scipy.interpolate import interp1d
+from group_filters.group_filter_window import align
 
 
 class TemplateGroupFilter(GroupFilter):
@@ -22,6 +22,7 @@ class TemplateGroupFilter(GroupFilter):
 
     data_len_per_participant = 1  # data required for aggregation
     num_participants_in_aggregation = 2  # number of participants joining in aggregation
+    pyramid_level = 2  # the mean does not need the full resolution
 
     def __init__(self, config: FilterDict, participant_id: str):
         super().__init__(config, participant_id)
@@ -40,10 +41,19 @@ class TemplateGroupFilter(GroupFilter):
     def align_data(x: list, y: list, base_timeline: list) -> list:
         # TODO: Change this to implement an alignment function.
         # Needs to be implemented as a static method.
-        interpolator = interp1d(x, y, kind="nearest", fill_value="extrapolate")
-        return list(interpolator(base_timeline))
+        return align(base_timeline, [x], [y], kind="nearest")[0]
+
+    def align_windows(
+        timelines: list[np.ndarray],
+        windows: list[np.ndarray],
+        base_timeline: np.ndarray,
+    ) -> list:
+        # Optional, aligns the data of all participants at once.  Calls `align_data`
+        # for each participant if not implemented.
+        # Needs to be implemented as a static method.
+        return align(base_timeline, timelines, windows, kind="nearest")
 
-    def aggregate(data: list[list[Any]]) -> Any:
+    def aggregate(data: list[np.ndarray | list]) -> Any:
         # TODO: Change this to implement the aggregation step.
         # Needs to be implemented as a static method.
         np_data = np.array(data)
@@ -0,0 +1,221 @@
+"""Provide `FaceAnalyzer`, the face detection stage shared by face-based filters."""
+
+from __future__ import annotations
+
+import cv2
+import dlib
+import numpy
+from dataclasses import dataclass
+
+from hub.inference_service import InferenceClient
+
+MIN_TRACKING_CONFIDENCE = 7.0
+"""Minimum peak to side lobe ratio of the correlation tracker to keep a face.
+
+If the confidence is lower, the face is considered lost and detected again on the
+next frame.
+"""
+
+_LANDMARK_MARGIN = 0.1
+
+
+@dataclass(frozen=True, slots=True)
+class Face:
+    """Face found by the FaceAnalyzer on a frame.
+
+    Coordinates are pixels of the full resolution frame.
+
+    Attributes
+    ----------
+    x : int
+        Left edge of the face box.
+    y : int
+        Top edge of the face box.
+    width : int
+        Width of the face box.
+    height : int
+        Height of the face box.
+    landmarks : numpy.ndarray or None
+        68 face landmarks as int ndarray with shape (68, 2), (x, y) for each point.
+        See the dlib / iBUG 300-W annotation for the indices.  None if no filter
+        requested landmarks.
+    detected : bool
+        Whether the face was detected on this frame.  False if it was tracked from
+        the last detection.
+    """
+
+    x: int
+    y: int
+    width: int
+    height: int
+    landmarks: numpy.ndarray | None = None
+    detected: bool = True
+
+    def scaled(self, factor: float) -> Face:
+        """Get the face for a frame scaled by `factor`, e.g. in a scaled branch."""
+        if factor == 1:
+            return self
+        return Face(
+            round(self.x * factor),
+            round(self.y * factor),
+            round(self.width * factor),
+            round(self.height * factor),
+            None
+            if self.landmarks is None
+            else numpy.rint(self.landmarks * factor).astype(int),
+            self.detected,
+        )
+
+
+class FaceAnalyzer:
+    """Detects and tracks faces in the frames of a video TrackHandler.
+
+    Faces are detected with the dlib HOG face detector on a downscaled copy of the
+    luma, every `detection_interval` frames.  In between, each face is followed with
+    a dlib correlation tracker, which is considerably cheaper.  A face is detected
+    again early, if a tracker loses it or frames were not analysed.  Landmarks are
+    predicted on the full resolution luma.
+
+    Detection and landmark prediction run in the inference service shared by all
+    participants, see hub.inference_service.  Trackers run locally.
+
+    The TrackHandler runs the analyzer once per frame a filter setting
+    `Filter.face_analysis` is executed on, and provides the result in
+    `TrackHandler.faces`.  All face-based filters of the track share the result.
+    """
+
+    detection_interval: int
+    detection_width: int
+    _client: InferenceClient
+    _trackers: list[dlib.correlation_tracker]
+    _frames_since_detection: int
+    _lost: bool
+    _last_frame: int | None
+
+    def __init__(
+        self,
+        client: InferenceClient,
+        detection_interval: int = 10,
+        detection_width: int = 320,
+    ):
+        """Initialize new FaceAnalyzer.
+
+        Parameters
+        ----------
+        client : hub.inference_service.InferenceClient
+            Client used for detection and landmark prediction.
+        detection_interval : int, default 10
+            Number of frames between two detections.  Faces are tracked in between.
+        detection_width : int, default 320
+            Width in pixels the frame is downscaled to for detection and tracking.
+        """
+        self.detection_interval = max(detection_interval, 1)
+        self.detection_width = detection_width
+        self._client = client
+        self._trackers = []
+        self._frames_since_detection = 0
+        self._lost = False
+        self._last_frame = None
+
+    def analyse(
+        self, gray: numpy.ndarray, frame: int, landmarks: bool = False
+    ) -> tuple[Face, ...]:
+        """Find the faces in a frame.
+
+        Parameters
+        ----------
+        gray : numpy.ndarray
+            Luma of the frame, see hub.frame_formats.  Not modified.
+        frame : int
+            Number of the frame in the track.  Used to detect gaps, where the faces
+            can not be tracked.
+        landmarks : bool, default False
+            Whether to predict the landmarks of the faces.
+
+        Returns
+        -------
+        tuple of Face
+            Faces in the frame, in full resolution coordinates.
+        """
+        height, width = gray.shape
+        scale = min(self.detection_width / width, 1)
+        if scale < 1:
+            small = cv2.resize(
+                gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+            )
+        else:
+            small = numpy.ascontiguousarray(gray)
+
+        contiguous = self._last_frame is not None and frame == self._last_frame + 1
+        self._last_frame = frame
+        if (
+            not contiguous
+            or self._lost
+            or self._frames_since_detection + 1 >= self.detection_interval
+        ):
+            boxes = self._detect(small)
+            detected = True
+        else:
+            boxes = self._track(small)
+            detected = False
+
+        faces = []
+        for left, top, right, bottom in boxes:
+            x = max(round(left / scale), 0)
+            y = max(round(top / scale), 0)
+            w = min(round(right / scale), width) - x
+            h = min(round(bottom / scale), height) - y
+            if w <= 0 or h <= 0:
+                continue
+            points = self._landmarks(gray, x, y, w, h) if landmarks else None
+            faces.append(Face(x, y, w, h, points, detected))
+        return tuple(faces)
+
+    def _detect(self, small: numpy.ndarray) -> list[tuple[float, float, float, float]]:
+        """Detect faces on `small` and start tracking them."""
+        self._frames_since_detection = 0
+        self._lost = False
+        self._trackers = []
+        boxes = []
+        for left, top, right, bottom in self._client.infer("face_detection", small):
+            tracker = dlib.correlation_tracker()
+            tracker.start_track(small, dlib.rectangle(left, top, right, bottom))
+            self._trackers.append(tracker)
+            boxes.append((left, top, right, bottom))
+        return boxes
+
+    def _track(self, small: numpy.ndarray) -> list[tuple[float, float, float, float]]:
+        """Update the trackers with `small`.  Trackers losing their face are removed."""
+        self._frames_since_detection += 1
+        trackers = []
+        boxes = []
+        for tracker in self._trackers:
+            if tracker.update(small) < MIN_TRACKING_CONFIDENCE:
+                self._lost = True
+                continue
+            position = tracker.get_position()
+            trackers.append(tracker)
+            boxes.append(
+                (position.left(), position.top(), position.right(), position.bottom())
+            )
+        self._trackers = trackers
+        return boxes
+
+    def _landmarks(
+        self, gray: numpy.ndarray, x: int, y: int, w: int, h: int
+    ) -> numpy.ndarray:
+        """Predict the 68 landmarks of the face box on the full resolution `gray`."""
+        # Copy only the face region, `gray` may be a strided view of the frame.
+        height, width = gray.shape
+        margin_x, margin_y = round(w * _LANDMARK_MARGIN), round(h * _LANDMARK_MARGIN)
+        x0, y0 = max(x - margin_x, 0), max(y - margin_y, 0)
+        x1, y1 = min(x + w + margin_x, width), min(y + h + margin_y, height)
+        region = numpy.ascontiguousarray(gray[y0:y1, x0:x1])
+
+        box = [x - x0, y - y0, x - x0 + w, y - y0 + h]
+        points = self._client.infer("face_landmarks", region, box=box)
+        return numpy.array(points) + (x0, y0)
+
+    def close(self) -> None:
+        """Close the connection to the inference service."""
+        self._client.close()
@@ -0,0 +1,247 @@
+"""Provide `FeatureLog`, a buffered writer for per-frame features, e.g. OpenFace AUs.
+
+Filters append one row per frame.  Rows are buffered in memory and written in batches
+by a background thread, so the event loop never waits for the file system.
+
+Logs are NumPy `.npy` files with a one-dimensional array of a structured dtype, one
+field per column, and load with `numpy.load`.  The header reserves space for the
+largest possible row count and is rewritten after every batch, so a log is readable
+while it is written and after the process was killed.  `to_csv` converts a log to CSV
+offline:
+
+    python -m hub.feature_log sessions/<session_id>/<participant_id>_openface.npy
+"""
+
+from __future__ import annotations
+
+import os
+import csv
+import time
+import numpy
+import logging
+import argparse
+import threading
+from typing import Any
+
+from hub import BACKEND_DIR
+
+_MAGIC = b"\x93NUMPY\x01\x00"
+_MAX_ROWS = 2**63 - 1
+
+
+def feature_log_path(recording_path: str, participant_id: str, name: str) -> str:
+    """Get a new path for the feature log `name` of a participant.
+
+    Parameters
+    ----------
+    recording_path : str
+        Recording path of the participant, `./sessions/<session_id>/<participant_id>`,
+        see users.participant.Participant.get_recording_path.  Empty for connections
+        without session, their logs are saved in `./sessions/unassigned`.
+    participant_id : str
+        ID of the participant, used if `recording_path` is empty.
+    name : str
+        Name of the log, e.g. the source of the features.
+
+    Returns
+    -------
+    str
+        `<recording_path>_<name>_<date>_<start_time>.npy`, like the recordings of the
+        participant, see hub.record_handler.RecordHandler.
+    """
+    if recording_path == "":
+        recording_path = os.path.join(
+            BACKEND_DIR, "sessions", "unassigned", participant_id
+        )
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    return f"{recording_path}_{name}_{timestamp}.npy"
+
+
+class FeatureLog:
+    """Buffered writer for a feature log with fixed columns.
+
+    `append` and `flush` do not block.  Rows are written by a background thread when
+    `batch_size` rows are buffered, `flush_interval` seconds after the last write, and
+    on `close`.
+    """
+
+    path: str
+    dtype: numpy.dtype
+    batch_size: int
+    flush_interval: float
+    _rows: list[tuple]
+    _rows_written: int
+    _header_size: int
+    _file: Any
+    _lock: threading.Lock
+    _wake: threading.Event
+    _closed: bool
+    _thread: threading.Thread
+    _logger: logging.Logger
+
+    def __init__(
+        self,
+        path: str,
+        dtype: numpy.dtype,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+    ) -> None:
+        """Initialize new FeatureLog and create the file at `path`.
+
+        Parameters
+        ----------
+        path : str
+            Path of the `.npy` file.  Missing directories are created.
+        dtype : numpy.dtype
+            Structured dtype of a row, defines the columns of the log.
+        batch_size : int, default 256
+            Number of buffered rows that triggers a write.
+        flush_interval : float, default 1.0
+            Maximum time in seconds rows are buffered.
+        """
+        self.path = path
+        self.dtype = numpy.dtype(dtype)
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self._rows = []
+        self._rows_written = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._logger = logging.getLogger("FeatureLog")
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "wb")
+        self._header_size = len(self._header(_MAX_ROWS))
+        self._write_header()
+
+        self._thread = threading.Thread(
+            target=self._run, name=f"FeatureLog-{os.path.basename(path)}", daemon=True
+        )
+        self._thread.start()
+
+    def __del__(self):
+        self.close()
+
+    @property
+    def rows(self) -> int:
+        """Number of rows appended, including rows not written yet."""
+        with self._lock:
+            return self._rows_written + len(self._rows)
+
+    def append(self, row: tuple) -> None:
+        """Add a row with one value per column of `dtype`.  Non-blocking."""
+        with self._lock:
+            if self._closed:
+                return
+            self._rows.append(row)
+            full = len(self._rows) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Let the background thread write the buffered rows now.  Non-blocking."""
+        self._wake.set()
+
+    def close(self) -> None:
+        """Write the buffered rows and close the file.  Blocks until written.
+
+        Use `run_in_executor` in coroutines, to avoid blocking the event loop.
+        """
+        # Attributes are missing if `__init__` failed, e.g. the file can not be created.
+        if not hasattr(self, "_lock"):
+            return
+        with self._lock:
+            if self._closed or not hasattr(self, "_thread"):
+                return
+            self._closed = True
+        self._wake.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Write buffered rows until the log is closed.  Runs in the writer thread."""
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            with self._lock:
+                rows, self._rows = self._rows, []
+                closed = self._closed
+            if len(rows) > 0:
+                try:
+                    self._write(rows)
+                except (OSError, ValueError, TypeError) as e:
+                    self._logger.error(f"Failed to write {self.path}: {e}")
+            if closed:
+                self._file.close()
+                return
+
+    def _write(self, rows: list[tuple]) -> None:
+        """Append `rows` to the file and update the row count in the header."""
+        data = numpy.array(rows, dtype=self.dtype)
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(data.tobytes())
+        self._rows_written += len(rows)
+        self._write_header()
+        self._file.flush()
+
+    def _write_header(self) -> None:
+        header = self._header(self._rows_written)
+        self._file.seek(0)
+        self._file.write(header)
+
+    def _header(self, rows: int) -> bytes:
+        """Get the `.npy` version 1.0 header for `rows` rows.
+
+        The header of the first call is padded to `_MAX_ROWS` rows.  Later headers have
+        the same size, so rows never move.
+        """
+        header = repr(
+            {
+                "descr": numpy.lib.format.dtype_to_descr(self.dtype),
+                "fortran_order": False,
+                "shape": (rows,),
+            }
+        ).encode("latin1")
+        size = getattr(self, "_header_size", None)
+        if size is None:
+            # Magic, header length and newline, aligned to 64 bytes.
+            size = -(-(len(_MAGIC) + 2 + len(header) + 1) // 64) * 64
+        header = header.ljust(size - len(_MAGIC) - 3) + b"\n"
+        return _MAGIC + len(header).to_bytes(2, "little") + header
+
+
+def load(path: str) -> numpy.ndarray:
+    """Load the feature log at `path`.  Same as `numpy.load`."""
+    return numpy.load(path)
+
+
+def to_csv(path: str, csv_path: str | None = None) -> str:
+    """Convert the feature log at `path` to CSV, one column per field.
+
+    Parameters
+    ----------
+    path : str
+        Path of the feature log.
+    csv_path : str, optional
+        Path of the CSV file.  Defaults to `path` with extension `.csv`.
+
+    Returns
+    -------
+    str
+        Path of the CSV file.
+    """
+    if csv_path is None:
+        csv_path = os.path.splitext(path)[0] + ".csv"
+    data = load(path)
+    with open(csv_path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(data.dtype.names)
+        writer.writerows(data.tolist())
+    return csv_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert feature logs to CSV.")
+    parser.add_argument("logs", nargs="+", help="Feature log files (.npy).")
+    for log in parser.parse_args().logs:
+        print(to_csv(log))
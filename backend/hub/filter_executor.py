@@ -0,0 +1,162 @@
+"""Provide `FilterExecutor` for running filters outside of the TrackHandler loop."""
+
+from __future__ import annotations
+
+import os
+import numpy
+import asyncio
+import logging
+import threading
+from typing import Literal
+from weakref import WeakKeyDictionary, WeakSet
+from av import VideoFrame, AudioFrame
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from filters.filter import Filter
+
+ExecutionPolicy = Literal["inline", "thread", "process"]
+
+EXECUTION_POLICIES: tuple[ExecutionPolicy, ...] = ("inline", "thread", "process")
+"""Available values for the `execution` config of filters."""
+
+_DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+class FilterExecutor:
+    """Executes `Filter.process` according to the execution policy of the filter.
+
+    The policy is selected in the `execution` config of a filter, see
+    `filters.filter.Filter.execution`:
+    - `inline` : `process` is awaited on the event loop of the TrackHandler.
+    - `thread` : `process` is awaited on an event loop running in a worker thread.
+      Each filter is bound to a single worker thread, keeping the filter state
+      confined to one thread.  Use for filters spending most of their time in
+      libraries releasing the GIL, e.g. cv2, dlib or blocking zmq sockets.  `process`
+      must not use asyncio objects bound to the TrackHandler loop, e.g. the FilterAPI.
+    - `process` : `Filter.kernel` is executed in a worker process instead of
+      `process`.  Only available for filters providing a kernel, other filters fall
+      back to `thread`.
+
+    The number of worker threads and processes is bounded.  Filters of all
+    TrackHandlers in a (sub)process share the same workers, see `instance`.  Frames
+    are kept in order, because the TrackHandler awaits each filter before passing the
+    next frame.
+    """
+
+    _instance: FilterExecutor | None = None
+
+    _logger: logging.Logger
+    _max_threads: int
+    _max_processes: int
+    _threads: list[ThreadPoolExecutor]
+    _thread_assignments: WeakKeyDictionary[Filter, ThreadPoolExecutor]
+    _processes: ProcessPoolExecutor | None
+    _warned: WeakSet[Filter]
+    _local: threading.local
+
+    def __init__(
+        self,
+        max_threads: int = _DEFAULT_WORKERS,
+        max_processes: int = _DEFAULT_WORKERS,
+    ) -> None:
+        """Initialize new FilterExecutor.  Workers are started when required.
+
+        Parameters
+        ----------
+        max_threads : int, optional
+            Maximum number of worker threads.  Default: number of CPUs, at most 4.
+        max_processes : int, optional
+            Maximum number of worker processes.  Default: number of CPUs, at most 4.
+        """
+        self._logger = logging.getLogger("FilterExecutor")
+        self._max_threads = max_threads
+        self._max_processes = max_processes
+        self._threads = []
+        self._thread_assignments = WeakKeyDictionary()
+        self._processes = None
+        self._warned = WeakSet()
+        self._local = threading.local()
+
+    @classmethod
+    def instance(cls) -> FilterExecutor:
+        """Get the FilterExecutor shared by all TrackHandlers in this process."""
+        if cls._instance is None:
+            cls._instance = FilterExecutor()
+        return cls._instance
+
+    def policy(self, filter: Filter) -> ExecutionPolicy:
+        """Get the execution policy used for `filter`.
+
+        Falls back to `inline` for unknown policies and to `thread` if `process` is
+        selected for a filter without kernel.
+        """
+        policy = filter.execution
+        if policy not in EXECUTION_POLICIES:
+            self._warn_once(filter, f'Unknown execution "{policy}", using "inline".')
+            return "inline"
+        if policy == "process" and filter.kernel is None:
+            self._warn_once(
+                filter, 'No kernel for execution "process", using "thread".'
+            )
+            return "thread"
+        return policy  # type: ignore
+
+    async def process(
+        self, filter: Filter, original: VideoFrame | AudioFrame, ndarray: numpy.ndarray
+    ) -> numpy.ndarray:
+        """Execute `filter` on `ndarray` according to the execution policy of `filter`.
+
+        See filters.filter.Filter.process for parameters and return value.
+        """
+        match self.policy(filter):
+            case "inline":
+                return await filter.process(original, ndarray)
+            case "thread":
+                worker = self._thread_for(filter)
+                coroutine = filter.process(original, ndarray)
+                return await asyncio.get_running_loop().run_in_executor(
+                    worker, self._run_coroutine, coroutine
+                )
+            case "process":
+                if self._processes is None:
+                    self._processes = ProcessPoolExecutor(self._max_processes)
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._processes, filter.kernel, ndarray, filter.config["config"]
+                )
+
+    def shutdown(self) -> None:
+        """Stop all workers.  Running filters are completed first."""
+        for worker in self._threads:
+            worker.shutdown()
+        self._threads = []
+        self._thread_assignments = WeakKeyDictionary()
+        if self._processes is not None:
+            self._processes.shutdown()
+            self._processes = None
+
+    def _thread_for(self, filter: Filter) -> ThreadPoolExecutor:
+        """Get the worker thread `filter` is bound to.  Assigns one if necessary."""
+        if filter not in self._thread_assignments:
+            if len(self._threads) < self._max_threads:
+                self._threads.append(
+                    ThreadPoolExecutor(1, thread_name_prefix="FilterExecutor")
+                )
+                worker = self._threads[-1]
+            else:
+                # Bind to the worker with the fewest filters.
+                assigned = list(self._thread_assignments.values())
+                worker = min(self._threads, key=assigned.count)
+            self._thread_assignments[filter] = worker
+        return self._thread_assignments[filter]
+
+    def _run_coroutine(self, coroutine):
+        """Run `coroutine` on the event loop of the current worker thread."""
+        if not hasattr(self._local, "loop"):
+            self._local.loop = asyncio.new_event_loop()
+        return self._local.loop.run_until_complete(coroutine)
+
+    def _warn_once(self, filter: Filter, message: str) -> None:
+        """Log `message` as warning, if no warning was logged for `filter` before."""
+        if filter not in self._warned:
+            self._warned.add(filter)
+            self._logger.warning(f"{filter}: {message}")
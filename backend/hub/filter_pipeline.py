@@ -0,0 +1,184 @@
+"""Provide `FilterPipeline`, the immutable pipeline snapshot used by TrackHandler."""
+
+from __future__ import annotations
+
+from typing import Literal
+from dataclasses import dataclass
+
+from filters import Filter
+from group_filters import GroupFilter
+from hub import frame_formats
+
+
+@dataclass(frozen=True, slots=True)
+class FilterBranch:
+    """Branch of the filter graph executed concurrently to the output branch.
+
+    Filters in a branch are executed in order on the incoming frame, scaled by
+    `scale`.  Results of the branch are not sent.  See filters.filter_dict.FilterDict.
+
+    Attributes
+    ----------
+    name : str
+        Name of the branch, see `Filter.branch`.
+    filters : tuple of filters.Filter
+        Filters, in execution order.
+    filter_formats : tuple of str
+        Frame format for each filter in `filters`.
+    scale : float
+        Scale of the frames of the branch.
+    """
+
+    name: str
+    filters: tuple[Filter, ...]
+    filter_formats: tuple[str, ...]
+    scale: float = 1
+
+
+@dataclass(frozen=True, slots=True)
+class FilterPipeline:
+    """Immutable snapshot of the group filters and filters of a TrackHandler.
+
+    The frame path of the TrackHandler reads the current snapshot once per frame,
+    without locking.  Reconfiguration creates a new snapshot and replaces the old one
+    in a single assignment, so a frame is always processed by a consistent pipeline.
+
+    Attributes
+    ----------
+    filters : tuple of filters.Filter
+        Filters of the output branch, in execution order.
+    filter_formats : tuple of str
+        Frame format for each filter in `filters`, see hub.frame_formats.
+    branches : tuple of FilterBranch
+        Other branches of the filter graph, executed concurrently to `filters`.
+    group_filters : tuple of group_filters.GroupFilter
+        Group filters, in execution order.
+    group_filter_formats : tuple of str
+        Frame format for each group filter in `group_filters`.
+    native_format : str
+        Format of the incoming frames the formats were planned for.
+    execute_filters : bool
+        Whether the filters should be executed.  False if there are no filters or the
+        TrackHandler is muted and no filter should run if muted.
+    face_filters : tuple of filters.Filter
+        Filters of all branches reading faces, see filters.filter.Filter.face_analysis.
+        Filters may stop reading faces at runtime, so `face_analysis` is checked again
+        on every frame.
+        Empty for audio.
+    """
+
+    filters: tuple[Filter, ...] = ()
+    filter_formats: tuple[str, ...] = ()
+    branches: tuple[FilterBranch, ...] = ()
+    group_filters: tuple[GroupFilter, ...] = ()
+    group_filter_formats: tuple[str, ...] = ()
+    native_format: str = ""
+    execute_filters: bool = False
+    face_filters: tuple[Filter, ...] = ()
+
+    @property
+    def all_filters(self) -> tuple[Filter, ...]:
+        """Filters of all branches."""
+        return self.filters + tuple(f for b in self.branches for f in b.filters)
+
+    def frame_format(self, filter: Filter | GroupFilter) -> str | None:
+        """Get the format of the frames passed to `filter` by this pipeline.
+
+        Returns None if `filter` is not part of this pipeline.
+        """
+        stages = (
+            (self.filters, self.filter_formats),
+            *((b.filters, b.filter_formats) for b in self.branches),
+            (self.group_filters, self.group_filter_formats),
+        )
+        for filters, formats in stages:
+            for f, frame_format in zip(filters, formats):
+                if f is filter:
+                    return frame_format
+        return None
+
+    @staticmethod
+    def build(
+        kind: Literal["audio", "video"],
+        filters: tuple[Filter, ...],
+        group_filters: tuple[GroupFilter, ...],
+        native_format: str,
+        execute_filters: bool,
+    ) -> FilterPipeline:
+        """Create a new pipeline and select the frame format for each stage.
+
+        Filters are split into the branches of the filter graph, see
+        filters.filter_dict.FilterDict.  Each branch uses the cheapest combination of
+        accepted formats, see hub.frame_formats.plan_formats.  Group filters reuse a
+        format decoded for the first filter of a branch, if they accept it.  The filters
+        and group filters are not modified, see `frame_format`.
+
+        Parameters
+        ----------
+        kind : str, "audio" or "video"
+            Kind of the TrackHandler.
+        filters : tuple of filters.Filter
+            Filters of all branches, in execution order.
+        group_filters : tuple of group_filters.GroupFilter
+            Group filters, in execution order.
+        native_format : str
+            Format of the frames received from the source track.
+        execute_filters : bool
+            Whether the filters should be executed.
+        """
+        branches: dict[str, list[Filter]] = {"": []}
+        for f in filters:
+            branches.setdefault(f.branch, []).append(f)
+
+        formats = {
+            name: FilterPipeline._plan(kind, branch, native_format)
+            for name, branch in branches.items()
+        }
+        decoded = [
+            branch_formats[0]
+            for name, branch_formats in formats.items()
+            if len(branch_formats) > 0 and (name == "" or branches[name][0].scale == 1)
+        ]
+        group_formats = [
+            frame_formats.select_format(
+                native_format,
+                frame_formats.accepted_for(kind, gf.accepted_formats),
+                decoded,
+            )
+            for gf in group_filters
+        ]
+
+        face_filters = tuple(
+            f for f in filters if kind == "video" and f.face_analysis != ""
+        )
+
+        return FilterPipeline(
+            tuple(branches[""]),
+            tuple(formats[""]),
+            tuple(
+                FilterBranch(
+                    name,
+                    tuple(branch),
+                    tuple(formats[name]),
+                    branch[0].scale if kind == "video" else 1,
+                )
+                for name, branch in branches.items()
+                if name != ""
+            ),
+            group_filters,
+            tuple(group_formats),
+            native_format,
+            execute_filters,
+            face_filters,
+        )
+
+    @staticmethod
+    def _plan(
+        kind: Literal["audio", "video"], filters: list[Filter], native_format: str
+    ) -> list[str]:
+        """Select the frame formats for the filters of a branch."""
+        accepted = [
+            frame_formats.accepted_for(kind, f.accepted_formats) for f in filters
+        ]
+        analysis_only = [f.analysis_only for f in filters]
+        return frame_formats.plan_formats(native_format, accepted, analysis_only)
@@ -0,0 +1,324 @@
+"""Provide `FrameBuffer` for sharing decoded frame data inside a TrackHandler."""
+
+from __future__ import annotations
+
+import sys
+import numpy
+from av import VideoFrame, AudioFrame
+
+from hub import frame_formats
+from hub.frame_formats import FrameFormat
+from hub.frame_tracer import FrameTrace, NoTrace, NO_TRACE
+
+_CURRENT = "current"
+"""Key for the current, modified frame in `FrameBuffer._view_base_refs`."""
+
+PYRAMID_LEVELS = 3
+"""Number of pyramid levels of video frames: full, 1/2 and 1/4 resolution."""
+
+
+class FrameBuffer:
+    """Frame data of a single audio or video frame, shared by all pipeline stages.
+
+    The incoming av frame is converted to a numpy.ndarray at most once per format, no
+    matter how many stages (group filters, filters) need it.  See hub.frame_formats
+    for the available formats.
+
+    Once a stage modifies the frame (see `writable`), the modified array is the
+    current frame.  Later stages receive the current frame, converted to the format
+    they require.  `to_frame` creates the outgoing frame.
+
+    Copy-on-write rules:
+    - `readonly()` returns a read-only view of the current frame.  Used for stages
+      that only analyse the frame, e.g. group filters or analysis-only filters.
+    - `writable()` returns an array that may be modified in place and becomes the
+      current frame.  If no read-only view (or any array derived from one) is still
+      referenced, the array is modified in place, without a copy.  Otherwise it is
+      copied once, so read-only views never observe modifications done by a later
+      stage.  Arrays that are views of the av frame data (e.g. the Y plane for `gray`)
+      and read-only arrays passed to `update` are always copied.
+
+    Whether a view is still referenced is determined by the reference count of the
+    array all views are based on.  Views that are only used during a stage are
+    therefore free, only views kept by a stage (e.g. stored in a group filter) cause a
+    copy.
+
+    Analysis stages may request lower resolutions of video frames, see `pyramid`.
+
+    Parallel branches of the filter graph use their own FrameBuffer, see `branch`.
+    Decoded arrays shared between branches are never modified in place.
+
+    Attributes
+    ----------
+    frame : av.VideoFrame or av.AudioFrame
+        Original, unmodified frame.
+    bytes_copied : int
+        Number of bytes allocated for conversions and copies of this frame.  Used to
+        measure the cost of the pipeline, see `benchmarks/frame_buffer_benchmark.py`.
+    trace : hub.frame_tracer.FrameTrace or hub.frame_tracer.NoTrace
+        Trace for spans of this frame, including conversions done by the FrameBuffer.
+    """
+
+    frame: VideoFrame | AudioFrame
+    bytes_copied: int
+    trace: FrameTrace | NoTrace
+    _channels: int
+    _decoded: dict[str, numpy.ndarray]
+    _borrowed: set[str]
+    _view_base_refs: dict[str, int]
+    _current: tuple[FrameFormat, numpy.ndarray] | None
+    _pyramid: dict[tuple[str, int], numpy.ndarray]
+    _shared: bool
+    _parent: FrameBuffer | None
+    _scale: float
+
+    def __init__(
+        self, frame: VideoFrame | AudioFrame, trace: FrameTrace | NoTrace = NO_TRACE
+    ) -> None:
+        """Initialize new FrameBuffer for `frame`.
+
+        Parameters
+        ----------
+        frame : av.VideoFrame or av.AudioFrame
+            Frame received from the source track.  Not decoded until required.
+        trace : hub.frame_tracer.FrameTrace, optional
+            Trace recording spans for conversions of this frame.
+        """
+        self.frame = frame
+        self.bytes_copied = 0
+        self.trace = trace
+        self._channels = (
+            len(frame.layout.channels) if isinstance(frame, AudioFrame) else 1
+        )
+        self._decoded = {}
+        self._borrowed = set()
+        self._view_base_refs = {}
+        self._current = None
+        self._pyramid = {}
+        self._shared = False
+        self._parent = None
+        self._scale = 1
+
+    @property
+    def native_format(self) -> str:
+        """Format of the original frame."""
+        return self.frame.format.name
+
+    @property
+    def modified(self) -> bool:
+        """Whether a stage requested a writable array of the frame."""
+        return self._current is not None
+
+    def branch(self, scale: float = 1) -> FrameBuffer:
+        """Create a FrameBuffer for a parallel branch of the filter graph.
+
+        The branch starts with the original frame, resized by `scale` for video, and
+        is independent of modifications of this FrameBuffer.  Unscaled branches share
+        the decoded arrays.  Must be called before a stage requests a writable array.
+
+        Raises
+        ------
+        ValueError
+            If the frame was already modified.
+        """
+        if self._current is not None:
+            raise ValueError("Can not branch a modified frame.")
+
+        branch = FrameBuffer(self.frame, self.trace)
+        branch._parent = self
+        if scale == 1 or isinstance(self.frame, AudioFrame):
+            branch._decoded = self._decoded
+            branch._borrowed = self._borrowed
+            branch._shared = True
+        else:
+            branch._scale = scale
+        self._shared = True
+        return branch
+
+    def readonly(self, format: FrameFormat, level: int = 0) -> numpy.ndarray:
+        """Get a read-only view of the current frame in `format`.
+
+        The view is guaranteed to never change, even if a later stage modifies the
+        array returned by `writable`.
+
+        Video frames are available at lower resolutions, see `pyramid`.  `level` 0 is
+        the full resolution.
+        """
+        if level > 0 and isinstance(self.frame, VideoFrame):
+            return self.pyramid(format, level)
+
+        if self._current is None:
+            key = format
+            self._decode(format)
+        else:
+            key = _CURRENT
+
+        # Reference count before the first view is created, see `_has_views`.
+        if key not in self._view_base_refs:
+            self._view_base_refs[key] = self._view_base_refcount(key)
+
+        if key == _CURRENT:
+            current_format, ndarray = self._current  # type: ignore
+            view = self._convert(ndarray, current_format, format).view()
+        else:
+            view = self._decoded[format].view()
+        view.flags.writeable = False
+        return view
+
+    def pyramid(self, format: FrameFormat, level: int) -> numpy.ndarray:
+        """Get a read-only array of the current video frame in `format` at `level`.
+
+        Level `n` has 1 / 2^n of the width and height of the frame, up to
+        `PYRAMID_LEVELS` - 1.  Levels are computed when requested first, each from the
+        level above, and cached until the frame is modified.  The frame is resized
+        before it is converted to `format`, so conversions run at the lower resolution.
+        """
+        level = min(level, PYRAMID_LEVELS - 1)
+        if level <= 0:
+            return self.readonly(format)
+
+        if (format, level) not in self._pyramid:
+            source = self._pyramid_source(format)
+            if (source, level) not in self._pyramid:
+                above = (
+                    self.readonly(source)
+                    if level == 1
+                    else self.pyramid(source, level - 1)
+                )
+                with self.trace.span(f"pyramid:{source}:{level}"):
+                    resized = frame_formats.resize(above, source, 0.5)
+                self.bytes_copied += resized.nbytes
+                self._pyramid[(source, level)] = resized
+            self._pyramid[(format, level)] = self._convert(
+                self._pyramid[(source, level)], source, format
+            )
+
+        view = self._pyramid[(format, level)].view()
+        view.flags.writeable = False
+        return view
+
+    def writable(self, format: FrameFormat) -> numpy.ndarray:
+        """Get the current frame in `format` as array that may be modified in place.
+
+        The returned array becomes the current frame.  If the stage returns a
+        different array, pass it to `update`.
+        """
+        if self._current is None:
+            self._decode(format)
+            if format in self._borrowed or self._shared or self._has_views(format):
+                self._set_current(format, self._copy(self._decoded[format]))
+            else:
+                self._set_current(format, self._decoded[format])
+        else:
+            # Read-only current frames are owned by a stage, e.g. stored in a buffer.
+            if self._has_views(_CURRENT) or not self._current[1].flags.writeable:
+                self._set_current(self._current[0], self._copy(self._current[1]))
+            current_format, ndarray = self._current
+            if current_format != format:
+                self._set_current(
+                    format, self._convert(ndarray, current_format, format)
+                )
+        return self._current[1]  # type: ignore
+
+    def update(self, ndarray: numpy.ndarray) -> None:
+        """Replace the current frame with `ndarray`.
+
+        `ndarray` must have the format of the last `writable` call.
+        """
+        if self._current is None:
+            raise ValueError("Frame must be requested using writable before updating.")
+        self._set_current(self._current[0], ndarray)
+
+    def to_frame(self) -> VideoFrame | AudioFrame:
+        """Get the current frame as av frame.  The original frame if not modified."""
+        if self._current is None:
+            return self.frame
+        with self.trace.span("wrap"):
+            return frame_formats.wrap(self._current[1], self._current[0], self.frame)
+
+    def _set_current(self, format: FrameFormat, ndarray: numpy.ndarray) -> None:
+        """Set the current frame and reset view tracking and the pyramid for it."""
+        self._current = (format, ndarray)
+        self._view_base_refs.pop(_CURRENT, None)
+        self._pyramid = {}
+
+    def _pyramid_source(self, format: FrameFormat) -> FrameFormat:
+        """Get the format the frame is resized in for pyramid levels in `format`.
+
+        The format the frame is available in, unless `format` can be decoded without
+        conversion, e.g. `gray` from `yuv420p`.
+        """
+        if self._current is not None:
+            return self._current[0]
+        if (
+            format in self._decoded
+            or frame_formats.decode_cost(self.native_format, format) == 0
+        ):
+            return format
+        return self.native_format  # type: ignore
+
+    def _has_views(self, key: str) -> bool:
+        """Check if any view of the decoded array or current frame is referenced.
+
+        `key` is a format for decoded arrays or `_CURRENT` for the current frame.
+        """
+        if key not in self._view_base_refs:
+            return False
+        return self._view_base_refcount(key) > self._view_base_refs[key]
+
+    def _view_base_refcount(self, key: str) -> int:
+        """Get the reference count of the array all views for `key` are based on.
+
+        numpy bases all views on the first array in the `base` chain that is not itself
+        a view of another array.  Its reference count increases for every view.  Must
+        be called without holding references to the array in the calling function, so
+        counts taken at different times are comparable.
+        """
+        if key == _CURRENT:
+            view_base = self._current[1]  # type: ignore
+        else:
+            view_base = self._decoded[key]
+        while isinstance(view_base.base, numpy.ndarray):
+            view_base = view_base.base
+        return sys.getrefcount(view_base)
+
+    def _decode(self, format: FrameFormat) -> None:
+        """Convert `frame` to a numpy.ndarray in `format`, if not already done.
+
+        Scaled branches resize the array decoded by the parent FrameBuffer.
+        """
+        if format not in self._decoded and self._scale != 1:
+            self._parent._decode(format)  # type: ignore
+            with self.trace.span(f"resize:{format}"):
+                self._decoded[format] = frame_formats.resize(
+                    self._parent._decoded[format], format, self._scale  # type: ignore
+                )
+            self.bytes_copied += self._decoded[format].nbytes
+        elif format not in self._decoded:
+            with self.trace.span(f"decode:{format}"):
+                self._decoded[format], borrowed = frame_formats.decode(
+                    self.frame, format
+                )
+            if borrowed:
+                self._borrowed.add(format)
+            else:
+                self.bytes_copied += self._decoded[format].nbytes
+
+    def _convert(
+        self, ndarray: numpy.ndarray, source: FrameFormat, target: FrameFormat
+    ) -> numpy.ndarray:
+        """Convert `ndarray` from `source` to `target` format."""
+        if source == target:
+            return ndarray
+        with self.trace.span(f"convert:{source}:{target}"):
+            converted = frame_formats.convert(ndarray, source, target, self._channels)
+        if converted is not ndarray and converted.base is None:
+            self.bytes_copied += converted.nbytes
+        return converted
+
+    def _copy(self, ndarray: numpy.ndarray) -> numpy.ndarray:
+        """Copy `ndarray`."""
+        with self.trace.span("copy"):
+            copy = ndarray.copy()
+        self.bytes_copied += copy.nbytes
+        return copy
@@ -0,0 +1,309 @@
+"""Provide frame formats and the conversions between them used by the TrackHandler.
+
+Filters and group filters declare which formats they accept in `accepted_formats`.
+The TrackHandler uses `plan_formats` and `select_format` to find the cheapest
+sequence of conversions for the active pipeline.
+
+Video formats:
+- `gray` : uint8 ndarray with shape (height, width).  Luma / Y plane only.
+- `yuv420p` : uint8 ndarray with shape (height * 3 / 2, width).  Y plane followed by
+  the U and V planes (I420 layout).  Native format of decoded video.
+- `bgr24` : uint8 ndarray with shape (height, width, 3).
+
+Audio formats:
+- `s16` : int16 ndarray with shape (1, samples * channels).  Packed / interleaved
+  samples.  Native format of decoded audio.
+- `fltp` : float32 ndarray with shape (channels, samples), values between -1 and 1.
+  Planar samples.
+"""
+
+from __future__ import annotations
+
+import cv2
+import numpy
+from typing import Literal, Sequence
+from av import VideoFrame, AudioFrame
+
+FrameFormat = Literal["gray", "yuv420p", "bgr24", "s16", "fltp"]
+
+VIDEO_FORMATS: tuple[FrameFormat, ...] = ("gray", "yuv420p", "bgr24")
+"""Formats available for video frames."""
+
+AUDIO_FORMATS: tuple[FrameFormat, ...] = ("s16", "fltp")
+"""Formats available for audio frames."""
+
+DEFAULT_FORMATS: dict[str, FrameFormat] = {"video": "bgr24", "audio": "s16"}
+"""Format used if a filter does not accept any format of the track kind."""
+
+# Relative costs, roughly the number of passes over the frame data.
+_DECODE_COSTS: dict[tuple[str, str], int] = {
+    ("yuv420p", "gray"): 0,  # View of the Y plane
+    ("yuv420p", "yuv420p"): 1,
+    ("yuv420p", "bgr24"): 4,
+    ("s16", "s16"): 1,
+    ("s16", "fltp"): 2,
+    ("fltp", "fltp"): 1,
+    ("fltp", "s16"): 2,
+}
+_CONVERT_COSTS: dict[tuple[str, str], int] = {
+    ("yuv420p", "gray"): 0,  # View of the Y plane
+    ("gray", "yuv420p"): 1,
+    ("bgr24", "gray"): 2,
+    ("gray", "bgr24"): 2,
+    ("bgr24", "yuv420p"): 4,
+    ("yuv420p", "bgr24"): 4,
+    ("s16", "fltp"): 2,
+    ("fltp", "s16"): 2,
+}
+_WRAP_COSTS: dict[str, int] = {
+    "yuv420p": 1,
+    "gray": 2,
+    "bgr24": 4,
+    "s16": 1,
+    "fltp": 2,
+}
+_UNKNOWN_NATIVE_COST = 4
+
+
+def formats_for(kind: Literal["audio", "video"]) -> tuple[FrameFormat, ...]:
+    """Get the formats available for frames of `kind`."""
+    return VIDEO_FORMATS if kind == "video" else AUDIO_FORMATS
+
+
+def accepted_for(
+    kind: Literal["audio", "video"], accepted_formats: Sequence[str]
+) -> list[FrameFormat]:
+    """Get the formats in `accepted_formats` available for `kind`, keeping the order.
+
+    Falls back to the default format of `kind`, if no format is available.
+    """
+    available = formats_for(kind)
+    formats = [f for f in accepted_formats if f in available]
+    if len(formats) == 0:
+        return [DEFAULT_FORMATS[kind]]
+    return formats  # type: ignore
+
+
+def decode_cost(native: str, target: str) -> int:
+    """Cost of decoding a frame with format `native` to an ndarray with `target`."""
+    return _DECODE_COSTS.get((native, target), _UNKNOWN_NATIVE_COST)
+
+
+def convert_cost(source: str, target: str) -> int:
+    """Cost of converting an ndarray from `source` to `target` format."""
+    if source == target:
+        return 0
+    return _CONVERT_COSTS[(source, target)]
+
+
+def wrap_cost(source: str) -> int:
+    """Cost of wrapping an ndarray with format `source` into a frame for encoding."""
+    return _WRAP_COSTS[source]
+
+
+def plan_formats(
+    native: str,
+    accepted: list[list[FrameFormat]],
+    analysis_only: list[bool] | None = None,
+) -> list[FrameFormat]:
+    """Find the cheapest format for each stage of a sequential pipeline.
+
+    Each stage receives the output of the previous stage, in the format selected for
+    the stage.  Stages return the same format they receive.  The result of the last
+    stage is wrapped into a new frame.  Analysis-only stages do not modify the frame,
+    their format does not affect later stages.  If all stages are analysis-only, the
+    incoming frame is forwarded without wrapping.
+
+    Parameters
+    ----------
+    native : str
+        Format of the incoming frame.
+    accepted : list of list of str
+        Accepted formats for each stage, in order of preference.  Use `accepted_for`
+        to get valid formats.
+    analysis_only : list of bool, optional
+        Whether each stage is analysis-only.  Default: no stage is analysis-only.
+
+    Returns
+    -------
+    list of str
+        Selected format for each stage.  Empty if `accepted` is empty.
+    """
+    if analysis_only is None:
+        analysis_only = [False] * len(accepted)
+
+    # Cheapest (cost, formats) for each format the frame is in after a stage.  The
+    # empty string represents the unmodified, incoming frame.  The index of a format
+    # in the accepted list is added as preference.
+    best: dict[str, tuple[float, list[FrameFormat]]] = {"": (0, [])}
+    for stage, stage_analysis_only in zip(accepted, analysis_only):
+        next_best: dict[str, tuple[float, list[FrameFormat]]] = {}
+        for prev, (cost, formats) in best.items():
+            for i, f in enumerate(stage):
+                if prev == "":
+                    step_cost = decode_cost(native, f)
+                else:
+                    step_cost = convert_cost(prev, f)
+                state = prev if stage_analysis_only else f
+                candidate = (cost + step_cost + i * 0.01, formats + [f])
+                if state not in next_best or candidate < next_best[state]:
+                    next_best[state] = candidate
+        best = next_best
+
+    _, formats = min(
+        (cost + (wrap_cost(f) if f != "" else 0), formats)
+        for f, (cost, formats) in best.items()
+    )
+    return formats
+
+
+def select_format(
+    native: str, accepted: list[FrameFormat], decoded: Sequence[str] = ()
+) -> FrameFormat:
+    """Select the cheapest format for a stage that only reads the frame.
+
+    Parameters
+    ----------
+    native : str
+        Format of the incoming frame.
+    accepted : list of str
+        Accepted formats, in order of preference.
+    decoded : list of str, optional
+        Formats that are decoded anyway, e.g. because they are required by another
+        stage.  Reusing them is free.
+    """
+    return min(
+        accepted,
+        key=lambda f: (
+            0 if f in decoded else decode_cost(native, f),
+            accepted.index(f),
+        ),
+    )
+
+
+def decode(
+    frame: VideoFrame | AudioFrame, target: FrameFormat
+) -> tuple[numpy.ndarray, bool]:
+    """Decode `frame` to an ndarray with format `target`.
+
+    Returns
+    -------
+    tuple with numpy.ndarray, bool
+        Decoded frame and whether the ndarray is a view of the frame data (borrowed).
+        Borrowed ndarrays must not be modified.
+    """
+    native = frame.format.name
+    if isinstance(frame, AudioFrame):
+        ndarray = frame.to_ndarray()
+        return convert(ndarray, native, target, len(frame.layout.channels)), False
+
+    if native == "yuv420p" and target == "gray":
+        plane = frame.planes[0]
+        y = numpy.frombuffer(plane, numpy.uint8).reshape(-1, plane.line_size)
+        return y[: frame.height, : frame.width], True
+
+    return frame.to_ndarray(format=target), False
+
+
+def convert(
+    ndarray: numpy.ndarray, source: str, target: str, channels: int = 1
+) -> numpy.ndarray:
+    """Convert `ndarray` from `source` to `target` format.
+
+    May return a view of `ndarray`.  `channels` is only used for audio formats.
+    """
+    if source == target:
+        return ndarray
+
+    match (source, target):
+        case ("yuv420p", "gray"):
+            return ndarray[: ndarray.shape[0] * 2 // 3]
+        case ("gray", "yuv420p"):
+            height, width = ndarray.shape
+            yuv = numpy.full((height * 3 // 2, width), 128, numpy.uint8)
+            yuv[:height] = ndarray
+            return yuv
+        case ("bgr24", "gray"):
+            return cv2.cvtColor(ndarray, cv2.COLOR_BGR2GRAY)
+        case ("gray", "bgr24"):
+            return cv2.cvtColor(ndarray, cv2.COLOR_GRAY2BGR)
+        case ("bgr24", "yuv420p"):
+            return cv2.cvtColor(ndarray, cv2.COLOR_BGR2YUV_I420)
+        case ("yuv420p", "bgr24"):
+            return cv2.cvtColor(ndarray, cv2.COLOR_YUV2BGR_I420)
+        case ("s16", "fltp"):
+            planar = ndarray.reshape(-1, channels).T.astype(numpy.float32) / 32768
+            return numpy.ascontiguousarray(planar)
+        case ("fltp", "s16"):
+            ndarray = numpy.clip(ndarray * 32768, -32768, 32767).astype(numpy.int16)
+            return ndarray.T.reshape(1, -1)
+
+    raise ValueError(f'Unsupported conversion from "{source}" to "{target}".')
+
+
+def frame_size(ndarray: numpy.ndarray, format: FrameFormat) -> tuple[int, int]:
+    """Get width and height of the video frame `ndarray` in `format`."""
+    if format == "yuv420p":
+        return ndarray.shape[1], ndarray.shape[0] * 2 // 3
+    return ndarray.shape[1], ndarray.shape[0]
+
+
+def resize(ndarray: numpy.ndarray, format: FrameFormat, scale: float) -> numpy.ndarray:
+    """Resize the video frame `ndarray` in `format` by `scale`.
+
+    Width and height of the result are rounded to even numbers, as required by
+    `yuv420p`.  Always returns a new array.
+    """
+    width, height = frame_size(ndarray, format)
+    new_width = max(round(width * scale / 2) * 2, 2)
+    new_height = max(round(height * scale / 2) * 2, 2)
+    return resize_to(ndarray, format, new_width, new_height)
+
+
+def resize_to(
+    ndarray: numpy.ndarray, format: FrameFormat, width: int, height: int
+) -> numpy.ndarray:
+    """Resize the video frame `ndarray` in `format` to `width` x `height`.
+
+    Width and height must be even for `yuv420p`.  Always returns a new array.
+    """
+    source_width, source_height = frame_size(ndarray, format)
+    match format:
+        case "gray" | "bgr24":
+            return cv2.resize(ndarray, (width, height), interpolation=cv2.INTER_AREA)
+        case "yuv420p":
+            # Resize the Y, U and V planes separately.
+            resized = numpy.empty((height * 3 // 2, width), numpy.uint8)
+            resized[:height] = cv2.resize(
+                ndarray[:source_height],
+                (width, height),
+                interpolation=cv2.INTER_AREA,
+            )
+            chroma = numpy.ascontiguousarray(ndarray[source_height:]).reshape(
+                2, source_height // 2, source_width // 2
+            )
+            resized_chroma = resized[height:].reshape(2, height // 2, width // 2)
+            for plane, resized_plane in zip(chroma, resized_chroma):
+                resized_plane[:] = cv2.resize(
+                    plane, (width // 2, height // 2), interpolation=cv2.INTER_AREA
+                )
+            return resized
+
+    raise ValueError(f'Unsupported resize of "{format}".')
+
+
+def wrap(
+    ndarray: numpy.ndarray, source: FrameFormat, original: VideoFrame | AudioFrame
+) -> VideoFrame | AudioFrame:
+    """Create a new frame from `ndarray` with the metadata of `original`."""
+    ndarray = numpy.ascontiguousarray(ndarray)
+    if isinstance(original, AudioFrame):
+        new_frame = AudioFrame.from_ndarray(
+            ndarray, format=source, layout=original.layout.name
+        )
+        new_frame.sample_rate = original.sample_rate
+    else:
+        new_frame = VideoFrame.from_ndarray(ndarray, format=source)
+    new_frame.pts = original.pts
+    new_frame.time_base = original.time_base
+    return new_frame
@@ -0,0 +1,237 @@
+"""Provide `FrameScheduler` for deciding which filters are executed on a frame."""
+
+from __future__ import annotations
+
+import logging
+from time import perf_counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Literal
+from weakref import WeakKeyDictionary
+from av import VideoFrame, AudioFrame
+
+from filters.filter import Filter
+
+BUDGET_FRACTION = 0.8
+"""Fraction of the frame interval available for the group filter and filter pipeline.
+
+The remaining time is left for encoding and sending the frame.
+"""
+
+MAX_CONSECUTIVE_SKIPS = 30
+"""Number of consecutive frames a filter can be skipped due to the frame budget.
+
+Afterwards the filter is executed, even if the budget is exceeded.  Prevents
+starvation of expensive filters.
+"""
+
+_DEFAULT_FRAME_INTERVALS = {"audio": 0.02, "video": 1 / 30}
+_EMA_WEIGHT = 0.1
+_REPORT_INTERVAL = 10
+
+
+@dataclass(slots=True)
+class FilterSchedule:
+    """Scheduling state and statistics for a single filter.
+
+    Attributes
+    ----------
+    runs : int
+        Number of frames the filter was executed on.
+    skipped_rate : int
+        Number of frames skipped because of the configured run rate of the filter.
+    skipped_budget : int
+        Number of frames skipped because the frame budget was exceeded.
+    cost : float
+        Exponential moving average of the execution time in seconds.
+    last_run : float
+        `time.perf_counter` timestamp of the last execution.
+    frames_since_run : int
+        Number of frames since the last execution.
+    consecutive_skips : int
+        Number of consecutive frames skipped due to the frame budget.
+    reported_budget_skips : int
+        Value of `skipped_budget` in the last report.
+    """
+
+    runs: int = 0
+    skipped_rate: int = 0
+    skipped_budget: int = 0
+    cost: float = 0
+    last_run: float = 0
+    frames_since_run: int = 0
+    consecutive_skips: int = 0
+    reported_budget_skips: int = 0
+
+
+class FrameScheduler:
+    """Decides which filters are executed on a frame, based on a per-frame budget.
+
+    The frame budget is `BUDGET_FRACTION` of the frame interval of the track, which is
+    measured from the timestamps of incoming frames.  A filter is skipped if:
+    - it is not due according to its `run_every` or `rate` config, see
+      filters.filter.Filter.  Or
+    - it is `skippable` and executing it would exceed the budget of the current frame,
+      based on the average execution time of the filter.  Skippable filters are
+      executed at least every `MAX_CONSECUTIVE_SKIPS` frames.
+
+    Skipped filters are not executed (or `Filter.skip` is called), so under load the
+    analysis degrades instead of the outgoing track falling behind real time.  Skip
+    counts are available in `stats`, which experimenters request with `GET_TRACES`,
+    and logged periodically.
+    """
+
+    _logger: logging.Logger
+    _frame_interval: float
+    _frame_start: float
+    _last_frame_time: float | None
+    _last_report: float
+    _schedules: WeakKeyDictionary[Filter, FilterSchedule]
+
+    def __init__(self, kind: Literal["audio", "video"], logger: logging.Logger):
+        """Initialize new FrameScheduler.
+
+        Parameters
+        ----------
+        kind : str, "audio" or "video"
+            Kind of the track, used for the initial frame interval.
+        logger : logging.Logger
+            Logger used to report skipped filters.
+        """
+        self._logger = logger
+        self._frame_interval = _DEFAULT_FRAME_INTERVALS[kind]
+        self._frame_start = perf_counter()
+        self._last_frame_time = None
+        self._last_report = self._frame_start
+        self._schedules = WeakKeyDictionary()
+
+    @property
+    def budget(self) -> float:
+        """Time available for the pipeline of a single frame, in seconds."""
+        return self._frame_interval * BUDGET_FRACTION
+
+    def begin_frame(self, frame: VideoFrame | AudioFrame) -> None:
+        """Start the budget for `frame`.  Call when the frame is received."""
+        self._frame_start = perf_counter()
+
+        interval = None
+        if isinstance(frame, AudioFrame) and frame.sample_rate:
+            interval = frame.samples / frame.sample_rate
+        elif frame.time is not None:
+            if self._last_frame_time is not None:
+                interval = frame.time - self._last_frame_time
+            self._last_frame_time = frame.time
+        # Ignore jumps, e.g. after the source track was replaced.
+        if interval is not None and 0 < interval < 1:
+            self._frame_interval += _EMA_WEIGHT * (interval - self._frame_interval)
+
+        if self._frame_start - self._last_report > _REPORT_INTERVAL:
+            self._report()
+
+    def should_run(self, filter: Filter) -> bool:
+        """Check if `filter` should be executed on the current frame.
+
+        Call once per frame and filter.  Updates the skip counts if not.
+        """
+        schedule = self._schedule(filter)
+        schedule.frames_since_run += 1
+        now = perf_counter()
+
+        if self._rate_limited(filter, schedule, schedule.frames_since_run, now):
+            schedule.skipped_rate += 1
+            return False
+
+        if (
+            filter.skippable
+            and schedule.consecutive_skips < MAX_CONSECUTIVE_SKIPS
+            and now - self._frame_start + schedule.cost > self.budget
+        ):
+            schedule.skipped_budget += 1
+            schedule.consecutive_skips += 1
+            return False
+
+        return True
+
+    def is_due(self, filter: Filter) -> bool:
+        """Check if `filter` is due on the current frame according to its run rate.
+
+        Unlike `should_run`, the frame budget is not checked and no state is updated.
+        Used to prepare inputs shared by filters only for frames they run on.
+        """
+        schedule = self._schedule(filter)
+        return not self._rate_limited(
+            filter, schedule, schedule.frames_since_run + 1, perf_counter()
+        )
+
+    @contextmanager
+    def measure(self, filter: Filter) -> Iterator[None]:
+        """Measure the execution of `filter` on the current frame."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            schedule = self._schedule(filter)
+            elapsed = perf_counter() - start
+            if schedule.runs == 0:
+                schedule.cost = elapsed
+            else:
+                schedule.cost += _EMA_WEIGHT * (elapsed - schedule.cost)
+            schedule.runs += 1
+            schedule.last_run = start
+            schedule.frames_since_run = 0
+            schedule.consecutive_skips = 0
+
+    def stats(self) -> dict[str, dict]:
+        """Get scheduling statistics for all filters, by filter id."""
+        return {
+            filter.config["id"]: {
+                "name": filter.config["name"],
+                "runs": schedule.runs,
+                "skipped_rate": schedule.skipped_rate,
+                "skipped_budget": schedule.skipped_budget,
+                "cost_ms": schedule.cost * 1000,
+                "budget_ms": self.budget * 1000,
+            }
+            for filter, schedule in self._schedules.items()
+        }
+
+    def _schedule(self, filter: Filter) -> FilterSchedule:
+        """Get the FilterSchedule for `filter`."""
+        if filter not in self._schedules:
+            self._schedules[filter] = FilterSchedule()
+        return self._schedules[filter]
+
+    def _rate_limited(
+        self,
+        filter: Filter,
+        schedule: FilterSchedule,
+        frames_since_run: int,
+        now: float,
+    ) -> bool:
+        """Check if `filter` is not due because of its `run_every` or `rate` config."""
+        if schedule.runs == 0:
+            return False
+        min_interval = 1 / filter.rate if filter.rate > 0 else 0
+        return (
+            frames_since_run < filter.run_every
+            or now - schedule.last_run < min_interval - self._frame_interval / 2
+        )
+
+    def _report(self) -> None:
+        """Log filters skipped due to the frame budget since the last report."""
+        skipped = []
+        for filter, schedule in self._schedules.items():
+            count = schedule.skipped_budget - schedule.reported_budget_skips
+            if count > 0:
+                skipped.append(
+                    f"{filter.config['name']}: {count} "
+                    f"(avg. {schedule.cost * 1000:.1f} ms)"
+                )
+            schedule.reported_budget_skips = schedule.skipped_budget
+        if len(skipped) > 0:
+            self._logger.info(
+                f"Frame budget of {self.budget * 1000:.1f} ms exceeded, skipped "
+                f"filters in the last {self._frame_start - self._last_report:.0f} s: "
+                + ", ".join(skipped)
+            )
+        self._last_report = self._frame_start
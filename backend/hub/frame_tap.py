@@ -0,0 +1,252 @@
+"""Provide `FrameTap` and `FrameTapReader` for sharing decoded frames via shared memory.
+
+A FrameTap publishes decoded video frames into a POSIX shared memory ring buffer, so
+local processes, e.g. external analysis tools, can read the frames of a participant
+without encoding or sockets.  The writer never waits for readers: a reader that is too
+slow misses frames.
+
+Layout of the shared memory segment (little endian):
+- Ring header, `RING_HEADER_SIZE` bytes: magic `b"HTAP"` (4s), version (I), slot count
+  (I), slot capacity in bytes (I), sequence number of the latest frame (Q), closed
+  flag (I).
+- `slot count` slots, each with a `SLOT_HEADER_SIZE` bytes header followed by
+  `slot capacity` bytes of frame data.  Slot header: sequence number (Q), pts (q, -1
+  if unknown), width (I), height (I), data size in bytes (I), format (8s, see
+  hub.frame_formats).
+
+Sequence numbers start at 1.  Frame `seq` is written to slot `(seq - 1) % slot count`.
+The writer sets the sequence number of a slot to 0 before and to `seq` after writing
+the frame, so readers can detect frames that were overwritten while reading.
+"""
+
+from __future__ import annotations
+
+import struct
+import numpy
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import NamedTuple
+
+MAGIC = b"HTAP"
+VERSION = 1
+
+_RING_HEADER = struct.Struct("<4sIIIQI")
+_SLOT_HEADER = struct.Struct("<QqIII8s")
+
+RING_HEADER_SIZE = 64
+"""Size of the ring header in bytes."""
+
+SLOT_HEADER_SIZE = 64
+"""Size of the header of each slot in bytes."""
+
+_LATEST_OFFSET = 16
+_CLOSED_OFFSET = 24
+
+TAP_FORMATS = ("bgr24", "gray")
+"""Frame formats that can be published, see hub.frame_formats."""
+
+
+class TapFrame(NamedTuple):
+    """Frame read from a FrameTap.
+
+    Attributes
+    ----------
+    seq : int
+        Sequence number of the frame.
+    pts : int or None
+        Presentation timestamp of the frame.
+    format : str
+        Frame format, see hub.frame_formats.
+    ndarray : numpy.ndarray
+        Copy of the frame data.
+    """
+
+    seq: int
+    pts: int | None
+    format: str
+    ndarray: numpy.ndarray
+
+
+def tap_name(participant_id: str, width: int, height: int, format: str) -> str:
+    """Get the shared memory name for a participant, resolution and format.
+
+    `width` and `height` of 0 stand for the native resolution of the track.
+    """
+    resolution = f"{width}x{height}" if width > 0 and height > 0 else "native"
+    return f"hub-tap-{participant_id}-{resolution}-{format}"
+
+
+def _shape(format: str, width: int, height: int) -> tuple[int, ...]:
+    """Get the ndarray shape of a frame in `format`."""
+    return (height, width, 3) if format == "bgr24" else (height, width)
+
+
+class FrameTap:
+    """Writer for a shared memory ring buffer of decoded frames.
+
+    The segment is created for the size of the first published frame.  If a larger
+    frame is published, the segment is closed and recreated with the same name.
+    Readers notice this through `FrameTapReader.closed` and have to reattach.
+    """
+
+    name: str
+    slots: int
+    _shm: SharedMemory | None
+    _capacity: int
+    _seq: int
+
+    def __init__(self, name: str, slots: int = 4) -> None:
+        """Initialize new FrameTap.
+
+        Parameters
+        ----------
+        name : str
+            Name of the shared memory segment, see `tap_name`.
+        slots : int, default 4
+            Number of frames kept in the ring buffer.
+        """
+        self.name = name
+        self.slots = max(slots, 1)
+        self._shm = None
+        self._capacity = 0
+        self._seq = 0
+
+    def publish(self, ndarray: numpy.ndarray, format: str, pts: int | None) -> None:
+        """Publish a frame, overwriting the oldest frame in the ring buffer.
+
+        Parameters
+        ----------
+        ndarray : numpy.ndarray
+            Frame in `format`.
+        format : str
+            Frame format, one of `TAP_FORMATS`.
+        pts : int or None
+            Presentation timestamp of the frame.
+        """
+        height, width = ndarray.shape[:2]
+        if self._shm is None or ndarray.nbytes > self._capacity:
+            self._create(ndarray.nbytes)
+        assert self._shm is not None
+
+        self._seq += 1
+        buf = self._shm.buf
+        slot = RING_HEADER_SIZE + ((self._seq - 1) % self.slots) * (
+            SLOT_HEADER_SIZE + self._capacity
+        )
+        data = slot + SLOT_HEADER_SIZE
+
+        struct.pack_into("<Q", buf, slot, 0)
+        numpy.copyto(numpy.ndarray(ndarray.shape, numpy.uint8, buf, data), ndarray)
+        _SLOT_HEADER.pack_into(
+            buf,
+            slot,
+            self._seq,
+            -1 if pts is None else pts,
+            width,
+            height,
+            ndarray.nbytes,
+            format.encode(),
+        )
+        struct.pack_into("<Q", buf, _LATEST_OFFSET, self._seq)
+
+    def close(self) -> None:
+        """Mark the ring buffer as closed and remove the shared memory segment."""
+        if self._shm is None:
+            return
+        struct.pack_into("<I", self._shm.buf, _CLOSED_OFFSET, 1)
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def _create(self, capacity: int) -> None:
+        """(Re)create the shared memory segment for frames of `capacity` bytes."""
+        self.close()
+        size = RING_HEADER_SIZE + self.slots * (SLOT_HEADER_SIZE + capacity)
+        try:
+            self._shm = SharedMemory(self.name, create=True, size=size)
+        except FileExistsError:
+            # Left over from a previous connection of the participant.
+            stale = SharedMemory(self.name)
+            stale.close()
+            stale.unlink()
+            self._shm = SharedMemory(self.name, create=True, size=size)
+        self._capacity = capacity
+        _RING_HEADER.pack_into(
+            self._shm.buf, 0, MAGIC, VERSION, self.slots, capacity, self._seq, 0
+        )
+
+
+class FrameTapReader:
+    """Reader for a ring buffer created by a FrameTap, e.g. in an external process."""
+
+    _shm: SharedMemory
+    _slots: int
+    _capacity: int
+
+    def __init__(self, name: str) -> None:
+        """Attach to the FrameTap ring buffer `name`.
+
+        Raises
+        ------
+        FileNotFoundError
+            If no FrameTap with `name` exists.
+        ValueError
+            If the shared memory segment is not a FrameTap ring buffer.
+        """
+        self._shm = SharedMemory(name)
+        # The writer owns the segment, do not remove it when the reader exits.
+        resource_tracker.unregister(self._shm._name, "shared_memory")  # type: ignore
+        magic, version, self._slots, self._capacity, _, _ = _RING_HEADER.unpack_from(
+            self._shm.buf
+        )
+        if magic != MAGIC or version != VERSION:
+            self._shm.close()
+            raise ValueError(f"{name} is not a FrameTap ring buffer.")
+
+    @property
+    def latest_seq(self) -> int:
+        """Sequence number of the latest published frame, 0 if there is none."""
+        return struct.unpack_from("<Q", self._shm.buf, _LATEST_OFFSET)[0]
+
+    @property
+    def closed(self) -> bool:
+        """Whether the writer closed or recreated the ring buffer."""
+        return struct.unpack_from("<I", self._shm.buf, _CLOSED_OFFSET)[0] == 1
+
+    def read(self, seq: int | None = None) -> TapFrame | None:
+        """Read frame `seq`, or the latest frame if `seq` is None.
+
+        Returns None if the frame is not available, i.e. not yet published or already
+        overwritten.
+        """
+        if seq is None:
+            seq = self.latest_seq
+        if seq < 1 or seq > self.latest_seq:
+            return None
+
+        buf = self._shm.buf
+        slot = RING_HEADER_SIZE + ((seq - 1) % self._slots) * (
+            SLOT_HEADER_SIZE + self._capacity
+        )
+        slot_seq, pts, width, height, nbytes, format = _SLOT_HEADER.unpack_from(
+            buf, slot
+        )
+        if slot_seq != seq:
+            return None
+        data = slot + SLOT_HEADER_SIZE
+        ndarray = numpy.frombuffer(buf[data : data + nbytes], numpy.uint8).copy()
+        # Check if the frame was overwritten while copying.
+        if struct.unpack_from("<Q", buf, slot)[0] != seq:
+            return None
+
+        format = format.rstrip(b"\0").decode()
+        return TapFrame(
+            seq,
+            None if pts == -1 else pts,
+            format,
+            ndarray.reshape(_shape(format, width, height)),
+        )
+
+    def close(self) -> None:
+        """Detach from the ring buffer."""
+        self._shm.close()
@@ -0,0 +1,157 @@
+"""Provide `FrameTracer` for recording per-frame pipeline spans of a TrackHandler."""
+
+from __future__ import annotations
+
+from time import monotonic_ns
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Iterator, Literal
+
+
+class FrameTrace:
+    """Spans recorded for a single frame.
+
+    Timestamps are taken from `time.monotonic_ns`.
+
+    Attributes
+    ----------
+    frame : int
+        Number of the frame in the track, starting at 0.
+    start : int
+        Timestamp the trace was started, in nanoseconds.
+    pts : int or None
+        Presentation timestamp of the frame.
+    spans : list of tuple with str, int, int
+        Name, start and end timestamp of each span, in nanoseconds.
+    """
+
+    frame: int
+    start: int
+    pts: int | None
+    spans: list[tuple[str, int, int]]
+
+    def __init__(self, frame: int, pts: int | None, start: int) -> None:
+        """Initialize new FrameTrace for frame number `frame`.  See Attributes."""
+        self.frame = frame
+        self.pts = pts
+        self.start = start
+        self.spans = []
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Record a span with `name` covering the body of the `with` statement."""
+        start = monotonic_ns()
+        try:
+            yield
+        finally:
+            self.spans.append((name, start, monotonic_ns()))
+
+    def add_span(self, name: str, start: int, end: int) -> None:
+        """Record a span with `name` from `start` to `end`."""
+        self.spans.append((name, start, end))
+
+    def asdict(self) -> dict:
+        """Get the trace as dict.  Span times are relative to `start`, in µs."""
+        return {
+            "frame": self.frame,
+            "pts": self.pts,
+            "start_ns": self.start,
+            "spans": [
+                {
+                    "name": name,
+                    "start_us": (start - self.start) / 1000,
+                    "duration_us": (end - start) / 1000,
+                }
+                for name, start, end in self.spans
+            ],
+        }
+
+
+class NoTrace:
+    """Placeholder for frames that are not sampled.  Records nothing."""
+
+    _context = nullcontext()
+
+    def span(self, name: str) -> ContextManager[None]:
+        """Do nothing.  See FrameTrace.span."""
+        return self._context
+
+    def add_span(self, name: str, start: int, end: int) -> None:
+        """Do nothing.  See FrameTrace.add_span."""
+        return
+
+
+NO_TRACE = NoTrace()
+"""Shared NoTrace instance for frames that are not sampled."""
+
+
+class FrameTracer:
+    """Samples frames of a track and keeps their spans in a ring buffer.
+
+    Spans cover the pipeline from receiving the frame from the source track to
+    delivering it to the MediaRelay subscribers, see hub.track_handler.TrackHandler.
+    Only the newest `buffer_size` traces are kept.  Use `dump` to get them.
+    """
+
+    kind: Literal["audio", "video"]
+    _sample_interval: int
+    _frame_counter: int
+    _traces: deque[FrameTrace]
+
+    def __init__(
+        self,
+        kind: Literal["audio", "video"],
+        sample_rate: float = 0.0,
+        buffer_size: int = 1000,
+    ) -> None:
+        """Initialize new FrameTracer.
+
+        Parameters
+        ----------
+        kind : str, "audio" or "video"
+            Kind of the traced track.
+        sample_rate : float, default 0.0
+            Fraction of frames to trace, between 0 (disabled) and 1 (every frame).
+        buffer_size : int, default 1000
+            Number of traces kept in the ring buffer.
+        """
+        self.kind = kind
+        self._sample_interval = round(1 / sample_rate) if sample_rate > 0 else 0
+        self._frame_counter = 0
+        self._traces = deque(maxlen=buffer_size)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any frames are traced."""
+        return self._sample_interval > 0
+
+    def begin_frame(self, pts: int | None, start: int) -> FrameTrace | NoTrace:
+        """Start the trace for the next frame, if sampled.
+
+        Parameters
+        ----------
+        pts : int or None
+            Presentation timestamp of the frame.
+        start : int
+            `time.monotonic_ns` timestamp the TrackHandler started receiving the frame.
+
+        Returns
+        -------
+        FrameTrace or NoTrace
+            New trace if the frame is sampled, otherwise `NO_TRACE`.  Both can be used
+            to record spans.
+        """
+        frame = self._frame_counter
+        self._frame_counter += 1
+        if self._sample_interval == 0 or frame % self._sample_interval != 0:
+            return NO_TRACE
+        return FrameTrace(frame, pts, start)
+
+    def end_frame(self, trace: FrameTrace | NoTrace) -> None:
+        """Add a completed `trace` to the ring buffer."""
+        if isinstance(trace, FrameTrace):
+            self._traces.append(trace)
+
+    def dump(self) -> list[dict]:
+        """Get all traces in the ring buffer, oldest first.  See FrameTrace.asdict."""
+        return [trace.asdict() for trace in self._traces]
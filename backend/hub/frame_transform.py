@@ -0,0 +1,155 @@
+"""Provide `FrameTransform`, geometric and colour transforms fused into one pass.
+
+Filters that only move pixels (e.g. rotation, mirroring, scaling) or only map colour
+values describe their effect as FrameTransform, see filters.filter.Filter.transform.
+The TrackHandler composes the transforms of consecutive filters and applies them with
+a single `cv2.warpAffine` / `cv2.warpPerspective` and at most two `cv2.LUT` passes,
+instead of one full frame pass per filter.
+
+Composing geometric transforms is exact.  Colour transforms between two geometric
+transforms are applied after both, i.e. after interpolation, which may differ from
+separate passes by rounding.
+"""
+
+from __future__ import annotations
+
+import cv2
+import numpy
+from dataclasses import dataclass
+
+_IDENTITY = numpy.eye(3)
+_AFFINE_ROW = numpy.array([0.0, 0.0, 1.0])
+
+
+@dataclass(frozen=True, slots=True)
+class FrameTransform:
+    """Geometric and colour transform of a video frame with constant size.
+
+    Applied in order: `lut_before`, `matrix`, `lut_after`.  Use `affine`,
+    `perspective` and `colour` to create transforms and `then` to compose them.
+
+    Attributes
+    ----------
+    matrix : numpy.ndarray or None
+        3x3 float64 matrix mapping pixel coordinates (x, y, 1) of the input frame to
+        the output frame.  None if the transform is not geometric.  Pixels outside of
+        the input frame are black.
+    lut_before : numpy.ndarray or None
+        Lookup table applied before `matrix`, see `colour`.
+    lut_after : numpy.ndarray or None
+        Lookup table applied after `matrix`, see `colour`.
+    """
+
+    matrix: numpy.ndarray | None = None
+    lut_before: numpy.ndarray | None = None
+    lut_after: numpy.ndarray | None = None
+
+    @staticmethod
+    def affine(matrix: numpy.ndarray) -> FrameTransform:
+        """Create a geometric transform from a 2x3 affine matrix.
+
+        E.g. the result of `cv2.getRotationMatrix2D`.
+        """
+        return FrameTransform(numpy.vstack((matrix, _AFFINE_ROW)))
+
+    @staticmethod
+    def perspective(matrix: numpy.ndarray) -> FrameTransform:
+        """Create a geometric transform from a 3x3 perspective matrix."""
+        return FrameTransform(numpy.asarray(matrix, numpy.float64))
+
+    @staticmethod
+    def colour(lut: numpy.ndarray) -> FrameTransform:
+        """Create a colour transform from a lookup table.
+
+        Parameters
+        ----------
+        lut : numpy.ndarray
+            uint8 lookup table with shape (256,) applied to all channels, or (256, 3)
+            with a table per channel of `bgr24` frames.
+        """
+        return FrameTransform(lut_after=_lut(lut))
+
+    @property
+    def identity(self) -> bool:
+        """Whether the transform does not change frames."""
+        return (
+            self.lut_before is None
+            and self.lut_after is None
+            and (self.matrix is None or numpy.allclose(self.matrix, _IDENTITY))
+        )
+
+    def then(self, other: FrameTransform) -> FrameTransform:
+        """Get the transform applying this transform, followed by `other`."""
+        # Colour transforms between the geometric transforms are applied after both.
+        between = _compose_luts(self.lut_after, other.lut_before)
+        if self.matrix is None and other.matrix is None:
+            lut = _compose_luts(self.lut_before, between)
+            return FrameTransform(lut_after=_compose_luts(lut, other.lut_after))
+        if self.matrix is None:
+            return FrameTransform(
+                other.matrix,
+                _compose_luts(self.lut_before, between),
+                other.lut_after,
+            )
+        matrix = self.matrix if other.matrix is None else other.matrix @ self.matrix
+        return FrameTransform(
+            matrix, self.lut_before, _compose_luts(between, other.lut_after)
+        )
+
+    def apply(self, ndarray: numpy.ndarray) -> numpy.ndarray:
+        """Apply the transform to a `gray` or `bgr24` frame.
+
+        Returns
+        -------
+        numpy.ndarray
+            Transformed frame with the shape of `ndarray`.  May be `ndarray`, modified
+            in place, if the transform is not geometric.
+        """
+        if self.lut_before is not None:
+            ndarray = _apply_lut(ndarray, self.lut_before)
+        if self.matrix is not None and not numpy.allclose(self.matrix, _IDENTITY):
+            rows, cols = ndarray.shape[:2]
+            if numpy.allclose(self.matrix[2], _AFFINE_ROW):
+                ndarray = cv2.warpAffine(ndarray, self.matrix[:2], (cols, rows))
+            else:
+                ndarray = cv2.warpPerspective(ndarray, self.matrix, (cols, rows))
+        if self.lut_after is not None:
+            ndarray = _apply_lut(ndarray, self.lut_after)
+        return ndarray
+
+
+def _lut(lut: numpy.ndarray) -> numpy.ndarray:
+    """Get `lut` as uint8 array with shape (256, channels)."""
+    lut = numpy.asarray(lut, numpy.uint8)
+    if lut.ndim == 1:
+        lut = lut[:, None]
+    if lut.shape[0] != 256 or lut.shape[1] not in (1, 3):
+        raise ValueError(f"Invalid lookup table shape: {lut.shape}")
+    return lut
+
+
+def _compose_luts(
+    first: numpy.ndarray | None, second: numpy.ndarray | None
+) -> numpy.ndarray | None:
+    """Get the lookup table applying `first`, followed by `second`."""
+    if first is None:
+        return second
+    if second is None:
+        return first
+    channels = max(first.shape[1], second.shape[1])
+    first = numpy.broadcast_to(first, (256, channels))
+    second = numpy.broadcast_to(second, (256, channels))
+    return numpy.take_along_axis(second, first.astype(numpy.intp), axis=0)
+
+
+def _apply_lut(ndarray: numpy.ndarray, lut: numpy.ndarray) -> numpy.ndarray:
+    """Apply `lut` in place if `ndarray` is writable."""
+    if lut.shape[1] == 1:
+        table = lut[:, 0]
+    elif ndarray.ndim == 3:
+        table = lut[None]
+    else:
+        raise ValueError("Lookup tables per channel require bgr24 frames.")
+    if ndarray.flags.writeable:
+        return cv2.LUT(ndarray, table, dst=ndarray)
+    return cv2.LUT(ndarray, table)
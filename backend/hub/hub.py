@@ -15,6 +15,9 @@ from experiment import Experiment
 from hub.util import generate_unique_id
 from hub.exceptions import ErrorDictException
 from hub.util import get_system_specs
+from hub.inference_service import InferenceService
+from filters.open_face_au.open_face_pool import OpenFacePool
+from group_filters.group_filter_aggregator_pool import GroupFilterAggregatorPool
 
 from filters.filter import Filter
 
@@ -38,6 +41,9 @@ class Hub:
     session_manager: _sm.SessionManager
     server: Server
     config: Config
+    inference_service: InferenceService | None
+    openface_pool: OpenFacePool | None
+    aggregator_pool: GroupFilterAggregatorPool | None
     _logger: logging.Logger
 
     def __init__(self):
@@ -80,8 +86,35 @@ class Hub:
         self.session_manager = _sm.SessionManager("sessions")
         self.server = Server(self.handle_offer, self.config)
 
+        self.inference_service = None
+        if self.config.inference_port > 0:
+            self.inference_service = InferenceService(
+                self.config.inference_port, self.config.log, self.config.log_file
+            )
+
+        self.aggregator_pool = None
+        if self.config.aggregator_workers > 0:
+            self.aggregator_pool = GroupFilterAggregatorPool(
+                self.config.aggregator_workers, self.config.log, self.config.log_file
+            )
+
+        self.openface_pool = None
+        if self.config.openface_port > 0:
+            self.openface_pool = OpenFacePool(
+                self.config.openface_port,
+                self.config.openface_workers,
+                self.config.log,
+                self.config.log_file,
+            )
+
     async def start(self):
-        """Start the hub.  Starts the server."""
+        """Start the hub.  Starts the worker processes and the server."""
+        if self.inference_service is not None:
+            self.inference_service.start()
+        if self.openface_pool is not None:
+            self.openface_pool.start()
+        if self.aggregator_pool is not None:
+            self.aggregator_pool.start()
         await self.server.start()
 
     async def stop(self):
@@ -98,6 +131,12 @@ class Hub:
             tasks.append(experimenter.disconnect())
 
         await asyncio.gather(*tasks)
+        if self.inference_service is not None:
+            self.inference_service.stop()
+        if self.openface_pool is not None:
+            self.openface_pool.stop()
+        if self.aggregator_pool is not None:
+            self.aggregator_pool.stop()
 
     def remove_experimenter(self, experimenter: Experimenter):
         """Remove an experimenter from this hub.
@@ -319,7 +358,7 @@ class Hub:
             )
 
         # Create Experiment
-        experiment = Experiment(session)
+        experiment = Experiment(session, self.aggregator_pool)
         self.experiments[session_id] = experiment
 
         # Notify all experimenters about the new experiment
@@ -0,0 +1,135 @@
+"""Provide the models available in the inference service, see hub.inference_service.
+
+Each model is loaded once per process, when it is used first.  In the inference
+service, a model handles the requests of all participants in batches.
+"""
+
+from __future__ import annotations
+
+import dlib
+import numpy
+import threading
+from os.path import join
+from abc import ABC, abstractmethod
+from typing import Any
+
+from hub import BACKEND_DIR
+
+PREDICTOR_PATH = join(
+    BACKEND_DIR, "filters/glasses_detection/shape_predictor_68_face_landmarks.dat"
+)
+"""Path of the dlib 68 point face landmark model."""
+
+
+class InferenceModel(ABC):
+    """Abstract base class for models executed by the inference service.
+
+    Results must be JSON serializable, because they are sent back to the participant
+    processes.
+    """
+
+    @staticmethod
+    @abstractmethod
+    def name() -> str:
+        """Provide the unique name requests use to select the model."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def load(self) -> None:
+        """Load the model.  Called once, before the first batch."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def infer_batch(self, inputs: list[tuple[numpy.ndarray, dict]]) -> list[Any]:
+        """Compute the results for a batch of requests.
+
+        Parameters
+        ----------
+        inputs : list of tuple with numpy.ndarray and dict
+            Input image and parameters of each request.
+
+        Returns
+        -------
+        list
+            JSON serializable result for each request, in the order of `inputs`.
+        """
+        raise NotImplementedError
+
+
+class FaceDetectionModel(InferenceModel):
+    """dlib HOG frontal face detector.
+
+    Input is a grayscale image.  Result is a list of face boxes, each as list with
+    left, top, right and bottom in pixels.  Parameter `upsample` (int, default 0) is
+    the number of times the image is upsampled to find smaller faces.
+    """
+
+    _detector: dlib.fhog_object_detector
+
+    @staticmethod
+    def name() -> str:
+        return "face_detection"
+
+    def load(self) -> None:
+        self._detector = dlib.get_frontal_face_detector()
+
+    def infer_batch(self, inputs: list[tuple[numpy.ndarray, dict]]) -> list[Any]:
+        # The HOG detector has no batched implementation, images are scanned in turn.
+        return [
+            [
+                [rect.left(), rect.top(), rect.right(), rect.bottom()]
+                for rect in self._detector(ndarray, params.get("upsample", 0))
+            ]
+            for ndarray, params in inputs
+        ]
+
+
+class FaceLandmarkModel(InferenceModel):
+    """dlib 68 point face landmark predictor.
+
+    Input is a grayscale image and parameter `box` with left, top, right and bottom of
+    the face in pixels.  Result is a list of the 68 landmarks, each as list with x and
+    y in pixels.
+    """
+
+    _predictor: dlib.shape_predictor
+
+    @staticmethod
+    def name() -> str:
+        return "face_landmarks"
+
+    def load(self) -> None:
+        self._predictor = dlib.shape_predictor(PREDICTOR_PATH)
+
+    def infer_batch(self, inputs: list[tuple[numpy.ndarray, dict]]) -> list[Any]:
+        results = []
+        for ndarray, params in inputs:
+            shape = self._predictor(ndarray, dlib.rectangle(*params["box"]))
+            results.append([[p.x, p.y] for p in shape.parts()])
+        return results
+
+
+MODELS: dict[str, type[InferenceModel]] = {
+    model.name(): model for model in (FaceDetectionModel, FaceLandmarkModel)
+}
+"""Available models, by name."""
+
+
+_loaded: dict[str, InferenceModel] = {}
+_load_lock = threading.Lock()
+
+
+def get_model(name: str) -> InferenceModel:
+    """Get the model `name`, loading it if it is not loaded in this process yet.
+
+    Raises
+    ------
+    KeyError
+        If no model with `name` exists.
+    """
+    with _load_lock:
+        if name not in _loaded:
+            model = MODELS[name]()
+            model.load()
+            _loaded[name] = model
+        return _loaded[name]
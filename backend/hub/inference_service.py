@@ -0,0 +1,286 @@
+"""Provide the inference service, running models for all participants in one process.
+
+Model-based filters, e.g. the face analysis of the TrackHandlers (see
+hub.face_analysis), submit images with an `InferenceClient` instead of loading the
+models in every participant process.  The `InferenceService` is a worker process
+started by the Hub.  It receives the requests of all participant processes on a zmq
+ROUTER socket, collects them for up to `BATCH_WINDOW` seconds and executes the
+requests for the same model as a batch.  Each model is loaded once, see
+hub.inference_models.
+
+Wire format (zmq multipart messages):
+- Request: request id, model name, JSON header with `shape`, `dtype` and `params` of
+  the image, image data.
+- Reply: request id, JSON body `{"result": ...}` or `{"error": str}`.
+"""
+
+from __future__ import annotations
+
+import json
+import numpy
+import logging
+import multiprocessing
+import zmq
+from time import monotonic
+from typing import Any
+
+from hub.inference_models import MODELS, get_model
+
+BATCH_WINDOW = 0.005
+"""Time in seconds requests are collected for a batch, after the first request."""
+
+MAX_BATCH_SIZE = 32
+"""Maximum number of requests in a batch."""
+
+RETRY_INTERVAL = 1.0
+"""Time in seconds an `InferenceClient` executes models locally after the service did
+not reply, before using the service again.  Doubled for each consecutive timeout, up
+to `MAX_RETRY_INTERVAL`."""
+
+MAX_RETRY_INTERVAL = 60.0
+"""Maximum time in seconds between two attempts to use the service."""
+
+
+def serve(port: int, log_level: str = "INFO", log_file: str | None = None) -> None:
+    """Run the inference service on `port` until the process is terminated.
+
+    Parameters
+    ----------
+    port : int
+        Local port the ROUTER socket is bound to.
+    log_level : str, default "INFO"
+        Logging level of the service, see server.config.Config.log.
+    log_file : str, optional
+        File the service logs to.  Logs to the console if None.
+    """
+    logging.basicConfig(
+        level=logging.getLevelName(log_level),
+        format="%(asctime)s:%(levelname)s:%(name)s: %(message)s",
+        filename=log_file,
+    )
+    logger = logging.getLogger("InferenceService")
+
+    context = zmq.Context()
+    socket = context.socket(zmq.ROUTER)
+    try:
+        socket.bind(f"tcp://127.0.0.1:{port}")
+    except zmq.ZMQError as e:
+        logger.error(f"Failed to bind to port {port}: {e}")
+        return
+
+    # Load the models before participants connect.
+    for name in MODELS:
+        try:
+            get_model(name)
+        except Exception as e:
+            logger.error(f"Failed to load model {name}: {e}")
+    logger.info(f"Inference service ready on port {port}")
+
+    while True:
+        batch = [socket.recv_multipart()]
+        deadline = monotonic() + BATCH_WINDOW
+        while len(batch) < MAX_BATCH_SIZE:
+            remaining = deadline - monotonic()
+            if remaining <= 0 or not socket.poll(remaining * 1000):
+                break
+            batch.append(socket.recv_multipart())
+
+        for reply in _process_batch(batch, logger):
+            socket.send_multipart(reply)
+
+
+def _process_batch(
+    batch: list[list[bytes]], logger: logging.Logger
+) -> list[list[bytes]]:
+    """Execute the requests in `batch`, grouped by model, and get the replies."""
+    replies = []
+    requests: dict[str, list[tuple[list[bytes], numpy.ndarray, dict]]] = {}
+    for message in batch:
+        if len(message) != 5:
+            logger.warning(f"Ignoring malformed request with {len(message)} parts.")
+            continue
+        identity, request_id, model, header, data = message
+        route = [identity, request_id]
+        try:
+            header = json.loads(header)
+            ndarray = numpy.frombuffer(data, header["dtype"]).reshape(header["shape"])
+        except (ValueError, TypeError, KeyError) as e:
+            body = {"error": f"Invalid request: {e}"}
+            replies.append([*route, json.dumps(body).encode()])
+            continue
+        requests.setdefault(model.decode(), []).append(
+            (route, ndarray, header.get("params", {}))
+        )
+
+    for name, model_requests in requests.items():
+        try:
+            results = get_model(name).infer_batch(
+                [(ndarray, params) for _, ndarray, params in model_requests]
+            )
+            bodies = [{"result": result} for result in results]
+        except Exception as e:
+            logger.warning(f"Inference with model {name} failed: {e!r}")
+            bodies = [{"error": repr(e)}] * len(model_requests)
+        for (route, _, _), body in zip(model_requests, bodies):
+            replies.append([*route, json.dumps(body).encode()])
+    return replies
+
+
+class InferenceService:
+    """Worker process running the inference service, see `serve`."""
+
+    port: int
+    _log_level: str
+    _log_file: str | None
+    _process: multiprocessing.process.BaseProcess | None
+
+    def __init__(
+        self, port: int, log_level: str = "INFO", log_file: str | None = None
+    ) -> None:
+        """Initialize new InferenceService.  See `serve` for parameters."""
+        self.port = port
+        self._log_level = log_level
+        self._log_file = log_file
+        self._process = None
+
+    def start(self) -> None:
+        """Start the worker process."""
+        # Spawn, the worker must not inherit the event loop and sockets of the Hub.
+        context = multiprocessing.get_context("spawn")
+        self._process = context.Process(
+            target=serve,
+            args=(self.port, self._log_level, self._log_file),
+            name="InferenceService",
+            daemon=True,
+        )
+        self._process.start()
+
+    def stop(self) -> None:
+        """Stop the worker process."""
+        if self._process is None:
+            return
+        self._process.terminate()
+        self._process.join()
+        self._process = None
+
+
+class InferenceClient:
+    """Submits images to the inference service and waits for the results.
+
+    `infer` blocks, use it from worker threads, e.g. in filters using the `thread`
+    execution.  A client is not thread safe, calls must not overlap.
+
+    If the service is disabled (port 0), the models are executed in the process of
+    the client instead.  Requests the service replies to with an error are executed
+    locally as well.  If the service does not reply within `timeout`, e.g. while it
+    loads the models, the client executes the models locally and uses the service
+    again after `RETRY_INTERVAL`, with exponential backoff.
+    """
+
+    port: int
+    timeout: float
+    _socket: zmq.Socket | None
+    _local: bool
+    _retry_at: float
+    _retry_interval: float
+    _request_counter: int
+    _logger: logging.Logger
+
+    def __init__(self, port: int, timeout: float = 2.0) -> None:
+        """Initialize new InferenceClient.
+
+        Parameters
+        ----------
+        port : int
+            Port of the inference service.  0 to execute the models locally.
+        timeout : float, default 2.0
+            Time in seconds to wait for a reply of the service.
+        """
+        self.port = port
+        self.timeout = timeout
+        self._socket = None
+        self._local = port <= 0
+        self._retry_at = 0
+        self._retry_interval = RETRY_INTERVAL
+        self._request_counter = 0
+        self._logger = logging.getLogger("InferenceClient")
+
+    def infer(self, model: str, ndarray: numpy.ndarray, **params) -> Any:
+        """Execute `model` on `ndarray`.
+
+        Parameters
+        ----------
+        model : str
+            Name of the model, see hub.inference_models.MODELS.
+        ndarray : numpy.ndarray
+            Input image.
+        **params
+            JSON serializable parameters of the model.
+
+        Returns
+        -------
+        Any
+            Result of the model, see hub.inference_models.
+        """
+        if not self._local and monotonic() >= self._retry_at:
+            received, result = self._request(model, ndarray, params)
+            if received:
+                return result
+        return get_model(model).infer_batch([(ndarray, params)])[0]
+
+    def close(self) -> None:
+        """Close the connection to the service."""
+        if self._socket is not None:
+            self._socket.close(linger=0)
+            self._socket = None
+
+    def _request(
+        self, model: str, ndarray: numpy.ndarray, params: dict
+    ) -> tuple[bool, Any]:
+        """Send a request to the service.  Get whether a result was received and the
+        result.
+
+        Pauses using the service if no reply is received within `timeout`.
+        """
+        if self._socket is None:
+            self._socket = zmq.Context.instance().socket(zmq.DEALER)
+            self._socket.connect(f"tcp://127.0.0.1:{self.port}")
+
+        self._request_counter += 1
+        request_id = str(self._request_counter).encode()
+        header = {"shape": ndarray.shape, "dtype": str(ndarray.dtype), "params": params}
+        self._socket.send_multipart(
+            [
+                request_id,
+                model.encode(),
+                json.dumps(header).encode(),
+                numpy.ascontiguousarray(ndarray),
+            ]
+        )
+
+        deadline = monotonic() + self.timeout
+        while (remaining := deadline - monotonic()) > 0 and self._socket.poll(
+            remaining * 1000
+        ):
+            reply_id, body = self._socket.recv_multipart()
+            if reply_id != request_id:
+                # Late reply to a previous request.
+                continue
+            self._retry_interval = RETRY_INTERVAL
+            reply = json.loads(body)
+            if "error" in reply:
+                self._logger.warning(
+                    f"Inference with model {model} failed in the service, executing "
+                    f"it in this process: {reply['error']}"
+                )
+                return False, None
+            return True, reply["result"]
+
+        self._logger.warning(
+            f"Inference service on port {self.port} did not reply, executing models "
+            f"in this process for {self._retry_interval:.0f} s."
+        )
+        self.close()
+        self._retry_at = monotonic() + self._retry_interval
+        self._retry_interval = min(2 * self._retry_interval, MAX_RETRY_INTERVAL)
+        return False, None
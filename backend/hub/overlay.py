@@ -0,0 +1,314 @@
+"""Provide cached text sprites and the `OverlayCompositor` for annotating frames.
+
+Rendering text with `cv2.putText` is expensive compared to the frequency the text
+changes.  `text_sprite` renders a line once into a small BGRA sprite, which is cached
+per text and `TextStyle`.  Only the region of the sprite is blended into the frame.
+
+Filters annotating frames either blend sprites directly (see `blend`), or draw them on
+the `OverlayCompositor` of their TrackHandler (see hub.track_handler.TrackHandler).
+The compositor collects the sprites of all filters for a frame and blends them after
+the filter pipeline in one pass.  Overlapping sprites are merged into one sprite,
+which is cached as long as the same sprites are drawn at the same positions.
+"""
+
+from __future__ import annotations
+
+import cv2
+import numpy
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+SPRITE_CACHE_SIZE = 256
+"""Maximum number of text sprites cached per process."""
+
+_MERGE_FACTOR = 1.0
+"""Sprites are merged if their bounding box is at most this factor larger than the
+sum of their areas.  Blending costs scale with the area, so only overlapping sprites
+are merged."""
+
+
+@dataclass(frozen=True, slots=True)
+class TextStyle:
+    """Style of text rendered with `cv2.putText`.
+
+    Attributes
+    ----------
+    font : int, default cv2.FONT_HERSHEY_SIMPLEX
+        cv2 font face.
+    font_size : float, default 1
+        Font scale.
+    color : tuple of int, default (0, 255, 0)
+        Text color, BGR.
+    thickness : int, default 2
+        Line thickness of the text.
+    outline_color : tuple of int or None, default (0, 0, 0)
+        Color of the outline drawn around the text, BGR.  None for no outline.
+    outline_thickness : int, default 6
+        Thickness added to `thickness` for the outline.
+    line_type : int, default cv2.LINE_8
+        cv2 line type.  cv2.LINE_AA renders anti-aliased text.
+    """
+
+    font: int = cv2.FONT_HERSHEY_SIMPLEX
+    font_size: float = 1
+    color: tuple[int, int, int] = (0, 255, 0)
+    thickness: int = 2
+    outline_color: tuple[int, int, int] | None = (0, 0, 0)
+    outline_thickness: int = 6
+    line_type: int = cv2.LINE_8
+
+
+@dataclass(frozen=True, slots=True)
+class Sprite:
+    """Small BGRA image blended into frames.
+
+    Attributes
+    ----------
+    bgr : numpy.ndarray
+        Color of the sprite, uint8 with shape (height, width, 3).
+    alpha : numpy.ndarray
+        Opacity of the sprite, uint8 with shape (height, width).
+    anchor : tuple of int
+        Position of the origin of the sprite inside the sprite, (x, y).  For text, the
+        bottom-left corner of the text, like the `org` of `cv2.putText`.
+    premultiplied : numpy.ndarray
+        Color multiplied by the opacity, uint8 with shape (height, width, 3).
+    transparency : numpy.ndarray
+        255 - opacity for each channel, uint8 with shape (height, width, 3).
+    """
+
+    bgr: numpy.ndarray
+    alpha: numpy.ndarray
+    anchor: tuple[int, int]
+    premultiplied: numpy.ndarray
+    transparency: numpy.ndarray
+
+    @classmethod
+    def from_bgra(
+        cls, bgr: numpy.ndarray, alpha: numpy.ndarray, anchor: tuple[int, int]
+    ) -> Sprite:
+        """Create a sprite from color and opacity."""
+        alpha3 = cv2.merge((alpha, alpha, alpha))
+        premultiplied = cv2.multiply(bgr, alpha3, scale=1 / 255)
+        transparency = 255 - alpha3
+        for array in (bgr, alpha, premultiplied, transparency):
+            array.flags.writeable = False
+        return cls(bgr, alpha, anchor, premultiplied, transparency)
+
+    @property
+    def width(self) -> int:
+        return self.bgr.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.bgr.shape[0]
+
+
+def render_text(text: str, style: TextStyle) -> Sprite:
+    """Render `text` into a new sprite.  Use `text_sprite` for cached sprites."""
+    outer = style.thickness
+    if style.outline_color is not None:
+        outer += style.outline_thickness
+    (width, height), baseline = cv2.getTextSize(
+        text, style.font, style.font_size, outer
+    )
+    pad = outer // 2 + 2
+    anchor = (pad, pad + height)
+    shape = (height + baseline + 2 * pad, width + 2 * pad)
+
+    bgr = numpy.zeros((*shape, 3), numpy.uint8)
+    alpha = numpy.zeros(shape, numpy.uint8)
+    layers = [(style.color, style.thickness)]
+    if style.outline_color is not None:
+        layers.insert(0, (style.outline_color, outer))
+    for color, thickness in layers:
+        # Render the coverage of the layer and composite it, so smoothed edges blend
+        # into the frame instead of the black sprite background.
+        coverage = numpy.zeros(shape, numpy.uint8)
+        cv2.putText(
+            coverage,
+            text,
+            anchor,
+            style.font,
+            style.font_size,
+            255,
+            thickness,
+            style.line_type,
+        )
+        _over(bgr, alpha, numpy.full((*shape, 3), color, numpy.uint8), coverage)
+    return Sprite.from_bgra(bgr, alpha, anchor)
+
+
+class _SpriteCache:
+    """Least recently used cache of text sprites, shared by all threads."""
+
+    _sprites: OrderedDict[tuple[str, TextStyle], Sprite]
+    _lock: threading.Lock
+
+    def __init__(self) -> None:
+        self._sprites = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text: str, style: TextStyle) -> Sprite:
+        key = (text, style)
+        with self._lock:
+            sprite = self._sprites.get(key)
+            if sprite is not None:
+                self._sprites.move_to_end(key)
+                return sprite
+
+        sprite = render_text(text, style)
+        with self._lock:
+            self._sprites[key] = sprite
+            if len(self._sprites) > SPRITE_CACHE_SIZE:
+                self._sprites.popitem(last=False)
+        return sprite
+
+
+_cache = _SpriteCache()
+
+
+def text_sprite(text: str, style: TextStyle) -> Sprite:
+    """Get the sprite of `text` in `style`.
+
+    Sprites are rendered once and cached until the text or style is not used for
+    `SPRITE_CACHE_SIZE` other sprites.
+    """
+    return _cache.get(text, style)
+
+
+def blend(ndarray: numpy.ndarray, sprite: Sprite, origin: tuple[int, int]) -> None:
+    """Blend `sprite` into the bgr24 `ndarray` in place, with its anchor at `origin`.
+
+    Parts of the sprite outside of `ndarray` are cut off.
+    """
+    x = origin[0] - sprite.anchor[0]
+    y = origin[1] - sprite.anchor[1]
+    left, top = max(x, 0), max(y, 0)
+    right = min(x + sprite.width, ndarray.shape[1])
+    bottom = min(y + sprite.height, ndarray.shape[0])
+    if left >= right or top >= bottom:
+        return
+
+    region = ndarray[top:bottom, left:right]
+    crop = (slice(top - y, bottom - y), slice(left - x, right - x))
+    # region * (255 - alpha) / 255 + color * alpha / 255, with saturated uint8 math.
+    result = cv2.multiply(region, sprite.transparency[crop], dst=region, scale=1 / 255)
+    result = cv2.add(result, sprite.premultiplied[crop], dst=result)
+    if result is not region:
+        region[:] = result
+
+
+def _over(
+    bgr: numpy.ndarray,
+    alpha: numpy.ndarray,
+    src: numpy.ndarray,
+    src_alpha: numpy.ndarray,
+) -> None:
+    """Composite `src` over the BGRA image `bgr`, `alpha` in place."""
+    a_src = src_alpha[..., None].astype(numpy.float32) / 255
+    a_dst = alpha[..., None].astype(numpy.float32) / 255
+    a_out = a_src + a_dst * (1 - a_src)
+    color = src * a_src + bgr * a_dst * (1 - a_src)
+    numpy.divide(color, a_out, out=color, where=a_out > 0)
+    bgr[:] = color + 0.5
+    alpha[:] = a_out[..., 0] * 255 + 0.5
+
+
+class OverlayCompositor:
+    """Collects the sprites drawn on a frame and blends them in one pass.
+
+    Sprites are drawn in coordinates of the outgoing frame.  Thread safe, sprites can
+    be drawn by filters running in worker threads.
+    """
+
+    _drawn: list[tuple[Sprite, tuple[int, int]]]
+    _merged_key: tuple | None
+    _merged_from: list[tuple[Sprite, tuple[int, int]]]
+    _merged: list[tuple[Sprite, tuple[int, int]]]
+    _lock: threading.Lock
+
+    def __init__(self) -> None:
+        self._drawn = []
+        self._merged_key = None
+        self._merged_from = []
+        self._merged = []
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> bool:
+        """Whether sprites were drawn since the last `composite` or `clear`."""
+        return len(self._drawn) > 0
+
+    def draw(self, sprite: Sprite, origin: tuple[int, int]) -> None:
+        """Draw `sprite` with its anchor at `origin` on the current frame.
+
+        Sprites drawn later are blended on top.
+        """
+        with self._lock:
+            self._drawn.append((sprite, (int(origin[0]), int(origin[1]))))
+
+    def clear(self) -> None:
+        """Discard the sprites drawn on the current frame."""
+        with self._lock:
+            self._drawn = []
+
+    def composite(self, ndarray: numpy.ndarray) -> None:
+        """Blend the sprites drawn on the current frame into the bgr24 `ndarray`.
+
+        Clears the drawn sprites.
+        """
+        with self._lock:
+            drawn, self._drawn = self._drawn, []
+
+        key = tuple((id(sprite), origin) for sprite, origin in drawn)
+        if key != self._merged_key:
+            self._merged = _merge(drawn)
+            self._merged_key = key
+            # Keep the sprites alive, their ids are part of the key.
+            self._merged_from = drawn
+        for sprite, origin in self._merged:
+            blend(ndarray, sprite, origin)
+
+
+def _merge(
+    drawn: list[tuple[Sprite, tuple[int, int]]]
+) -> list[tuple[Sprite, tuple[int, int]]]:
+    """Merge nearby sprites into single sprites, keeping the drawing order."""
+    # Groups of bounding box (left, top, right, bottom), area and sprites.
+    groups: list[list] = []
+    for sprite, origin in drawn:
+        left, top = origin[0] - sprite.anchor[0], origin[1] - sprite.anchor[1]
+        box = (left, top, left + sprite.width, top + sprite.height)
+        area = sprite.width * sprite.height
+        for group in groups:
+            union = (
+                min(box[0], group[0][0]),
+                min(box[1], group[0][1]),
+                max(box[2], group[0][2]),
+                max(box[3], group[0][3]),
+            )
+            union_area = (union[2] - union[0]) * (union[3] - union[1])
+            if union_area <= (area + group[1]) * _MERGE_FACTOR:
+                group[0] = union
+                group[1] += area
+                group[2].append((sprite, origin))
+                break
+        else:
+            groups.append([box, area, [(sprite, origin)]])
+
+    merged = []
+    for (left, top, right, bottom), _, sprites in groups:
+        if len(sprites) == 1:
+            merged.append(sprites[0])
+            continue
+        shape = (bottom - top, right - left)
+        bgr = numpy.zeros((*shape, 3), numpy.uint8)
+        alpha = numpy.zeros(shape, numpy.uint8)
+        for sprite, (x, y) in sprites:
+            x, y = x - sprite.anchor[0] - left, y - sprite.anchor[1] - top
+            region = (slice(y, y + sprite.height), slice(x, x + sprite.width))
+            _over(bgr[region], alpha[region], sprite.bgr, sprite.alpha)
+        merged.append((Sprite.from_bgra(bgr, alpha, (0, 0)), (left, top)))
+    return merged
@@ -1,10 +1,10 @@
 """Provide TrackHandler for handing and distributing tracks."""
 
 from __future__ import annotations
-import numpy
 import asyncio
 import logging
-from typing import Coroutine, Literal, TYPE_CHECKING
+from contextlib import ExitStack
+from typing import Literal, TYPE_CHECKING
 from aiortc.mediastreams import (
     MediaStreamTrack,
     MediaStreamError,
@@ -16,7 +16,20 @@ from aiortc.contrib.media import MediaRelay
 
 from filters import filter_factory, FilterDict, Filter, MuteAudioFilter, MuteVideoFilter
 from group_filters import GroupFilter, group_filter_factory, group_filter_utils
-from time import time_ns
+from hub.frame_buffer import FrameBuffer
+from hub.filter_executor import FilterExecutor
+from hub.frame_scheduler import FrameScheduler
+from hub.filter_pipeline import FilterPipeline
+from hub.frame_tracer import FrameTracer, FrameTrace, NoTrace
+from hub.face_analysis import Face, FaceAnalyzer
+from hub.inference_service import InferenceClient
+from hub.overlay import OverlayCompositor
+from hub.frame_transform import FrameTransform
+from server import Config
+from time import time_ns, monotonic_ns
+
+_TRANSFORM_FORMATS = ("gray", "bgr24")
+"""Frame formats fused transforms are applied to, see hub.frame_transform."""
 
 if TYPE_CHECKING:
     from connection.connection import Connection
@@ -36,8 +49,18 @@ class TrackHandler(MediaStreamTrack):
     _mute_filter: MuteAudioFilter | MuteVideoFilter
     _filters: dict[str, Filter]
     _group_filters: dict[str, GroupFilter]
-    _execute_filters: bool
-    _execute_group_filters: bool
+    _pipeline: FilterPipeline
+    _processing: FilterPipeline | None
+    _frame_done: asyncio.Event
+    _scheduler: FrameScheduler
+    _tracer: FrameTracer
+    _delivering: tuple[FrameTrace | NoTrace, int] | None
+    _muted_frame_interval: float
+    _last_muted_frame_time: float | None
+    _frame_number: int
+    _face_analyzer: FaceAnalyzer | None
+    _faces: tuple[Face, ...]
+    _overlay: OverlayCompositor
     _logger: logging.Logger
     __lock: asyncio.Lock
 
@@ -94,10 +117,25 @@ class TrackHandler(MediaStreamTrack):
         self._muted = muted
         self.connection = connection
         self._relay = MediaRelay()
-        self._execute_filters = True
         self._filters = {}
-        self._execute_group_filters = True
         self._group_filters = {}
+        self._pipeline = FilterPipeline(
+            native_format="yuv420p" if kind == "video" else "s16"
+        )
+        self._processing = None
+        self._frame_done = asyncio.Event()
+        self._scheduler = FrameScheduler(kind, self._logger)
+        config = Config()
+        self._tracer = FrameTracer(
+            kind, config.trace_sample_rate, config.trace_buffer_size
+        )
+        self._delivering = None
+        self._muted_frame_interval = 1 / config.muted_video_fps
+        self._last_muted_frame_time = None
+        self._frame_number = 0
+        self._face_analyzer = None
+        self._faces = ()
+        self._overlay = OverlayCompositor()
 
         # Forward the ended event to this handler.
         self._track.add_listener("ended", self.stop)
@@ -147,6 +185,44 @@ class TrackHandler(MediaStreamTrack):
         """Get group filters used by this TrackHandler."""
         return self._group_filters
 
+    @property
+    def scheduler(self) -> FrameScheduler:
+        """Get the scheduler deciding which filters are executed on a frame."""
+        return self._scheduler
+
+    @property
+    def tracer(self) -> FrameTracer:
+        """Get the tracer recording pipeline spans for sampled frames."""
+        return self._tracer
+
+    @property
+    def faces(self) -> tuple[Face, ...]:
+        """Get the faces in the frame currently processed by the filters.
+
+        Only analysed on frames a filter setting `Filter.face_analysis` is executed
+        on, otherwise empty.  See hub.face_analysis.FaceAnalyzer.
+        """
+        return self._faces
+
+    @property
+    def overlay(self) -> OverlayCompositor:
+        """Get the compositor for text and other overlays on the outgoing frame.
+
+        Sprites drawn by filters are blended after all filters, in one pass.  See
+        hub.overlay.OverlayCompositor.
+        """
+        return self._overlay
+
+    def frame_format(self, filter: Filter | GroupFilter) -> str | None:
+        """Get the format of the frames passed to `filter`.
+
+        Read from the pipeline processing the current frame, or the current pipeline
+        if no frame is processed.  None if `filter` is not part of the pipeline.  See
+        hub.filter_pipeline.FilterPipeline.
+        """
+        pipeline = self._processing if self._processing is not None else self._pipeline
+        return pipeline.frame_format(filter)
+
     @property
     def muted(self) -> bool:
         """Get muted state of TrackHandler."""
@@ -161,6 +237,8 @@ class TrackHandler(MediaStreamTrack):
     async def stop(self) -> None:
         """Stop TrackHandler and associated track."""
         super().stop()
+        if self._face_analyzer is not None:
+            self._face_analyzer.close()
         coros = [
             f.cleanup()
             for f in list(self._filters.values()) + list(self._group_filters.values())
@@ -215,6 +293,10 @@ class TrackHandler(MediaStreamTrack):
     async def set_filters(self, filter_configs: list[FilterDict]) -> None:
         """Set or update filters to `filter_configs`.
 
+        New filters are created and set up while frames are still processed by the
+        current filters.  Afterwards the pipeline is replaced and removed filters are
+        cleaned up, see hub.filter_pipeline.FilterPipeline.
+
         Parameters
         ----------
         filter_configs : list of filters.FilterDict
@@ -231,7 +313,7 @@ class TrackHandler(MediaStreamTrack):
 
         old_filters = self._filters
 
-        self._filters = {}
+        filters: dict[str, Filter] = {}
         for config in filter_configs:
             filter_id = config["id"]
             # Reuse existing filter for matching id and name.
@@ -239,37 +321,40 @@ class TrackHandler(MediaStreamTrack):
                 filter_id in old_filters
                 and old_filters[filter_id].config["name"] == config["name"]
             ):
-                self._filters[filter_id] = old_filters[filter_id]
-                self._filters[filter_id].set_config(config)
+                filters[filter_id] = old_filters[filter_id]
+                filters[filter_id].set_config(config)
                 continue
 
             # Create a new filter for configs with empty id.
-            self._filters[filter_id] = filter_factory.create_filter(
+            filters[filter_id] = filter_factory.create_filter(
                 config, self.connection.incoming_audio, self.connection.incoming_video
             )
 
-        coroutines: list[Coroutine] = []
-        # Cleanup old filters
-        for filter_id, old_filter in old_filters.items():
-            if filter_id not in self._filters:
-                coroutines.append(old_filter.cleanup())
+        # Make new filters available to other filters during `complete_setup`.  Frames
+        # are processed by the previous pipeline until `_swap_pipeline`.
+        self._filters = filters
+        await asyncio.gather(*[f.complete_setup() for f in filters.values()])
+        await self._swap_pipeline()
 
-        # Complete setup for new filters
-        for new_filter in self._filters.values():
-            coroutines.append(new_filter.complete_setup())
-
-        await asyncio.gather(*coroutines)
-        self.reset_execute_filters()
+        # Cleanup old filters
+        await asyncio.gather(
+            *[
+                old_filter.cleanup()
+                for filter_id, old_filter in old_filters.items()
+                if filter_id not in filters
+            ]
+        )
 
     def reset_execute_filters(self):
-        """Reset `self._execute_filters`.
+        """Reset whether the filter pipeline should be executed.
 
-        `self._execute_filters` indicates if the filter pipeline should be executed.
         The pipeline is only executed filters exists and this TrackHandler is not muted
         or any of the filters should be executed even if muted.
         """
-        self._execute_filters = len(self._filters) > 0 and (
-            not self._muted or any([f.run_if_muted for f in self._filters.values()])
+        self._pipeline = self._build_pipeline(
+            self._pipeline.all_filters,
+            self._pipeline.group_filters,
+            self._pipeline.native_format,
         )
 
     async def set_group_filters(
@@ -283,7 +368,7 @@ class TrackHandler(MediaStreamTrack):
     ) -> None:
         old_group_filters = self._group_filters
 
-        self._group_filters = {}
+        group_filters: dict[str, GroupFilter] = {}
         for config, port in zip(group_filter_configs, ports):
             filter_id = config["id"]
             # Reuse existing filter for matching id and type.
@@ -291,36 +376,71 @@ class TrackHandler(MediaStreamTrack):
                 filter_id in old_group_filters
                 and old_group_filters[filter_id].config["name"] == config["name"]
             ):
-                self._group_filters[filter_id] = old_group_filters[filter_id]
-                self._group_filters[filter_id].set_config(config)
+                group_filters[filter_id] = old_group_filters[filter_id]
+                group_filters[filter_id].set_config(config)
                 continue
 
             # Create a new filter for configs with empty id.
-            self._group_filters[filter_id] = group_filter_factory.create_group_filter(
+            group_filters[filter_id] = group_filter_factory.create_group_filter(
                 config, self.connection._log_name_suffix[2:]
             )
-            self._group_filters[filter_id].connect_aggregator(port)
+            group_filters[filter_id].connect_aggregator(port)
+
+        self._group_filters = group_filters
+        await asyncio.gather(*[f.complete_setup() for f in group_filters.values()])
+        await self._swap_pipeline()
 
-        coroutines: list[Coroutine] = []
         # Cleanup old filters
-        for filter_id, old_group_filter in old_group_filters.items():
-            if filter_id not in self._group_filters:
-                coroutines.append(old_group_filter.cleanup())
+        await asyncio.gather(
+            *[
+                old_group_filter.cleanup()
+                for filter_id, old_group_filter in old_group_filters.items()
+                if filter_id not in group_filters
+            ]
+        )
 
-        # Complete setup for new filters
-        for new_filter in self._group_filters.values():
-            coroutines.append(new_filter.complete_setup())
+    def reset_execute_group_filters(self):
+        self.reset_execute_filters()
 
-        await asyncio.gather(*coroutines)
-        self.reset_execute_group_filters()
+    def _build_pipeline(
+        self,
+        filters: tuple[Filter, ...],
+        group_filters: tuple[GroupFilter, ...],
+        native_format: str,
+    ) -> FilterPipeline:
+        """Create a pipeline snapshot for the current muted state.
 
-    def reset_execute_group_filters(self):
-        self._execute_group_filters = len(self._group_filters) > 0
+        See hub.filter_pipeline.FilterPipeline.build for parameters.
+        """
+        execute_filters = len(filters) > 0 and (
+            not self._muted or any([f.run_if_muted for f in filters])
+        )
+        return FilterPipeline.build(
+            self.kind, filters, group_filters, native_format, execute_filters
+        )
+
+    async def _swap_pipeline(self) -> None:
+        """Replace the pipeline with the configured filters and group filters.
+
+        Waits until the frame processed by the previous pipeline is done, so removed
+        filters can be cleaned up afterwards.
+        """
+        previous = self._pipeline
+        self._pipeline = self._build_pipeline(
+            tuple(self._filters.values()),
+            tuple(self._group_filters.values()),
+            previous.native_format,
+        )
+        if self._processing is previous:
+            self._frame_done.clear()
+            await self._frame_done.wait()
 
     async def recv(self) -> AudioFrame | VideoFrame:
         """Receive the next av.AudioFrame from this track and apply filter pipeline.
 
-        Checks if this track is muted and returns silence if so.
+        Checks if this track is muted and returns silence if so.  If no filter or group
+        filter needs the source frames while muted, the pipeline is bypassed, see
+        `_recv_muted`.
 
         Returns
         -------
@@ -336,80 +456,341 @@ class TrackHandler(MediaStreamTrack):
         if self.readyState != "live":
             raise MediaStreamError
 
-        frame = await self.track.recv()
-
-        if self._execute_group_filters:
-            if self.kind == "video":
-                await self._run_video_group_filters(frame)
-            else:
-                await self._run_audio_group_filters(frame)
+        # The previous frame was delivered to the relay subscribers.
+        receive_start = monotonic_ns()
+        if self._delivering is not None:
+            previous_trace, deliver_start = self._delivering
+            previous_trace.add_span("deliver", deliver_start, receive_start)
+            self._tracer.end_frame(previous_trace)
+            self._delivering = None
+
+        if self._source_unused():
+            frame = await self._recv_muted()
+            trace = self._tracer.begin_frame(frame.pts, receive_start)
+            trace.add_span("receive", receive_start, monotonic_ns())
+            self._delivering = (trace, monotonic_ns())
+            return frame
+
+        self._last_muted_frame_time = None
+        frame = await self._recv_source()
+        trace = self._tracer.begin_frame(frame.pts, receive_start)
+        trace.add_span("receive", receive_start, monotonic_ns())
+        self._scheduler.begin_frame(frame)
+        buffer = FrameBuffer(frame, trace)
+        if buffer.native_format != self._pipeline.native_format:
+            self._pipeline = self._build_pipeline(
+                self._pipeline.all_filters,
+                self._pipeline.group_filters,
+                buffer.native_format,
+            )
 
-        if self._execute_filters:
-            if self.kind == "video":
-                frame = await self._apply_video_filters(frame)
-            else:
-                frame = await self._apply_audio_filters(frame)
+        # Read the pipeline once, reconfiguration replaces it without locking.
+        pipeline = self._pipeline
+        self._processing = pipeline
+        try:
+            if len(pipeline.group_filters) > 0:
+                await self._run_group_filters(pipeline, buffer)
+
+            self._faces = ()
+            if pipeline.execute_filters:
+                if len(pipeline.face_filters) > 0:
+                    await self._analyse_faces(pipeline, buffer)
+                frame = await self._apply_filters(pipeline, buffer)
+        finally:
+            self._processing = None
+            self._frame_done.set()
 
         if self._muted:
-            muted_frame = await self._mute_filter.process(frame)
-            return muted_frame
+            with trace.span("mute"):
+                frame = await self._mute_filter.process(frame)
 
+        self._delivering = (trace, monotonic_ns())
         return frame
 
-    async def _apply_video_filters(self, frame: VideoFrame):
-        """Parse video frame and pass it to `_apply_filters`."""
-        ndarray = frame.to_ndarray(format="bgr24")
-        ndarray = await self._apply_filters(frame, ndarray)
+    def _source_unused(self) -> bool:
+        """Check if the content of source frames is unused, because the track is muted.
 
-        new_frame = VideoFrame.from_ndarray(ndarray, format="bgr24")
-        new_frame.time_base = frame.time_base
-        new_frame.pts = frame.pts
-        return new_frame
+        False if group filters or filters that should run if muted are set.
+        """
+        return (
+            self._muted
+            and not self._pipeline.execute_filters
+            and len(self._pipeline.group_filters) == 0
+        )
 
-    async def _apply_audio_filters(self, frame: AudioFrame):
-        """Parse audio frame and pass it to `_apply_filters`."""
-        ndarray = frame.to_ndarray()
-        ndarray = await self._apply_filters(frame, ndarray)
+    async def _recv_muted(self) -> AudioFrame | VideoFrame:
+        """Receive the next muted frame, without decoding or processing source frames.
 
-        new_frame = AudioFrame.from_ndarray(ndarray)
-        new_frame.pts = frame.pts
-        new_frame.time_base = frame.time_base
-        new_frame.sample_rate = frame.sample_rate
-        return new_frame
+        Source frames are still received to keep the source track drained and to take
+        over their timestamps, but their content is never read.  Audio returns silence
+        for each source frame.  Video returns the cached muted frame at
+        `muted_video_fps` (see server.config.Config) and drops source frames in between,
+        which also reduces the encoding cost for all subscribers.
+        """
+        frame = await self._recv_source()
+        if self.kind == "video":
+            while self._source_unused() and not self._muted_frame_due(frame):
+                frame = await self._recv_source()
+            self._last_muted_frame_time = frame.time
 
-    async def _apply_filters(
-        self, original: VideoFrame | AudioFrame, ndarray: numpy.ndarray
-    ) -> numpy.ndarray:
-        """Execute filter pipeline."""
-        async with self.__lock:
-            # Run all filters if not self._muted.
-            if not self._muted:
-                for active_filter in self._filters.values():
-                    ndarray = await active_filter.process(original, ndarray)
-                return ndarray
+        return await self._mute_filter.process(frame)
 
-            # Muted. Only execute filters where run_if_muted is True.
-            for active_filter in self._filters.values():
-                if active_filter.run_if_muted:
-                    ndarray = await active_filter.process(original, ndarray)
+    async def _recv_source(self) -> AudioFrame | VideoFrame:
+        """Receive the next frame from the source track and count it."""
+        frame = await self.track.recv()
+        self._frame_number += 1
+        return frame
 
-        return ndarray
+    def _muted_frame_due(self, frame: VideoFrame) -> bool:
+        """Check if the next muted video frame should be sent for source `frame`."""
+        if frame.time is None or self._last_muted_frame_time is None:
+            return True
+        elapsed = frame.time - self._last_muted_frame_time
+        # Negative if the source track was replaced.
+        return elapsed < 0 or elapsed >= self._muted_frame_interval
 
-    async def _run_video_group_filters(self, frame: VideoFrame) -> None:
-        ndarray = frame.to_ndarray(format="bgr24")
-        await self._run_group_filters(frame, ndarray)
+    async def _analyse_faces(
+        self, pipeline: FilterPipeline, buffer: FrameBuffer
+    ) -> None:
+        """Find the faces in the frame for all filters using faces, see `faces`.
 
-    async def _run_audio_group_filters(self, frame: AudioFrame) -> None:
-        ndarray = frame.to_ndarray()
-        await self._run_group_filters(frame, ndarray)
+        Only analyses frames a filter using faces is due on, see
+        hub.frame_scheduler.FrameScheduler.is_due, and only predicts landmarks if one
+        of these filters reads them.  Runs in a worker thread on the luma of the
+        frame, which is a view of the decoded frame for yuv420p tracks.
+        """
+        due = [
+            f
+            for f in pipeline.face_filters
+            if f.face_analysis != ""
+            and (not self._muted or f.run_if_muted)
+            and self._scheduler.is_due(f)
+        ]
+        if len(due) == 0:
+            return
+
+        if self._face_analyzer is None:
+            config = Config()
+            self._face_analyzer = FaceAnalyzer(
+                InferenceClient(config.inference_port),
+                config.face_detection_interval,
+                config.face_detection_width,
+            )
+        with buffer.trace.span("face_analysis"):
+            self._faces = await asyncio.get_running_loop().run_in_executor(
+                None,
+                self._face_analyzer.analyse,
+                buffer.readonly("gray"),
+                self._frame_number,
+                any(f.face_analysis == "landmarks" for f in due),
+            )
+
+    async def _apply_filters(
+        self, pipeline: FilterPipeline, buffer: FrameBuffer
+    ) -> VideoFrame | AudioFrame:
+        """Execute filter pipeline.
+
+        Filters receive the frame in their `frame_format`, see
+        hub.frame_buffer.FrameBuffer.  Analysis-only filters receive a read-only view
+        and their result is ignored.  If only analysis-only filters ran, the original
+        frame is returned without creating a new frame.
+
+        Filters of the output branch modify the outgoing frame.  Other branches of the
+        filter graph are executed concurrently on their own FrameBuffer, see
+        hub.filter_pipeline.FilterBranch.  The frame is returned once all branches are
+        completed.
+
+        Filters are executed according to their execution policy, see
+        hub.filter_executor.FilterExecutor.  Filters of different branches using the
+        `thread` or `process` policy run in parallel.  Filters not scheduled for this
+        frame are skipped, see hub.frame_scheduler.FrameScheduler.
+
+        Overlays drawn by the filters are blended into the outgoing frame last, see
+        `overlay`.
+        """
+        self._overlay.clear()
+        if len(pipeline.branches) == 0:
+            await self._run_filters(
+                pipeline.filters, pipeline.filter_formats, buffer, {}
+            )
+            self._composite_overlay(buffer)
+            return buffer.to_frame()
+
+        completed = {branch.name: asyncio.Event() for branch in pipeline.branches}
+        # Create the branch buffers before the output branch modifies the frame.
+        branches = [
+            self._run_filters(
+                branch.filters,
+                branch.filter_formats,
+                buffer.branch(branch.scale),
+                completed,
+                completed[branch.name],
+            )
+            for branch in pipeline.branches
+        ]
+        await asyncio.gather(
+            self._run_filters(
+                pipeline.filters, pipeline.filter_formats, buffer, completed
+            ),
+            *branches,
+        )
+        self._composite_overlay(buffer)
+        return buffer.to_frame()
+
+    def _composite_overlay(self, buffer: FrameBuffer) -> None:
+        """Blend the overlays drawn by the filters into the current frame."""
+        if not self._overlay.pending:
+            return
+        with buffer.trace.span("overlay"):
+            ndarray = buffer.writable("bgr24")
+            self._overlay.composite(ndarray)
+
+    async def _run_filters(
+        self,
+        filters: tuple[Filter, ...],
+        filter_formats: tuple[str, ...],
+        buffer: FrameBuffer,
+        completed: dict[str, asyncio.Event],
+        branch_completed: asyncio.Event | None = None,
+    ) -> None:
+        """Execute the filters of a branch on `buffer`.
+
+        Waits for the branches in `Filter.after` of each filter, using `completed`.
+        Sets `branch_completed` when done, even if a filter failed.
+
+        The transforms of consecutive filters implementing `Filter.transform` are
+        composed and applied in a single pass, see hub.frame_transform.
+        """
+        original = buffer.frame
+        trace = buffer.trace
+        executor = FilterExecutor.instance()
+        fused = _FusedTransform()
+        try:
+            for active_filter, frame_format in zip(filters, filter_formats):
+                # Muted. Only execute filters where run_if_muted is True.
+                if self._muted and not active_filter.run_if_muted:
+                    continue
+
+                for branch in active_filter.after:
+                    await completed[branch].wait()
+
+                if not self._scheduler.should_run(active_filter):
+                    # Avoid requesting the frame if `skip` is not implemented.
+                    if type(active_filter).skip is Filter.skip:
+                        continue
+                    self._apply_transform(fused, buffer)
+                    with trace.span(f"skip:{active_filter.config['name']}"):
+                        if active_filter.analysis_only:
+                            await active_filter.skip(
+                                original,
+                                buffer.readonly(
+                                    frame_format, active_filter.pyramid_level
+                                ),
+                            )
+                        else:
+                            buffer.update(
+                                await active_filter.skip(
+                                    original, buffer.writable(frame_format)
+                                )
+                            )
+                    continue
+
+                if _is_transform(active_filter, frame_format):
+                    if fused.format not in (None, frame_format):
+                        self._apply_transform(fused, buffer)
+                    transform = active_filter.transform(
+                        original, buffer.readonly(frame_format).shape
+                    )
+                    if transform is not None:
+                        fused.add(active_filter, frame_format, transform)
+                        continue
+
+                self._apply_transform(fused, buffer)
+                with self._scheduler.measure(active_filter), trace.span(
+                    f"filter:{active_filter.config['name']}"
+                ):
+                    if active_filter.analysis_only:
+                        await executor.process(
+                            active_filter,
+                            original,
+                            buffer.readonly(frame_format, active_filter.pyramid_level),
+                        )
+                    else:
+                        buffer.update(
+                            await executor.process(
+                                active_filter, original, buffer.writable(frame_format)
+                            )
+                        )
+            self._apply_transform(fused, buffer)
+        finally:
+            if branch_completed is not None:
+                branch_completed.set()
+
+    def _apply_transform(self, fused: _FusedTransform, buffer: FrameBuffer) -> None:
+        """Apply the transforms collected in `fused` to `buffer` and reset `fused`."""
+        if fused.format is None:
+            return
+        filters, frame_format, transform = fused.filters, fused.format, fused.transform
+        fused.reset()
+
+        names = "+".join(f.config["name"] for f in filters)
+        with ExitStack() as stack:
+            for f in filters:
+                stack.enter_context(self._scheduler.measure(f))
+            stack.enter_context(buffer.trace.span(f"transform:{names}"))
+            if not transform.identity:
+                buffer.update(transform.apply(buffer.writable(frame_format)))
 
     async def _run_group_filters(
-        self, original: VideoFrame | AudioFrame, ndarray: numpy.ndarray
+        self, pipeline: FilterPipeline, buffer: FrameBuffer
     ) -> None:
-        """Execute group filter individual frame processing pipeline."""
-        async with self.__lock:
-            ts = time_ns()
-            for active_group_filter in self._group_filters.values():
+        """Execute group filter individual frame processing pipeline.
+
+        Group filters receive a read-only view of the decoded frame, which is shared
+        with the filter pipeline.  See hub.frame_buffer.FrameBuffer.
+        """
+        ts = time_ns()
+        for active_group_filter, frame_format in zip(
+            pipeline.group_filters, pipeline.group_filter_formats
+        ):
+            with buffer.trace.span(
+                f"group_filter:{active_group_filter.config['name']}"
+            ):
+                ndarray = buffer.readonly(
+                    frame_format, active_group_filter.pyramid_level
+                )
                 await active_group_filter.process_individual_frame_and_send_data_to_aggregator(
-                    original, ndarray, ts
+                    buffer.frame, ndarray, ts
                 )
+
+
+def _is_transform(filter: Filter, frame_format: str) -> bool:
+    """Check if the transforms of `filter` can be fused, see `Filter.transform`."""
+    return (
+        type(filter).transform is not Filter.transform
+        and not filter.analysis_only
+        and frame_format in _TRANSFORM_FORMATS
+    )
+
+
+class _FusedTransform:
+    """Transforms of consecutive filters, composed until they are applied."""
+
+    filters: list[Filter]
+    format: str | None
+    transform: FrameTransform
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def add(self, filter: Filter, frame_format: str, transform: FrameTransform) -> None:
+        """Compose `transform` of `filter` after the collected transforms."""
+        self.transform = self.transform.then(transform) if self.filters else transform
+        self.filters.append(filter)
+        self.format = frame_format
+
+    def reset(self) -> None:
+        """Remove all transforms."""
+        self.filters = []
+        self.format = None
+        self.transform = FrameTransform()
@@ -28,6 +28,22 @@ class Config:
     experimenter_multiprocessing: bool
     participant_multiprocessing: bool
 
+    trace_sample_rate: float
+    trace_buffer_size: int
+
+    muted_video_fps: float
+    delay_memory_cap_mb: int
+
+    face_detection_interval: int
+    face_detection_width: int
+
+    inference_port: int
+
+    openface_workers: int
+    openface_port: int
+
+    aggregator_workers: int
+
     def __init__(self):
         """Load config from `backend/config.json`.
 
@@ -94,6 +110,67 @@ class Config:
         if self.log_file is not None:
             self.log_file = join(BACKEND_DIR, self.log_file)
 
+        # Parse optional frame tracing config, see hub.frame_tracer.
+        self.trace_sample_rate = config.get("trace_sample_rate", 0.0)
+        if not isinstance(self.trace_sample_rate, (float, int)) or not (
+            0 <= self.trace_sample_rate <= 1
+        ):
+            raise ValueError('"trace_sample_rate" must be a float between 0 and 1.')
+        self.trace_buffer_size = config.get("trace_buffer_size", 1000)
+        if not isinstance(self.trace_buffer_size, int) or self.trace_buffer_size < 1:
+            raise ValueError('"trace_buffer_size" must be an int greater than 0.')
+
+        self.muted_video_fps = config.get("muted_video_fps", 1.0)
+        if (
+            not isinstance(self.muted_video_fps, (float, int))
+            or self.muted_video_fps <= 0
+        ):
+            raise ValueError('"muted_video_fps" must be a float greater than 0.')
+
+        self.delay_memory_cap_mb = config.get("delay_memory_cap_mb", 512)
+        if (
+            not isinstance(self.delay_memory_cap_mb, int)
+            or self.delay_memory_cap_mb < 0
+        ):
+            raise ValueError('"delay_memory_cap_mb" must be a positive int.')
+
+        # Parse optional face analysis config, see hub.face_analysis.
+        self.face_detection_interval = config.get("face_detection_interval", 10)
+        if (
+            not isinstance(self.face_detection_interval, int)
+            or self.face_detection_interval < 1
+        ):
+            raise ValueError('"face_detection_interval" must be an int greater than 0.')
+        self.face_detection_width = config.get("face_detection_width", 320)
+        if (
+            not isinstance(self.face_detection_width, int)
+            or self.face_detection_width < 1
+        ):
+            raise ValueError('"face_detection_width" must be an int greater than 0.')
+
+        # Parse optional inference service config, see hub.inference_service.
+        self.inference_port = config.get("inference_port", 5590)
+        if not isinstance(self.inference_port, int) or not (
+            0 <= self.inference_port <= 65535
+        ):
+            raise ValueError('"inference_port" must be an int between 0 and 65535.')
+
+        # Parse optional OpenFace pool config, see filters.open_face_au.open_face_pool.
+        self.openface_workers = config.get("openface_workers", 1)
+        if not isinstance(self.openface_workers, int) or self.openface_workers < 0:
+            raise ValueError('"openface_workers" must be a positive int.')
+        self.openface_port = config.get("openface_port", 5591)
+        if not isinstance(self.openface_port, int) or not (
+            0 <= self.openface_port <= 65535
+        ):
+            raise ValueError('"openface_port" must be an int between 0 and 65535.')
+
+        # Parse optional aggregator pool config, see
+        # group_filters.group_filter_aggregator_pool.
+        self.aggregator_workers = config.get("aggregator_workers", 2)
+        if not isinstance(self.aggregator_workers, int) or self.aggregator_workers < 0:
+            raise ValueError('"aggregator_workers" must be a positive int.')
+
         # Parse ssl_cert and ssl_key
         self.ssl_cert = config.get("ssl_cert")
         if self.ssl_cert is not None:
@@ -121,7 +198,14 @@ class Config:
             f"={self.log_dependencies}, log_file={self.log_file}, ping_subprocesses="
             f"{self.ping_subprocesses}, experimenter_multiprocessing="
             f"{self.experimenter_multiprocessing}, participant_multiprocessing="
-            f"{self.participant_multiprocessing}."
+            f"{self.participant_multiprocessing}, trace_sample_rate="
+            f"{self.trace_sample_rate}, trace_buffer_size={self.trace_buffer_size}, "
+            f"muted_video_fps={self.muted_video_fps}, delay_memory_cap_mb="
+            f"{self.delay_memory_cap_mb}, face_detection_interval="
+            f"{self.face_detection_interval}, face_detection_width="
+            f"{self.face_detection_width}, inference_port={self.inference_port}, "
+            f"openface_workers={self.openface_workers}, openface_port="
+            f"{self.openface_port}, aggregator_workers={self.aggregator_workers}."
         )
 
     def __repr__(self) -> str:
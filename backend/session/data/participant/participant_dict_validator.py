@@ -49,6 +49,10 @@ def is_valid_participant(data, recursive: bool = True) -> TypeGuard[ParticipantD
         for filter in data["video_filters"]:
             if not filter_utils.is_valid_filter_dict(filter):
                 return False
+        if not filter_utils.is_valid_filter_graph(
+            data["audio_filters"]
+        ) or not filter_utils.is_valid_filter_graph(data["video_filters"]):
+            return False
         for filter in data["audio_group_filters"]:
             if not group_filter_utils.is_valid_filter_dict(filter):
                 return False
@@ -20,6 +20,7 @@ from custom_types.message import MessageDict
 from custom_types.success import SuccessDict
 from custom_types.note import is_valid_note
 from custom_types.mute import is_valid_mute_request
+from custom_types.trace import is_valid_trace_request
 from custom_types.session_id_request import is_valid_session_id_request
 
 from connection.connection_state import ConnectionState
@@ -81,6 +82,7 @@ class Experimenter(User):
         self.on_message("SET_FILTERS", self._handle_set_filters)
         self.on_message("SET_GROUP_FILTERS", self._handle_set_group_filters)
         self.on_message("GET_SESSION", self._handle_get_session)
+        self.on_message("GET_TRACES", self._handle_get_traces)
 
     def __str__(self) -> str:
         """Get string representation of this experimenter.
@@ -670,6 +672,59 @@ class Experimenter(User):
         )
         return MessageDict(type="SUCCESS", data=success)
 
+    async def _handle_get_traces(self, data: Any) -> MessageDict:
+        """Handle requests with type `GET_TRACES`.
+
+        Check if data is a valid custom_types.trace.TraceRequestDict and collect the
+        pipeline traces and filter schedules of the requested participant, or all
+        participants if `participant_id` is "all".  Traces are only recorded if
+        `trace_sample_rate` is set in the config, filter schedules are always
+        available.
+
+        Parameters
+        ----------
+        data : any or custom_types.trace.TraceRequestDict
+            Message data, can be anything.  Everything other than
+            custom_types.trace.TraceRequestDict will raise an ErrorDictException.
+
+        Returns
+        -------
+        custom_types.message.MessageDict
+            MessageDict with type: `TRACES`, data: traces and filter schedules by
+            participant ID and track kind.  See
+            connection.connection_interface.ConnectionInterface.get_traces.
+
+        Raises
+        ------
+        ErrorDictException
+            If data is not a valid custom_types.trace.TraceRequestDict, the participant
+            is not connected or if this Experimenter is not connected to a
+            hub.experiment.Experiment.
+        """
+        if not is_valid_trace_request(data):
+            raise ErrorDictException(
+                code=400,
+                type="INVALID_DATATYPE",
+                description="Message data is not a valid TraceRequest.",
+            )
+
+        participant_id = data["participant_id"]
+        experiment = self.get_experiment_or_raise("Failed to get traces.")
+        if participant_id == "all":
+            participants = list(experiment.participants.values())
+        elif participant_id in experiment.participants:
+            participants = [experiment.participants[participant_id]]
+        else:
+            raise ErrorDictException(
+                code=404,
+                type="UNKNOWN_PARTICIPANT",
+                description=f'Unknown participant ID: "{participant_id}".',
+            )
+
+        traces = await asyncio.gather(*[p.get_traces() for p in participants])
+        data = {p.id: t for p, t in zip(participants, traces)}
+        return MessageDict(type="TRACES", data=data)
+
     async def _handle_set_filters(self, data: Any) -> MessageDict:
         """Handle requests with type `SET_FILTERS`.
 
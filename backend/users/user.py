@@ -562,6 +562,16 @@ class User(AsyncIOEventEmitter, metaclass=ABCMeta):
         """Stop recording for this user."""
         await self._connection.stop_recording()
 
+    async def get_traces(self) -> dict[str, dict]:
+        """Get the pipeline traces and filter schedules of this user's incoming tracks.
+
+        See hub.connection_interface.ConnectionInterface `get_traces`.  Empty if the
+        connection is not set.
+        """
+        if self._connection is None:
+            return {kind: {"traces": [], "filters": {}} for kind in ("audio", "video")}
+        return await self._connection.get_traces()
+
     def _handle_disconnect(self) -> None:
         """Handle this user disconnecting.
 